@@ -0,0 +1,746 @@
+"""
+A reproducible, offline benchmark of the Snowflake dialect's tokenizer, parser and generator.
+
+The corpus is generated from a fixed seed and mixes the constructs that tend to matter in
+Snowflake workloads: VARIANT paths, the `TO_TIMESTAMP` variants, `DATEADD`/`DATEDIFF`,
+`OBJECT_CONSTRUCT`, `MATCH_RECOGNIZE`, `LIKE ANY`, comments and $$-quoted bodies. Besides the
+individual statements, a multi-MB script made of the same statements is processed as a whole.
+
+Each phase reports its throughput, its peak memory and the number of allocations it made that
+are still alive once it's done, i.e. those that hold its output. Results can be saved as a
+baseline and later runs compared against it, failing if a phase got slower or hungrier than the
+configured thresholds allow. Timings are normalized by a calibration loop, so that baselines are
+somewhat portable across machines.
+
+A baseline of the default configuration ships as `snowflake_bench_baseline.json`, which is what
+CI compares against. It's regenerated with `--save-baseline` whenever a change is expected to
+move the numbers, and the new baseline is committed along with the change.
+
+`--to-timestamp` runs a separate, focused benchmark instead: it compares the classifier that
+decides whether a single-argument `TO_TIMESTAMP` is given a literal against the general
+`simplify_literals` pass it replaces, on a corpus made mostly of such calls. `--executor` compares
+the vectorized executor of `snowflake_executor` against sqlglot's row-at-a-time executor, on
+queries both of them can run. `--startup` measures, in fresh interpreters, how long importing
+the tools' modules and parsing a first Snowflake statement takes and how much memory it needs,
+and breaks the import time down by module. These report the same measurements as the phases.
+
+Example:
+    python snowflake_bench.py --baseline snowflake_bench_baseline.json
+    python snowflake_bench.py --save-baseline snowflake_bench_baseline.json
+    python snowflake_bench.py --to-timestamp
+    python snowflake_bench.py --executor --rows 200000
+    python snowflake_bench.py --startup
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+import typing as t
+
+from sqlglot.dialects.dialect import Dialect
+
+DEFAULT_STATEMENTS = 2000
+DEFAULT_SCRIPT_SIZE = 2 << 20
+DEFAULT_REPEAT = 3
+DEFAULT_SEED = 0
+DEFAULT_TIME_THRESHOLD = 0.25
+DEFAULT_MEMORY_THRESHOLD = 0.1
+DEFAULT_ROWS = 100_000
+DEFAULT_STARTUP_MODULES = 15
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "snowflake_bench_baseline.json"
+)
+
+# `//` comments are left out: the Snowflake tokenizer doesn't support them yet
+TEMPLATES: t.Tuple[str, ...] = (
+    "SELECT v:{a}.{b}::STRING AS {c}, v:{c}[{n}].{d} FROM {t} WHERE v:{a}::INT > {n}",
+    "SELECT TO_TIMESTAMP({a}), TO_TIMESTAMP('{date}', 'YYYY-MM-DD HH24:MI:SS'), "
+    "TO_TIMESTAMP({epoch}, 3), TO_TIMESTAMP('{epoch}') FROM {t}",
+    "SELECT DATEADD({unit}, {n}, {a}), DATEDIFF({unit}, {a}, {b}), "
+    "DATE_PART(epoch_second, {c}) FROM {t}",
+    "SELECT OBJECT_CONSTRUCT('{a}', {n}, '{b}', {c}, '{d}', '{date}') AS o FROM {t}",
+    "SELECT * FROM {t} MATCH_RECOGNIZE (PARTITION BY {a} ORDER BY {b} "
+    "MEASURES MATCH_NUMBER() AS mn, COUNT(*) AS cnt ONE ROW PER MATCH "
+    "AFTER MATCH SKIP PAST LAST ROW PATTERN (A B+) DEFINE A AS {c} > {n}, B AS {c} < {n})",
+    "SELECT {a} FROM {t} WHERE {b} LIKE ANY ('%{c}', '{d}%') AND {c} ILIKE ANY ('%{a}%')",
+    "-- {a} {b}\nSELECT /* {c} */ {a}, {b} /* {d} */ FROM {t} -- {n}\nWHERE {c} = {n}",
+    "CREATE OR REPLACE PROCEDURE {t}_proc() RETURNS INT LANGUAGE SQL AS $$ "
+    "BEGIN INSERT INTO {t} SELECT {a}, {b} FROM {t}_src; RETURN {n}; END $$",
+    "SELECT IFF({a} > {n}, DIV0({b}, {c}), ZEROIFNULL({d})) FROM {t} "
+    "QUALIFY ROW_NUMBER() OVER (PARTITION BY {a} ORDER BY {b} DESC) = 1",
+    "INSERT INTO {t} ({a}, {b}) VALUES ({n}, '{date}'), ({epoch}, '{d}')",
+)
+
+UNITS = ("day", "hour", "minute", "month", "week", "year")
+
+TO_TIMESTAMP_ARGUMENTS = (
+    "{a}",
+    "{a}.{b}",
+    "{epoch}",
+    "'{date} 01:02:03'",
+    "{n} * 86400",
+    "40 * 365 * {n}",
+    "-{epoch}",
+    "{a} + {n}",
+    "{a}:ts::NUMBER",
+    "DATE_PART(EPOCH_MILLISECOND, {a}) / 1000",
+)
+
+# The row-at-a-time executor can't sort NULLs or evaluate DIV0, so these queries avoid both
+EXECUTOR_QUERIES = {
+    "conditionals": "SELECT ZEROIFNULL(a) AS z, NULLIFZERO(b) AS n, SQUARE(b) AS q FROM t "
+    "WHERE a > 10",
+    "arithmetic": "SELECT a * b + 1 AS m, f / b AS r FROM t WHERE a > 10 AND b < 90",
+    "patterns": "SELECT a FROM t WHERE s LIKE 'b%' OR s LIKE 'ch%'",
+    "sort": "SELECT a, b FROM t ORDER BY a DESC, b",
+}
+
+# The modules whose cold start is measured, each of which is imported by a fresh interpreter
+STARTUP_MODULES = (
+    "sqlglot",
+    "snowflake_split",
+    "snowflake_bulk",
+    "snowflake_paths",
+    "snowflake_diskcache",
+    "snowflake_service",
+)
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+modules = len(sys.modules)
+import {module}
+from sqlglot.dialects.dialect import Dialect
+Dialect.get_or_raise("snowflake")().parse("SELECT v:a.b::INT FROM t WHERE x > 1")
+print(json.dumps([time.perf_counter() - start, len(sys.modules) - modules]))
+"""
+
+# The same as STARTUP_SCRIPT, but traced, so it's run separately from the timed interpreters
+STARTUP_MEMORY_SCRIPT = """
+import json, tracemalloc
+tracemalloc.start()
+import {module}
+from sqlglot.dialects.dialect import Dialect
+Dialect.get_or_raise("snowflake")().parse("SELECT v:a.b::INT FROM t WHERE x > 1")
+_, peak = tracemalloc.get_traced_memory()
+print(json.dumps([peak, len(tracemalloc.take_snapshot().traces)]))
+"""
+
+
+class PhaseResult(t.NamedTuple):
+    """
+    The measurements of one phase of one workload.
+
+    Attributes:
+        items: the number of items processed, i.e. tokens for tokenize and statements otherwise.
+        seconds: the best wall time out of all repetitions.
+        per_second: the throughput, in items per second.
+        peak_bytes: the peak memory allocated while the phase ran.
+        allocations: the number of allocations made by the phase that are still alive after it
+            ran, as counted by tracemalloc.
+    """
+
+    items: int
+    seconds: float
+    per_second: float
+    peak_bytes: int
+    allocations: int
+
+
+def build_corpus(statements: int = DEFAULT_STATEMENTS, seed: int = DEFAULT_SEED) -> t.List[str]:
+    """
+    Builds a deterministic corpus of Snowflake statements.
+
+    Args:
+        statements: the number of statements.
+        seed: the seed of the random generator.
+
+    Returns:
+        The statements.
+    """
+    rng = random.Random(seed)
+
+    def name() -> str:
+        return rng.choice("abcdefghij") + str(rng.randrange(100))
+
+    corpus = []
+    for i in range(statements):
+        template = TEMPLATES[i % len(TEMPLATES)]
+        corpus.append(
+            template.format(
+                a=name(),
+                b=name(),
+                c=name(),
+                d=name(),
+                t=f"tbl_{rng.randrange(1000)}",
+                n=rng.randrange(1, 10000),
+                epoch=rng.randrange(1_500_000_000, 1_700_000_000),
+                date=f"20{rng.randrange(10, 30)}-0{rng.randrange(1, 10)}-1{rng.randrange(10)}",
+                unit=rng.choice(UNITS),
+            )
+        )
+
+    return corpus
+
+
+def build_script(corpus: t.Sequence[str], size: int = DEFAULT_SCRIPT_SIZE) -> str:
+    """Joins the statements of `corpus`, cycling through them, into a script of `size` chars."""
+    parts = []
+    length = 0
+    while length < size:
+        for sql in corpus:
+            parts.append(sql)
+            length += len(sql) + 2
+            if length >= size:
+                break
+    return ";\n".join(parts)
+
+
+def calibrate(repeat: int = DEFAULT_REPEAT) -> float:
+    """Times a fixed, pure-Python workload, used to normalize timings across machines."""
+
+    def workload() -> None:
+        words: t.Dict[str, int] = {}
+        for i in range(200_000):
+            word = f"w{i % 1000}".upper()
+            words[word] = words.get(word, 0) + len(word)
+
+    return _best_time(workload, repeat)
+
+
+def run(
+    corpus: t.Sequence[str], script: str, repeat: int = DEFAULT_REPEAT
+) -> t.Dict[str, PhaseResult]:
+    """
+    Benchmarks the tokenize, parse and generate phases on the statements of `corpus`, one by
+    one, and on `script` as a whole.
+
+    Args:
+        corpus: the statements.
+        script: the script.
+        repeat: the number of times each phase is timed.
+
+    Returns:
+        The measurements, keyed by "<workload>.<phase>".
+    """
+    dialect = Dialect.get_or_raise("snowflake")()
+    results = {}
+
+    for workload, sqls in (("statements", list(corpus)), ("script", [script])):
+        tokens: t.List[t.List] = []
+        trees: t.List[t.List] = []
+        outputs: t.List[str] = []
+
+        def tokenize() -> None:
+            # A fresh tokenizer is used each time, since tokenizers hold on to their last output
+            tokens[:] = [dialect.tokenizer_class().tokenize(sql) for sql in sqls]
+
+        def parse() -> None:
+            trees[:] = [dialect.parser().parse(ts, sql) for ts, sql in zip(tokens, sqls)]
+
+        def generate() -> None:
+            outputs[:] = [dialect.generate(e) for expressions in trees for e in expressions]
+
+        phases = (
+            ("tokenize", tokenize, tokens.clear),
+            ("parse", parse, trees.clear),
+            ("generate", generate, outputs.clear),
+        )
+
+        for phase, function, clear in phases:
+            measurements = _measure(function, repeat, clear)
+
+            if phase == "tokenize":
+                items = sum(len(ts) for ts in tokens)
+            else:
+                items = sum(len(expressions) for expressions in trees)
+
+            results[f"{workload}.{phase}"] = _result(items, *measurements)
+
+    return results
+
+
+def build_to_timestamp_corpus(
+    statements: int = DEFAULT_STATEMENTS, seed: int = DEFAULT_SEED
+) -> t.List[str]:
+    """Generates `statements` SELECTs made of single-argument `TO_TIMESTAMP` calls."""
+    rng = random.Random(seed)
+
+    def argument() -> str:
+        return rng.choice(TO_TIMESTAMP_ARGUMENTS).format(
+            a=rng.choice("abcdefghij") + str(rng.randrange(100)),
+            b=rng.choice("abcdefghij"),
+            n=rng.randrange(1, 10000),
+            epoch=rng.randrange(1_500_000_000, 1_700_000_000),
+            date=f"20{rng.randrange(10, 30)}-0{rng.randrange(1, 10)}-1{rng.randrange(10)}",
+        )
+
+    return [
+        "SELECT " + ", ".join(f"TO_TIMESTAMP({argument()})" for _ in range(8)) + " FROM t"
+        for _ in range(statements)
+    ]
+
+
+def run_to_timestamp(
+    corpus: t.Sequence[str], repeat: int = DEFAULT_REPEAT
+) -> t.Dict[str, PhaseResult]:
+    """
+    Benchmarks the classification of the `TO_TIMESTAMP` arguments found in `corpus`, using the
+    dialect's classifier and `simplify_literals`, and checks that both make the same decisions.
+
+    Args:
+        corpus: the statements.
+        repeat: the number of times each classifier is timed.
+
+    Returns:
+        The measurements, keyed by "to_timestamp.<classifier>".
+    """
+    from sqlglot import exp
+    from sqlglot.dialects.snowflake import _folds_to_literal
+    from sqlglot.optimizer.simplify import simplify_literals
+
+    dialect = Dialect.get_or_raise("snowflake")()
+
+    # The arguments are collected from the unparsed calls, since parsing already classifies them
+    arguments = []
+    for sql in corpus:
+        for select in dialect.parse(sql.replace("TO_TIMESTAMP(", "ANONYMOUS_TS(")):
+            assert select
+            for call in select.find_all(exp.Anonymous):
+                arguments.append(call.expressions[0])
+
+    def simplifier(argument: exp.Expression) -> bool:
+        return isinstance(simplify_literals(argument, root=True), exp.Literal)
+
+    decisions = [_folds_to_literal(argument) for argument in arguments]
+    if decisions != [simplifier(argument) for argument in arguments]:
+        raise AssertionError("The classifier disagrees with simplify_literals")
+
+    return {
+        f"to_timestamp.{name}": _result(
+            len(arguments),
+            *_measure(lambda: [classify(argument) for argument in arguments], repeat),
+        )
+        for name, classify in (("classifier", _folds_to_literal), ("simplify_literals", simplifier))
+    }
+
+
+def build_executor_tables(
+    rows: int = DEFAULT_ROWS, seed: int = DEFAULT_SEED
+) -> t.Dict[str, t.List[t.Dict[str, t.Any]]]:
+    """Generates the table the executor queries run against."""
+    rng = random.Random(seed)
+    strings = ("apple", "banana", "cherry", "date", "elderberry")
+    return {
+        "T": [
+            {
+                "A": rng.randrange(100),
+                "B": rng.randrange(1, 100),
+                "F": rng.random(),
+                "S": rng.choice(strings),
+            }
+            for _ in range(rows)
+        ]
+    }
+
+
+def run_executor(
+    tables: t.Dict[str, t.List[t.Dict[str, t.Any]]], repeat: int = DEFAULT_REPEAT
+) -> t.Dict[str, PhaseResult]:
+    """
+    Benchmarks the row-at-a-time and the vectorized executors on `EXECUTOR_QUERIES`, and checks
+    that both return the same rows. Only the execution of the plans is timed.
+
+    Args:
+        tables: the tables to query.
+        repeat: the number of times each query is timed.
+
+    Returns:
+        The measurements, keyed by "executor.<query>.<executor>".
+    """
+    from sqlglot.executor import ensure_tables
+    from sqlglot.executor.python import PythonExecutor
+    from sqlglot.optimizer import optimize
+    from sqlglot.planner import Plan
+    from snowflake_executor import VectorizedExecutor
+
+    tables_ = ensure_tables(tables)
+    schema = {
+        name: {column: type(value).__name__ for column, value in rows[0].items()}
+        for name, rows in tables.items()
+    }
+    executors = {
+        "row": PythonExecutor(tables=tables_),
+        "vectorized": VectorizedExecutor(tables=tables_),
+    }
+
+    items = sum(len(rows) for rows in tables.values())
+    results = {}
+    for query, sql in EXECUTOR_QUERIES.items():
+        expression = optimize(sql, schema, leave_tables_isolated=True, dialect="snowflake")
+        plan = Plan(expression)
+
+        outputs = {name: executor.execute(plan).rows for name, executor in executors.items()}
+        if outputs["row"] != outputs["vectorized"]:
+            raise AssertionError(f"The executors disagree on the {query} query")
+
+        for name, executor in executors.items():
+            results[f"executor.{query}.{name}"] = _result(
+                items, *_measure(lambda: executor.execute(plan), repeat)
+            )
+
+    return results
+
+
+def run_startup(
+    modules: t.Sequence[str] = STARTUP_MODULES, repeat: int = DEFAULT_REPEAT
+) -> t.Dict[str, PhaseResult]:
+    """
+    Benchmarks the time it takes a fresh interpreter to import each of `modules` and parse its
+    first Snowflake statement. The interpreter's own startup isn't included.
+
+    Args:
+        modules: the modules to import.
+        repeat: the number of interpreters started for each module.
+
+    Returns:
+        The measurements, keyed by "startup.<module>". Their items are the number of modules
+        that were imported, and their memory is that of the whole interpreter after startup.
+    """
+    results = {}
+    for module in modules:
+        best = float("inf")
+        imported = 0
+        for _ in range(max(repeat, 1)):
+            output = _run_python(STARTUP_SCRIPT.format(module=module)).stdout
+            seconds, imported = json.loads(output)
+            best = min(best, seconds)
+
+        output = _run_python(STARTUP_MEMORY_SCRIPT.format(module=module)).stdout
+        peak_bytes, allocations = json.loads(output)
+
+        results[f"startup.{module}"] = _result(imported, best, peak_bytes, allocations)
+
+    return results
+
+
+def import_breakdown(module: str = "sqlglot") -> t.List[t.Tuple[str, float, float]]:
+    """
+    Imports `module` in a fresh interpreter, using `-X importtime`.
+
+    Returns:
+        The modules that were imported, along with their own and their cumulative import times
+        in seconds, sorted from the slowest to the fastest of their own import times.
+    """
+    stderr = _run_python(STARTUP_SCRIPT.format(module=module), "-X", "importtime").stderr
+    breakdown = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        if own.strip().isdigit():
+            breakdown.append((name.strip(), int(own) / 1e6, int(cumulative) / 1e6))
+    return sorted(breakdown, key=lambda entry: entry[1], reverse=True)
+
+
+def compare(
+    results: t.Dict[str, PhaseResult],
+    calibration: float,
+    baseline: t.Dict[str, t.Any],
+    time_threshold: float = DEFAULT_TIME_THRESHOLD,
+    memory_threshold: float = DEFAULT_MEMORY_THRESHOLD,
+) -> t.List[str]:
+    """
+    Compares benchmark results against a baseline saved by `to_json`.
+
+    Args:
+        results: the results of `run`.
+        calibration: the result of `calibrate`, taken alongside `results`.
+        baseline: the baseline.
+        time_threshold: the tolerated relative slowdown of a phase, e.g. 0.25 for 25%.
+        memory_threshold: the tolerated relative increase of a phase's peak memory and of its
+            allocations.
+
+    Returns:
+        A description of each regression, if any.
+    """
+    scale = calibration / baseline["calibration"] if baseline.get("calibration") else 1.0
+    regressions = []
+
+    for key, expected in baseline["results"].items():
+        actual = results.get(key)
+        if actual is None:
+            regressions.append(f"{key}: missing from the results")
+            continue
+
+        limit = expected["seconds"] * scale * (1 + time_threshold)
+        if actual.seconds > limit:
+            regressions.append(
+                f"{key}: {actual.seconds:.4f}s, expected at most {limit:.4f}s "
+                f"({expected['seconds']:.4f}s in the baseline, scaled by {scale:.2f})"
+            )
+
+        limit = expected["peak_bytes"] * (1 + memory_threshold)
+        if actual.peak_bytes > limit:
+            regressions.append(
+                f"{key}: peak memory {actual.peak_bytes} bytes, expected at most {int(limit)} "
+                f"({expected['peak_bytes']} in the baseline)"
+            )
+
+        limit = expected["allocations"] * (1 + memory_threshold)
+        if actual.allocations > limit:
+            regressions.append(
+                f"{key}: {actual.allocations} allocations, expected at most {int(limit)} "
+                f"({expected['allocations']} in the baseline)"
+            )
+
+    return regressions
+
+
+def to_json(
+    results: t.Dict[str, PhaseResult], calibration: float, config: t.Dict[str, t.Any]
+) -> t.Dict[str, t.Any]:
+    return {
+        "config": config,
+        "calibration": calibration,
+        "results": {key: result._asdict() for key, result in results.items()},
+    }
+
+
+def format_results(results: t.Dict[str, PhaseResult]) -> str:
+    width = max(len("phase"), *map(len, results))
+    lines = [
+        f"{'phase':<{width}} {'items':>9} {'seconds':>9} {'items/s':>12} {'peak MiB':>9} "
+        f"{'allocs':>9}"
+    ]
+    for key, result in results.items():
+        lines.append(
+            f"{key:<{width}} {result.items:>9} {result.seconds:>9.4f} {result.per_second:>12.1f} "
+            f"{result.peak_bytes / (1 << 20):>9.2f} {result.allocations:>9}"
+        )
+    return "\n".join(lines)
+
+
+def _run_python(script: str, *options: str) -> subprocess.CompletedProcess:
+    # This file's directory is put on the path, so that the tools' modules can be imported
+    directory = os.path.dirname(os.path.abspath(__file__))
+    path = os.pathsep.join(filter(None, (directory, os.environ.get("PYTHONPATH"))))
+    return subprocess.run(
+        [sys.executable, *options, "-c", script],
+        capture_output=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": path},
+        text=True,
+    )
+
+
+def _best_time(function: t.Callable[[], t.Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _result(items: int, seconds: float, peak_bytes: int, allocations: int) -> PhaseResult:
+    return PhaseResult(
+        items=items,
+        seconds=seconds,
+        per_second=items / seconds if seconds else 0.0,
+        peak_bytes=peak_bytes,
+        allocations=allocations,
+    )
+
+
+def _measure(
+    function: t.Callable[[], t.Any],
+    repeat: int,
+    clear: t.Optional[t.Callable[[], t.Any]] = None,
+) -> t.Tuple[float, int, int]:
+    seconds = _best_time(function, repeat)
+    # The previous output is dropped first, so that the allocations holding it are counted
+    if clear:
+        clear()
+    return (seconds, *_measure_memory(function))
+
+
+def _measure_memory(function: t.Callable[[], t.Any]) -> t.Tuple[int, int]:
+    # Runs the phase once more, so that tracing doesn't skew the timings. Its output is kept
+    # alive until the allocations are counted
+    gc.collect()
+    tracemalloc.start()
+    try:
+        output = function()
+        # The garbage left in reference cycles isn't part of the phase's output
+        gc.collect()
+        _, peak = tracemalloc.get_traced_memory()
+        allocations = len(tracemalloc.take_snapshot().traces)
+    finally:
+        tracemalloc.stop()
+    del output
+    return peak, allocations
+
+
+def main(argv: t.Optional[t.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Snowflake dialect")
+    parser.add_argument(
+        "--statements",
+        dest="statements",
+        type=int,
+        default=DEFAULT_STATEMENTS,
+        help=f"Number of statements in the corpus, default is {DEFAULT_STATEMENTS}",
+    )
+    parser.add_argument(
+        "--script-size",
+        dest="script_size",
+        type=int,
+        default=DEFAULT_SCRIPT_SIZE,
+        help=f"Size of the script in characters, default is {DEFAULT_SCRIPT_SIZE}",
+    )
+    parser.add_argument(
+        "--repeat",
+        dest="repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help=f"Number of timed runs per phase, default is {DEFAULT_REPEAT}",
+    )
+    parser.add_argument(
+        "--seed",
+        dest="seed",
+        type=int,
+        default=DEFAULT_SEED,
+        help=f"Seed of the corpus generator, default is {DEFAULT_SEED}",
+    )
+    parser.add_argument(
+        "--baseline",
+        dest="baseline",
+        type=str,
+        default=None,
+        help="Baseline to compare the results against, e.g. snowflake_bench_baseline.json",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        dest="save_baseline",
+        type=str,
+        default=None,
+        help="File to save the results to, to be used as a baseline",
+    )
+    parser.add_argument(
+        "--time-threshold",
+        dest="time_threshold",
+        type=float,
+        default=DEFAULT_TIME_THRESHOLD,
+        help=f"Tolerated relative slowdown, default is {DEFAULT_TIME_THRESHOLD}",
+    )
+    parser.add_argument(
+        "--memory-threshold",
+        dest="memory_threshold",
+        type=float,
+        default=DEFAULT_MEMORY_THRESHOLD,
+        help=f"Tolerated relative increase of peak memory, default is {DEFAULT_MEMORY_THRESHOLD}",
+    )
+    parser.add_argument(
+        "--to-timestamp",
+        dest="to_timestamp",
+        action="store_true",
+        help="Benchmark the classification of TO_TIMESTAMP arguments instead",
+    )
+    parser.add_argument(
+        "--executor",
+        dest="executor",
+        action="store_true",
+        help="Benchmark the vectorized executor against the row-at-a-time one instead",
+    )
+    parser.add_argument(
+        "--rows",
+        dest="rows",
+        type=int,
+        default=DEFAULT_ROWS,
+        help=f"Number of rows of the executor benchmark's table, default is {DEFAULT_ROWS}",
+    )
+    parser.add_argument(
+        "--startup",
+        dest="startup",
+        action="store_true",
+        help="Benchmark the cold start of the tools' modules instead",
+    )
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        print(format_results(run_startup(STARTUP_MODULES, args.repeat)))
+        print(f"\nthe {DEFAULT_STARTUP_MODULES} slowest imports of sqlglot:")
+        for name, own, cumulative in import_breakdown()[:DEFAULT_STARTUP_MODULES]:
+            print(f"{name:<40} {own * 1000:>8.2f}ms {cumulative * 1000:>8.2f}ms cumulative")
+        return 0
+
+    if args.executor:
+        results = run_executor(build_executor_tables(args.rows, args.seed), args.repeat)
+        print(format_results(results))
+        for query in EXECUTOR_QUERIES:
+            speedup = (
+                results[f"executor.{query}.row"].seconds
+                / results[f"executor.{query}.vectorized"].seconds
+            )
+            print(f"{query} speedup of the vectorized executor: {speedup:.1f}x")
+        return 0
+
+    if args.to_timestamp:
+        results = run_to_timestamp(
+            build_to_timestamp_corpus(args.statements, args.seed), args.repeat
+        )
+        print(format_results(results))
+        speedup = (
+            results["to_timestamp.simplify_literals"].seconds
+            / results["to_timestamp.classifier"].seconds
+        )
+        print(f"classifier speedup over simplify_literals: {speedup:.1f}x")
+        return 0
+
+    config = {"statements": args.statements, "script_size": args.script_size, "seed": args.seed}
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline["config"] != config:
+            print(
+                f"The baseline was recorded with {baseline['config']}, not {config}",
+                file=sys.stderr,
+            )
+            return 2
+
+    corpus = build_corpus(args.statements, args.seed)
+    script = build_script(corpus, args.script_size)
+
+    calibration = calibrate(args.repeat)
+    results = run(corpus, script, args.repeat)
+    print(format_results(results))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as file:
+            json.dump(to_json(results, calibration, config), file, indent=2)
+            file.write("\n")
+
+    if baseline is not None:
+        regressions = compare(
+            results, calibration, baseline, args.time_threshold, args.memory_threshold
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
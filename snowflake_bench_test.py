@@ -0,0 +1,177 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from sqlglot import parse_one
+from snowflake_bench import (
+    BASELINE_PATH,
+    DEFAULT_SCRIPT_SIZE,
+    DEFAULT_SEED,
+    DEFAULT_STATEMENTS,
+    STARTUP_MODULES,
+    TEMPLATES,
+    PhaseResult,
+    build_corpus,
+    build_executor_tables,
+    build_script,
+    build_to_timestamp_corpus,
+    compare,
+    main,
+    run,
+    run_executor,
+    run_startup,
+    run_to_timestamp,
+    to_json,
+)
+
+
+def _result(seconds, peak_bytes=1000, allocations=100):
+    return PhaseResult(
+        items=10,
+        seconds=seconds,
+        per_second=10 / seconds,
+        peak_bytes=peak_bytes,
+        allocations=allocations,
+    )
+
+
+def test_corpus_is_deterministic():
+    corpus = build_corpus(50)
+    assert corpus == build_corpus(50)
+    assert corpus != build_corpus(50, seed=1)
+    assert len(corpus) == 50
+
+    for sql in corpus[: len(TEMPLATES)]:
+        assert parse_one(sql, read="snowflake")
+
+
+def test_script_size():
+    corpus = build_corpus(20)
+    script = build_script(corpus, 5000)
+    assert 5000 <= len(script) < 5000 + max(map(len, corpus)) + 2
+    assert script.startswith(corpus[0] + ";\n" + corpus[1])
+
+
+def test_run():
+    corpus = build_corpus(len(TEMPLATES))
+    results = run(corpus, build_script(corpus, 3000), repeat=1)
+
+    assert sorted(results) == sorted(
+        f"{workload}.{phase}"
+        for workload in ("statements", "script")
+        for phase in ("tokenize", "parse", "generate")
+    )
+    assert results["statements.parse"].items == len(TEMPLATES)
+    assert results["statements.generate"].items == len(TEMPLATES)
+    assert results["statements.tokenize"].items > len(TEMPLATES)
+    assert all(result.peak_bytes > 0 for result in results.values())
+
+    # The allocations that hold each phase's output are counted, so parsing a statement takes
+    # more of them than generating it back
+    assert results["statements.parse"].allocations > results["statements.generate"].allocations
+    assert results["statements.generate"].allocations >= len(TEMPLATES)
+
+
+def test_compare():
+    baseline = to_json({"a": _result(1.0), "b": _result(1.0)}, calibration=2.0, config={})
+
+    assert compare({"a": _result(1.2), "b": _result(0.5)}, 2.0, baseline) == []
+
+    # Timings are scaled by the calibration, peak memory isn't
+    assert compare({"a": _result(2.4), "b": _result(1.0)}, 4.0, baseline) == []
+    regressions = compare({"a": _result(1.3), "b": _result(1.0, 2000)}, 2.0, baseline)
+    assert [regression.split(":")[0] for regression in regressions] == ["a", "b"]
+    assert "peak memory 2000 bytes" in regressions[1]
+    regressions = compare({"a": _result(1.0), "b": _result(1.0, allocations=120)}, 2.0, baseline)
+    assert regressions == ["b: 120 allocations, expected at most 110 (100 in the baseline)"]
+
+    assert compare({"a": _result(1.0)}, 2.0, baseline) == ["b: missing from the results"]
+    assert compare({"a": _result(1.4), "b": _result(1.0)}, 2.0, baseline, time_threshold=0.5) == []
+
+
+def test_baseline_round_trip(tmp_path, capsys):
+    options = ["--statements", "20", "--script-size", "2000", "--repeat", "1"]
+    path = str(tmp_path / "baseline.json")
+
+    assert main([*options, "--save-baseline", path]) == 0
+    with open(path, encoding="utf-8") as file:
+        baseline = json.load(file)
+    assert baseline["config"] == {"statements": 20, "script_size": 2000, "seed": 0}
+    assert "statements.parse" in capsys.readouterr().out
+
+    # A run is well within 100x of its own baseline
+    assert (
+        main([*options, "--baseline", path, "--time-threshold", "100", "--memory-threshold", "100"])
+        == 0
+    )
+
+    baseline["results"]["script.parse"]["seconds"] = 0.0
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(baseline, file)
+    assert main([*options, "--baseline", path]) == 1
+    assert "REGRESSION script.parse" in capsys.readouterr().err
+
+
+def test_baseline_config_must_match(tmp_path, capsys):
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps({"config": {"statements": 1}}), encoding="utf-8")
+    assert main(["--statements", "20", "--baseline", str(path)]) == 2
+    assert "The baseline was recorded with" in capsys.readouterr().err
+
+
+def test_shipped_baseline():
+    with open(BASELINE_PATH, encoding="utf-8") as file:
+        baseline = json.load(file)
+    assert baseline["config"] == {
+        "statements": DEFAULT_STATEMENTS,
+        "script_size": DEFAULT_SCRIPT_SIZE,
+        "seed": DEFAULT_SEED,
+    }
+
+    corpus = build_corpus(len(TEMPLATES))
+    results = run(corpus, build_script(corpus, 1000), repeat=1)
+    assert sorted(baseline["results"]) == sorted(results)
+    for result in baseline["results"].values():
+        assert sorted(result) == sorted(PhaseResult._fields)
+
+
+@pytest.mark.parametrize("option", ["--to-timestamp", "--executor"])
+def test_focused_benchmarks(capsys, option):
+    assert main([option, "--statements", "20", "--rows", "200", "--repeat", "1"]) == 0
+    assert "speedup" in capsys.readouterr().out
+
+
+def test_focused_benchmarks_measure_memory():
+    results = {
+        **run_to_timestamp(build_to_timestamp_corpus(20), repeat=1),
+        **run_executor(build_executor_tables(rows=200), repeat=1),
+    }
+    assert all(result.peak_bytes > 0 for result in results.values())
+    # The executors' results hold a row per selected row
+    assert all(
+        result.allocations > 0 for key, result in results.items() if key.startswith("executor.")
+    )
+
+
+def test_startup():
+    results = run_startup(["snowflake_split"], repeat=1)
+    assert list(results) == ["startup.snowflake_split"]
+    result = results["startup.snowflake_split"]
+    assert result.items > 0
+    assert result.seconds > 0
+    assert result.allocations > 0
+    assert result.peak_bytes > 0
+
+
+@pytest.mark.parametrize("module", STARTUP_MODULES)
+def test_modules_dont_import_multiprocessing(module):
+    # The process pools are imported when they're first used
+    script = f"import sys, {module}; print('multiprocessing' in sys.modules)"
+    directory = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, check=True, cwd=directory
+    )
+    assert output.stdout == b"False\n"
@@ -0,0 +1,292 @@
+"""
+Bulk transpilation of Snowflake statements across a pool of worker processes.
+
+Statements are sent to the workers in chunks and the results are yielded back in input order.
+Errors are collected per statement, so a single bad statement doesn't abort the whole batch.
+
+Example:
+    >>> transpiler = BulkTranspiler(write="duckdb", workers=1)
+    >>> results = transpiler.transpile(["SELECT IFF(a, 1, 2)", "SELECT TO_TIMESTAMP(1, 5)"])
+    >>> [result.output for result in results]
+    [['SELECT CASE WHEN a THEN 1 ELSE 2 END'], None]
+    >>> transpiler.stats().errors
+    1
+
+It can also be used from the command line:
+
+    python snowflake_bulk.py queries.sql --write duckdb --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+import typing as t
+from collections import deque
+from concurrent.futures import Future
+
+from sqlglot.dialects.dialect import Dialect, DialectType
+from snowflake_split import split_statements
+
+DEFAULT_CHUNK_SIZE = 64
+
+# Per-process state, set up once by `_init_worker`
+_read: t.Optional[Dialect] = None
+_write: t.Optional[Dialect] = None
+_opts: t.Dict[str, t.Any] = {}
+
+
+class BulkResult(t.NamedTuple):
+    """
+    The outcome of transpiling a single statement.
+
+    Attributes:
+        index: the position of the statement in the input.
+        sql: the input statement.
+        output: the transpiled statements, or `None` if an error occurred.
+        error: the error that occurred, formatted as "<exception type>: <message>".
+        elapsed: the time spent transpiling the statement, in seconds.
+    """
+
+    index: int
+    sql: str
+    output: t.Optional[t.List[str]]
+    error: t.Optional[str]
+    elapsed: float
+
+
+class BulkStats(t.NamedTuple):
+    statements: int
+    errors: int
+    elapsed: float
+    statements_per_second: float
+    p50: float
+    p99: float
+
+
+class BulkTranspiler:
+    """
+    Transpiles large batches of statements using a `ProcessPoolExecutor`.
+
+    Args:
+        read: the dialect of the input statements.
+        write: the target dialect. Defaults to `read`.
+        workers: the number of worker processes. If set to 1, statements are transpiled in the
+            current process instead.
+        chunk_size: the number of statements sent to a worker at a time.
+        **opts: other `sqlglot.generator.Generator` options.
+    """
+
+    def __init__(
+        self,
+        read: DialectType = "snowflake",
+        write: DialectType = None,
+        workers: t.Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        **opts,
+    ) -> None:
+        self.read = read
+        self.write = read if write is None else write
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.opts = opts
+
+        self._latencies: t.List[float] = []
+        self._errors = 0
+        self._elapsed = 0.0
+
+    def transpile(self, statements: t.Iterable[str]) -> t.Iterator[BulkResult]:
+        """
+        Lazily transpiles the given statements.
+
+        At most a couple of chunks per worker are in flight at any time, so the input is consumed
+        only as fast as the results are.
+
+        Args:
+            statements: the statements to transpile.
+
+        Returns:
+            A generator of results, in the same order as `statements`.
+        """
+        start = time.perf_counter()
+
+        try:
+            for result in self._run(statements):
+                self._latencies.append(result.elapsed)
+                if result.error is not None:
+                    self._errors += 1
+                yield result
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    def stats(self) -> BulkStats:
+        """Returns throughput and latency statistics for the statements transpiled so far."""
+        latencies = sorted(self._latencies)
+        count = len(latencies)
+
+        def percentile(p: float) -> float:
+            return latencies[min(count - 1, int(p * count))] if count else 0.0
+
+        return BulkStats(
+            statements=count,
+            errors=self._errors,
+            elapsed=self._elapsed,
+            statements_per_second=count / self._elapsed if self._elapsed else 0.0,
+            p50=percentile(0.5),
+            p99=percentile(0.99),
+        )
+
+    def _run(self, statements: t.Iterable[str]) -> t.Iterator[BulkResult]:
+        chunks = _chunked(enumerate(statements), self.chunk_size)
+
+        if self.workers == 1:
+            _init_worker(self.read, self.write, self.opts)
+            for chunk in chunks:
+                yield from _transpile_chunk(chunk)
+            return
+
+        # Deferred, so that importing this module and `workers=1` runs never load multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = self.workers or os.cpu_count() or 1
+        max_pending = 2 * workers
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.read, self.write, self.opts),
+        ) as executor:
+            pending: t.Deque[Future] = deque()
+
+            for chunk in chunks:
+                pending.append(executor.submit(_transpile_chunk, chunk))
+                if len(pending) >= max_pending:
+                    yield from pending.popleft().result()
+
+            while pending:
+                yield from pending.popleft().result()
+
+
+def _chunked(
+    items: t.Iterable[t.Tuple[int, str]], size: int
+) -> t.Iterator[t.List[t.Tuple[int, str]]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _init_worker(read: DialectType, write: DialectType, opts: t.Dict[str, t.Any]) -> None:
+    global _read, _write, _opts
+
+    _read = Dialect.get_or_raise(read)()
+    _write = Dialect.get_or_raise(write)()
+    _opts = opts
+
+    # Builds the dialects' tokenizer, parser and generator state ahead of the first statement
+    for expression in _read.parse("SELECT 1"):
+        _write.generate(expression, **_opts)
+
+
+def _transpile_chunk(chunk: t.List[t.Tuple[int, str]]) -> t.List[BulkResult]:
+    assert _read is not None and _write is not None
+
+    results = []
+    for index, sql in chunk:
+        start = time.perf_counter()
+        try:
+            output: t.Optional[t.List[str]] = [
+                _write.generate(expression, **_opts) for expression in _read.parse(sql)
+            ]
+            error = None
+        except Exception as e:
+            output = None
+            error = f"{type(e).__name__}: {e}"
+
+        results.append(BulkResult(index, sql, output, error, time.perf_counter() - start))
+
+    return results
+
+
+def main(argv: t.Optional[t.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Transpile a batch of Snowflake statements")
+    parser.add_argument(
+        "file",
+        nargs="?",
+        default="-",
+        help="File containing ;-separated statements, or - to read stdin (default)",
+    )
+    parser.add_argument(
+        "--read",
+        dest="read",
+        type=str,
+        default="snowflake",
+        help="Dialect to read, default is snowflake",
+    )
+    parser.add_argument(
+        "--write",
+        dest="write",
+        type=str,
+        default=None,
+        help="Dialect to write, default is the dialect to read",
+    )
+    parser.add_argument(
+        "--workers",
+        dest="workers",
+        type=int,
+        default=None,
+        help="Number of worker processes, default is the number of CPUs",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        dest="chunk_size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"Number of statements sent to a worker at a time, default is {DEFAULT_CHUNK_SIZE}",
+    )
+    parser.add_argument(
+        "--pretty",
+        dest="pretty",
+        action="store_true",
+        help="Format the output",
+    )
+    args = parser.parse_args(argv)
+
+    transpiler = BulkTranspiler(
+        read=args.read,
+        write=args.write,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        pretty=args.pretty,
+    )
+
+    source = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")
+    try:
+        for result in transpiler.transpile(split_statements(source)):
+            if result.output is None:
+                print(f"-- statement {result.index}: {result.error}", file=sys.stderr)
+            else:
+                for sql in result.output:
+                    print(f"{sql};")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    stats = transpiler.stats()
+    print(
+        f"-- {stats.statements} statements, {stats.errors} errors, "
+        f"{stats.statements_per_second:.1f} statements/s, "
+        f"p50 {stats.p50 * 1000:.3f}ms, p99 {stats.p99 * 1000:.3f}ms",
+        file=sys.stderr,
+    )
+    return 1 if stats.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
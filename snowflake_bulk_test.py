@@ -0,0 +1,74 @@
+import pytest
+
+from snowflake_bulk import BulkTranspiler, main
+from snowflake_split import DEFAULT_CHUNK_SIZE
+
+STATEMENTS = [f"SELECT IFF(a > {i}, {i}, DIV0(b, {i}))" for i in range(40)]
+BAD = "SELECT TO_TIMESTAMP(1, 5)"
+
+
+@pytest.mark.parametrize("workers, chunk_size", [(1, 64), (2, 1), (2, 3), (3, 7)])
+def test_results_are_in_input_order(workers, chunk_size):
+    transpiler = BulkTranspiler(write="duckdb", workers=workers, chunk_size=chunk_size)
+    results = list(transpiler.transpile(STATEMENTS))
+
+    expected = list(BulkTranspiler(write="duckdb", workers=1).transpile(STATEMENTS))
+    assert [result.index for result in results] == list(range(len(STATEMENTS)))
+    assert [result.sql for result in results] == STATEMENTS
+    assert [result.output for result in results] == [result.output for result in expected]
+    assert transpiler.stats().statements == len(STATEMENTS)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_errors_are_per_statement(workers):
+    statements = ["SELECT 1", BAD, "SELECT (", "SELECT 2"]
+    transpiler = BulkTranspiler(write="duckdb", workers=workers, chunk_size=2)
+    results = list(transpiler.transpile(statements))
+
+    assert [result.output for result in results] == [["SELECT 1"], None, None, ["SELECT 2"]]
+    assert results[1].error.startswith("ValueError: ")
+    assert results[2].error.startswith("ParseError: ")
+    assert results[0].error is None and results[3].error is None
+    assert transpiler.stats().errors == 2
+
+
+def test_input_is_consumed_lazily():
+    consumed = []
+
+    def statements():
+        for i, sql in enumerate(STATEMENTS):
+            consumed.append(i)
+            yield sql
+
+    results = BulkTranspiler(workers=1, chunk_size=4).transpile(statements())
+    next(results)
+    assert len(consumed) == 4
+
+
+@pytest.mark.parametrize("comment", ["/* c */", "-- c\n", "// c\n"])
+def test_cli_skips_comments_at_read_boundaries(tmp_path, capsys, comment):
+    # The comment's opener is the character the splitter holds back when the first chunk read
+    # from the file runs out, since it may start a two-character opener
+    head = "SELECT 1;\n"
+    padding = DEFAULT_CHUNK_SIZE - 2 - len(head) - len("SELECT '';\n")
+    script = f"{head}SELECT '{'x' * padding}';\n{comment};\nSELECT 2;\n{comment}"
+    assert script[DEFAULT_CHUNK_SIZE - 2] == comment[0]
+
+    path = tmp_path / "queries.sql"
+    path.write_text(script, encoding="utf-8")
+
+    assert main([str(path), "--workers", "1"]) == 0
+    out, err = capsys.readouterr()
+    assert out.splitlines() == ["SELECT 1;", f"SELECT '{'x' * padding}';", "SELECT 2;"]
+    assert err.startswith("-- 3 statements, 0 errors")
+
+
+def test_cli_reports_errors(tmp_path, capsys):
+    path = tmp_path / "queries.sql"
+    path.write_text(f"SELECT IFF(a, 1, 2);\n{BAD};\nSELECT 3", encoding="utf-8")
+
+    assert main([str(path), "--write", "duckdb", "--workers", "1"]) == 1
+    out, err = capsys.readouterr()
+    assert out.splitlines() == ["SELECT CASE WHEN a THEN 1 ELSE 2 END;", "SELECT 3;"]
+    assert err.startswith("-- statement 1: ValueError: ")
+    assert "3 statements, 1 errors" in err
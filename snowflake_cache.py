@@ -0,0 +1,335 @@
+"""
+Caching layers that sit in front of the Snowflake dialect's tokenizer, parser and generator.
+
+Query-history workloads tend to re-parse the exact same SQL text over and over, so keeping
+the resulting syntax trees around avoids paying for tokenization and parsing more than once.
+Statements that only differ in their literals can share a single transpiled template instead.
+
+Example:
+    >>> cache = ParseCache(maxsize=2)
+    >>> cache.parse_one("SELECT a FROM t").sql(dialect="snowflake")
+    'SELECT a FROM t'
+    >>> cache.parse_one("SELECT a FROM t").sql(dialect="snowflake")
+    'SELECT a FROM t'
+    >>> cache.info()
+    CacheInfo(hits=1, misses=1, evictions=0, invalidations=0, size=1, maxsize=2)
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import typing as t
+from collections import Counter, OrderedDict
+
+from sqlglot import exp
+from sqlglot.dialects.dialect import Dialect, DialectType
+from sqlglot.errors import ErrorLevel, ParseError, SqlglotError
+from snowflake_fingerprint import Fingerprint, Slot, fingerprint
+
+# Dialect tables that affect how a given SQL string is tokenized or parsed. If any of these is
+# customized at runtime, previously cached trees may no longer be valid.
+WATCHED_TABLES: t.Tuple[t.Tuple[str, str], ...] = (
+    ("tokenizer_class", "KEYWORDS"),
+    ("tokenizer_class", "SINGLE_TOKENS"),
+    ("parser_class", "FUNCTIONS"),
+    ("parser_class", "FUNCTION_PARSERS"),
+    ("parser_class", "COLUMN_OPERATORS"),
+    ("parser_class", "RANGE_PARSERS"),
+)
+
+_MISSING = object()
+
+# Literals are swapped for these sentinels before a template is transpiled, so that they can be
+# located in the output and replaced by the literals of the statements that share the template.
+# Non-integer numbers get a fractional sentinel, since some generators convert integers
+_NUMBER_SENTINEL = "918273"
+_FRACTION_SENTINEL = ".5"
+_INTEGER_STRING_SENTINEL = "827364"
+_STRING_SENTINEL = "__sqlglot_literal_{}__"
+
+
+class CacheInfo(t.NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    size: int
+    maxsize: int
+
+
+class _Cache:
+    """
+    Bookkeeping shared by the caches in this module: LRU eviction, statistics and automatic
+    invalidation whenever one of the `WATCHED_TABLES` of the dialect is replaced, or has entries
+    added, removed or replaced.
+    """
+
+    def __init__(self, maxsize: int = 1024, dialect: DialectType = "snowflake") -> None:
+        if maxsize < 1:
+            raise ValueError(f"Cache size must be positive, got {maxsize}")
+
+        self.maxsize = maxsize
+        self.dialect = Dialect.get_or_raise(dialect)()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        self._cache: OrderedDict[t.Hashable, t.Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._snapshot = self._take_snapshot()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def info(self) -> CacheInfo:
+        """Returns the cache statistics."""
+        return CacheInfo(
+            self.hits, self.misses, self.evictions, self.invalidations, len(self), self.maxsize
+        )
+
+    def clear(self) -> None:
+        """Empties the cache and resets its statistics."""
+        with self._lock:
+            self._cache.clear()
+            self._snapshot = self._take_snapshot()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def _get(self, key: t.Hashable) -> t.Any:
+        with self._lock:
+            if self._tables_changed():
+                self._invalidate()
+
+            value = self._cache.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._cache.move_to_end(key)
+
+            return value
+
+    def _put(self, key: t.Hashable, value: t.Any) -> None:
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+
+    def _take_snapshot(self) -> t.Tuple[t.Tuple[t.Dict, t.Dict], ...]:
+        return tuple((table, dict(table)) for table in self._tables())
+
+    def _tables(self) -> t.Iterator[t.Dict]:
+        for attribute, name in WATCHED_TABLES:
+            yield getattr(getattr(self.dialect, attribute), name)
+
+    def _tables_changed(self) -> bool:
+        # The snapshot holds on to the tables, so a replaced table can't reuse an old one's identity.
+        # Comparing the copies checks the values by identity first, since the tables hold parser
+        # callables and token types, which don't define any other equality
+        return any(
+            table is not old or table != entries
+            for (old, entries), table in zip(self._snapshot, self._tables())
+        )
+
+    def _invalidate(self) -> None:
+        self._cache.clear()
+        self._snapshot = self._take_snapshot()
+        self.invalidations += 1
+
+
+class ParseCache(_Cache):
+    """
+    A size-bounded LRU cache of parsed syntax trees, keyed on the SQL text and the parser options.
+
+    Cached trees are never handed out directly: every lookup returns a fresh copy, so callers are
+    free to mutate the result without corrupting the cache. The cache is flushed automatically
+    whenever one of the `WATCHED_TABLES` of the dialect is replaced, or has entries added,
+    removed or replaced.
+
+    Args:
+        maxsize: the maximum number of SQL strings to keep around.
+        dialect: the dialect to parse with.
+    """
+
+    def parse(self, sql: str, **opts) -> t.List[t.Optional[exp.Expression]]:
+        """
+        Parses the given SQL string, reusing a previously parsed tree if there is one.
+
+        Args:
+            sql: the SQL code string to parse.
+            **opts: other `sqlglot.parser.Parser` options.
+
+        Returns:
+            A copy of the syntax trees of the parsed statements.
+        """
+        key = (sql, tuple(sorted(opts.items())))
+        expressions = self._get(key)
+
+        if expressions is _MISSING:
+            expressions = self.dialect.parse(sql, **opts)
+            self._put(key, expressions)
+
+        return [e.copy() if e else e for e in expressions]
+
+    def parse_one(self, sql: str, **opts) -> exp.Expression:
+        """
+        Parses the given SQL string and returns a copy of the syntax tree of its first statement.
+
+        Args:
+            sql: the SQL code string to parse.
+            **opts: other `sqlglot.parser.Parser` options.
+
+        Returns:
+            The syntax tree for the first parsed statement.
+        """
+        for expression in self.parse(sql, **opts):
+            if not expression:
+                raise ParseError(f"No expression was parsed from '{sql}'")
+            return expression
+        else:
+            raise ParseError(f"No expression was parsed from '{sql}'")
+
+    def transpile(
+        self,
+        sql: str,
+        write: DialectType = None,
+        identity: bool = True,
+        error_level: t.Optional[ErrorLevel] = None,
+        **opts,
+    ) -> t.List[str]:
+        """
+        Mirrors `sqlglot.transpile`, but goes through the cache for the parsing step.
+
+        Args:
+            sql: the SQL code string to transpile.
+            write: the target dialect. Defaults to the cache's dialect if `identity` is set.
+            identity: if set to `True` and if the target dialect is not specified the source
+                dialect will be used as both: the source and the target dialect.
+            error_level: the desired error level of the parser.
+            **opts: other `sqlglot.generator.Generator` options.
+
+        Returns:
+            The list of transpiled SQL statements.
+        """
+        target = self.dialect if write is None and identity else Dialect.get_or_raise(write)()
+        parse_opts = {} if error_level is None else {"error_level": error_level}
+        return [target.generate(e, **opts) for e in self.parse(sql, **parse_opts)]
+
+
+class TemplateCache(_Cache):
+    """
+    A size-bounded LRU cache of transpiled statement templates, keyed on literal-normalized
+    fingerprints (see `snowflake_fingerprint.fingerprint`).
+
+    The first statement with a given fingerprint is transpiled with its literals replaced by
+    sentinel values. The statements that follow reuse that output and only rebind their own
+    literals. If the sentinels don't survive the transpilation unambiguously, e.g. because the
+    target dialect rewrites a literal, statements with that fingerprint are transpiled normally.
+
+    Args:
+        maxsize: the maximum number of templates to keep around.
+        dialect: the dialect to parse with.
+    """
+
+    def __init__(self, maxsize: int = 1024, dialect: DialectType = "snowflake") -> None:
+        super().__init__(maxsize=maxsize, dialect=dialect)
+        self.fallbacks = 0
+
+    def transpile(
+        self, sql: str, write: DialectType = None, identity: bool = True, **opts
+    ) -> t.List[str]:
+        """
+        Transpiles the given SQL string, reusing the template of its fingerprint if there is one.
+
+        Args:
+            sql: the SQL code string to transpile.
+            write: the target dialect. Defaults to the cache's dialect if `identity` is set.
+            identity: if set to `True` and if the target dialect is not specified the source
+                dialect will be used as both: the source and the target dialect.
+            **opts: other `sqlglot.generator.Generator` options.
+
+        Returns:
+            The list of transpiled SQL statements.
+        """
+        target = self.dialect if write is None and identity else Dialect.get_or_raise(write)()
+        shape = fingerprint(sql, self.dialect)
+        integers = tuple(slot.text.isdigit() for slot in shape.slots if slot.kind == "number")
+        key = (shape.text, shape.comments, integers, type(target), tuple(sorted(opts.items())))
+
+        template = self._get(key)
+        if template is _MISSING:
+            template = self._compile(shape, target, **opts)
+            self._put(key, template)
+
+        if template is None:
+            self.fallbacks += 1
+            return [target.generate(e, **opts) for e in self.dialect.parse(sql)]
+
+        return template.bind(shape.slots, target.generator(**opts))
+
+    def _compile(self, shape: Fingerprint, target: Dialect, **opts) -> t.Optional[_Template]:
+        parts = []
+        sentinels = {}
+        patterns = []
+        position = 0
+
+        for index, slot in enumerate(shape.slots):
+            if slot.kind == "number":
+                source = generated = f"{_NUMBER_SENTINEL}{index:06d}"
+                if not slot.text.isdigit():
+                    source = generated = source + _FRACTION_SENTINEL
+                patterns.append(rf"(?<![\w.]){re.escape(generated)}(?![\w.])")
+            else:
+                if slot.kind == "integer_string":
+                    literal = exp.Literal.string(f"{_INTEGER_STRING_SENTINEL}{index:06d}")
+                else:
+                    literal = exp.Literal.string(_STRING_SENTINEL.format(index))
+
+                source = literal.sql(dialect=self.dialect)
+                generated = literal.sql(dialect=target)
+                patterns.append(re.escape(generated))
+
+            parts.append(shape.sql[position : slot.start])
+            parts.append(source)
+            position = slot.end + 1
+            sentinels[generated] = index
+
+        parts.append(shape.sql[position:])
+
+        try:
+            sqls = [target.generate(e, **opts) for e in self.dialect.parse("".join(parts))]
+        except (SqlglotError, ValueError):
+            return None
+
+        pattern = re.compile("|".join(patterns)) if patterns else None
+        if pattern:
+            counts = Counter(match.group(0) for sql in sqls for match in pattern.finditer(sql))
+            if any(counts[sentinel] != 1 for sentinel in sentinels):
+                return None
+
+        return _Template(sqls, sentinels, pattern)
+
+
+class _Template:
+    def __init__(
+        self, sqls: t.List[str], sentinels: t.Dict[str, int], pattern: t.Optional[t.Pattern]
+    ) -> None:
+        self.sqls = sqls
+        self.sentinels = sentinels
+        self.pattern = pattern
+
+    def bind(self, slots: t.Sequence[Slot], generator: t.Any) -> t.List[str]:
+        if not self.pattern:
+            return list(self.sqls)
+
+        values = [
+            slot.text if slot.kind == "number" else generator.sql(exp.Literal.string(slot.text))
+            for slot in slots
+        ]
+        return [
+            self.pattern.sub(lambda match: values[self.sentinels[match.group(0)]], sql)
+            for sql in self.sqls
+        ]
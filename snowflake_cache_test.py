@@ -0,0 +1,203 @@
+import pytest
+
+from sqlglot import exp
+from sqlglot.dialects.snowflake import Snowflake
+from sqlglot.errors import ErrorLevel, ParseError
+from snowflake_cache import CacheInfo, ParseCache, TemplateCache
+
+
+def test_parse_cache_hits_and_misses():
+    cache = ParseCache(maxsize=4)
+    for _ in range(3):
+        assert cache.parse_one("SELECT a FROM t").sql(dialect="snowflake") == "SELECT a FROM t"
+
+    assert cache.info() == CacheInfo(
+        hits=2, misses=1, evictions=0, invalidations=0, size=1, maxsize=4
+    )
+
+
+def test_parse_cache_returns_copies():
+    cache = ParseCache()
+    first = cache.parse_one("SELECT a FROM t")
+    first.find(exp.Column).replace(exp.column("b"))
+
+    assert cache.parse_one("SELECT a FROM t").sql() == "SELECT a FROM t"
+    assert cache.parse_one("SELECT a FROM t") is not cache.parse_one("SELECT a FROM t")
+
+
+def test_parse_cache_evicts_least_recently_used():
+    cache = ParseCache(maxsize=2)
+    cache.parse("SELECT 1")
+    cache.parse("SELECT 2")
+    cache.parse("SELECT 1")
+    cache.parse("SELECT 3")
+
+    assert cache.info().evictions == 1
+    cache.parse("SELECT 1")
+    assert cache.info().hits == 2
+    cache.parse("SELECT 2")
+    assert cache.info().misses == 4
+
+
+def test_parse_cache_keys_on_options():
+    cache = ParseCache()
+    with pytest.raises(ParseError):
+        cache.parse("SELECT (")
+    assert cache.parse("SELECT (", error_level=ErrorLevel.IGNORE)
+    assert cache.info().misses == 2
+
+
+def test_parse_cache_rejects_empty_size():
+    with pytest.raises(ValueError):
+        ParseCache(maxsize=0)
+
+
+def test_parse_cache_transpiles():
+    cache = ParseCache()
+    assert cache.transpile("SELECT IFF(a, 1, 2)", write="duckdb") == [
+        "SELECT CASE WHEN a THEN 1 ELSE 2 END"
+    ]
+    assert cache.transpile("SELECT IFF(a, 1, 2)") == ["SELECT IFF(a, 1, 2)"]
+    assert cache.info().hits == 1
+
+
+def test_added_function_invalidates(monkeypatch):
+    cache = ParseCache()
+    assert isinstance(cache.parse_one("SELECT MY_FUNC(a)").selects[0], exp.Anonymous)
+
+    monkeypatch.setitem(Snowflake.Parser.FUNCTIONS, "MY_FUNC", exp.Upper.from_arg_list)
+    assert isinstance(cache.parse_one("SELECT MY_FUNC(a)").selects[0], exp.Upper)
+    assert cache.info().invalidations == 1
+
+    monkeypatch.undo()
+    assert isinstance(cache.parse_one("SELECT MY_FUNC(a)").selects[0], exp.Anonymous)
+    assert cache.info().invalidations == 2
+
+
+def test_replaced_table_invalidates(monkeypatch):
+    cache = ParseCache()
+    cache.parse("SELECT a FROM t")
+
+    # Same contents and size, but a different table
+    monkeypatch.setattr(Snowflake.Parser, "RANGE_PARSERS", dict(Snowflake.Parser.RANGE_PARSERS))
+    cache.parse("SELECT a FROM t")
+    assert cache.info().invalidations == 1
+    assert cache.info().misses == 2
+
+    cache.parse("SELECT a FROM t")
+    assert cache.info().hits == 1
+
+
+def test_overridden_function_invalidates(monkeypatch):
+    cache = ParseCache()
+    assert isinstance(cache.parse_one("SELECT SQUARE(x)").selects[0], exp.Pow)
+
+    monkeypatch.setitem(Snowflake.Parser.FUNCTIONS, "SQUARE", exp.Upper.from_arg_list)
+    assert isinstance(cache.parse_one("SELECT SQUARE(x)").selects[0], exp.Upper)
+    assert cache.info().invalidations == 1
+
+    monkeypatch.setitem(
+        Snowflake.Tokenizer.KEYWORDS, "MINUS", Snowflake.Tokenizer.KEYWORDS["UNION"]
+    )
+    cache.parse("SELECT 1")
+    assert cache.info().invalidations == 2
+
+
+def test_removed_keyword_invalidates(monkeypatch):
+    cache = ParseCache()
+    cache.parse("SELECT 1")
+    monkeypatch.delitem(Snowflake.Tokenizer.KEYWORDS, "MINUS")
+    cache.parse("SELECT 1")
+    assert cache.info().invalidations == 1
+
+
+def test_clear_resets_statistics():
+    cache = ParseCache()
+    cache.parse("SELECT 1")
+    cache.parse("SELECT 1")
+    cache.clear()
+    assert cache.info() == CacheInfo(0, 0, 0, 0, 0, cache.maxsize)
+
+
+REBOUND_STATEMENTS = [
+    "SELECT a FROM t WHERE b = {n} AND c = '{s}'",
+    "SELECT TO_TIMESTAMP('{i}'), TO_TIMESTAMP('{s}'), TO_TIMESTAMP({n}, 3) FROM t",
+    "SELECT DATEADD(day, {n}, a), IFF(b > {n}, '{s}', '{i}') FROM t",
+    "SELECT OBJECT_CONSTRUCT('k', {n}, 'v', '{s}') FROM t LIMIT {n}",
+    "SELECT a FROM t WHERE b LIKE ANY ('%{s}%', '{s}%')",
+]
+LITERALS = [
+    {"n": 1, "s": "a", "i": "10"},
+    {"n": 2.5, "s": "it''s", "i": "-7"},
+    {"n": 1000000, "s": "back\\\\slash", "i": "0"},
+]
+
+
+@pytest.mark.parametrize("write", ["snowflake", "duckdb", "spark", "bigquery"])
+def test_template_cache_rebinds_literals(write):
+    import sqlglot
+
+    cache = TemplateCache()
+    for template in REBOUND_STATEMENTS:
+        for literals in LITERALS:
+            sql = template.format(**literals)
+            assert _outcome(cache.transpile, sql, write=write) == _outcome(
+                sqlglot.transpile, sql, read="snowflake", write=write
+            ), sql
+
+    # Statements with a fractional number don't share the template of the integer ones
+    templates = len(REBOUND_STATEMENTS) + sum("{n}" in sql for sql in REBOUND_STATEMENTS)
+    info = cache.info()
+    assert info.misses == templates
+    assert info.hits == len(REBOUND_STATEMENTS) * len(LITERALS) - templates
+
+
+def test_template_cache_keeps_integers_and_fractions_apart():
+    # Spark converts the increment of DATE_ADD to an integer, which fails for fractions
+    cache = TemplateCache()
+    assert cache.transpile("SELECT DATEADD(day, 2, a)", write="spark") == ["SELECT DATE_ADD(a, 2)"]
+    with pytest.raises(ValueError):
+        cache.transpile("SELECT DATEADD(day, 2.5, a)", write="spark")
+    assert cache.transpile("SELECT DATEADD(day, 3, a)", write="spark") == ["SELECT DATE_ADD(a, 3)"]
+    assert cache.info().hits == 1
+
+
+def test_template_cache_falls_back_when_literals_are_duplicated():
+    # DIV0 is transpiled to a CASE that repeats its divisor
+    cache = TemplateCache()
+    assert cache.transpile("SELECT DIV0(a, 5)", write="duckdb") == [
+        "SELECT CASE WHEN 5 = 0 THEN 0 ELSE a / 5 END"
+    ]
+    assert cache.transpile("SELECT DIV0(a, 7)", write="duckdb") == [
+        "SELECT CASE WHEN 7 = 0 THEN 0 ELSE a / 7 END"
+    ]
+    assert cache.fallbacks == 2
+    assert cache.info().hits == 1
+
+
+def test_template_cache_keys_on_target_and_options():
+    cache = TemplateCache()
+    assert cache.transpile("SELECT IFF(a, 1, 2)") == ["SELECT IFF(a, 1, 2)"]
+    assert cache.transpile("SELECT IFF(a, 3, 4)", write="duckdb") == [
+        "SELECT CASE WHEN a THEN 3 ELSE 4 END"
+    ]
+    assert cache.transpile("SELECT IFF(a, 5, 6)", write="duckdb", pretty=True) == [
+        "SELECT\n  CASE WHEN a THEN 5 ELSE 6 END"
+    ]
+    assert cache.info().misses == 3
+
+
+def test_template_cache_invalidates(monkeypatch):
+    cache = TemplateCache()
+    assert cache.transpile("SELECT MY_FUNC('a')") == ["SELECT MY_FUNC('a')"]
+
+    monkeypatch.setitem(Snowflake.Parser.FUNCTIONS, "MY_FUNC", exp.Upper.from_arg_list)
+    assert cache.transpile("SELECT MY_FUNC('b')") == ["SELECT UPPER('b')"]
+    assert cache.info().invalidations == 1
+
+
+def _outcome(function, *args, **kwargs):
+    try:
+        return function(*args, **kwargs)
+    except Exception as e:
+        return type(e)
@@ -0,0 +1,453 @@
+"""
+An indexed catalog of Snowflake tables, to be used as the schema of the optimizer.
+
+Identifiers are normalized once, when the catalog is loaded, following Snowflake's rules:
+unquoted names are folded to uppercase and quoted names are kept as is. Tables are then looked
+up by their fully qualified name in constant time, while partially qualified names go through
+a secondary index of their suffixes.
+
+Catalogs can be loaded lazily from a JSON snapshot or from a binary index file. Index files are
+memory-mapped, so worker processes that open the same file share a single copy of it through
+the OS page cache and only decode the tables they actually look up.
+
+Example:
+    >>> catalog = SnowflakeCatalog({"db": {"s": {"orders": {"id": "INT", '"Note"': "TEXT"}}}})
+    >>> catalog.column_names("db.s.orders")
+    ['ID', 'Note']
+    >>> catalog.get_column_type("orders", exp.column("id")).sql("snowflake")
+    'INT'
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import threading
+import typing as t
+import zlib
+from array import array
+from functools import partial
+
+from sqlglot import exp
+from sqlglot.dialects.dialect import DialectType
+from sqlglot.errors import SchemaError
+from sqlglot.helper import dict_depth
+from sqlglot.schema import Schema, ensure_column_mapping
+
+if t.TYPE_CHECKING:
+    from sqlglot.schema import ColumnMapping
+
+    TableKey = t.Tuple[str, str, str]
+    _Index = t.Union["_DictIndex", "_MappedIndex"]
+
+# The identifiers of a table, in the order they're written, i.e. database, schema, table
+TABLE_PARTS = ("catalog", "db", "this")
+
+INDEX_MAGIC = b"SFCATIX1"
+
+_HEADER = struct.Struct("<8sQQ")  # magic, number of buckets, number of tables
+_OFFSET = struct.Struct("<Q")
+_LENGTH = struct.Struct("<I")
+
+# Separates the parts of a key and the names and types of a table's columns
+_UNIT_SEPARATOR = "\x1f"
+# Separates the candidate tables of a partially qualified name
+_RECORD_SEPARATOR = "\x1e"
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalizes an identifier the way Snowflake resolves it.
+
+    Args:
+        name: the identifier, as it would be written in SQL, e.g. `orders` or `"Orders"`.
+
+    Returns:
+        The name of the object the identifier refers to.
+    """
+    if len(name) > 1 and name[0] == '"' and name[-1] == '"':
+        return name[1:-1].replace('""', '"')
+    return name.upper()
+
+
+class SnowflakeCatalog(Schema):
+    """
+    A read-mostly schema of database.schema.table.column mappings.
+
+    Args:
+        mapping: a mapping of the form {database: {schema: {table: {column: type}}}}.
+        normalize: whether to normalize the names in `mapping` as Snowflake identifiers. If
+            not set, they're taken to be the exact names of the objects, e.g. as reported by
+            INFORMATION_SCHEMA.
+    """
+
+    dialect = "snowflake"
+
+    def __init__(self, mapping: t.Optional[t.Dict] = None, normalize: bool = True) -> None:
+        self._loader: t.Callable[[], _Index] = partial(
+            _DictIndex.from_mapping, mapping or {}, normalize
+        )
+        self._source: t.Optional[t.Tuple[str, str, bool]] = None
+        self._index: t.Optional[_Index] = None
+        self._lock = threading.Lock()
+        self._tables: t.Dict[TableKey, t.Dict[str, str]] = {}
+        self._types: t.Dict[str, exp.DataType] = {}
+
+    @classmethod
+    def from_json(cls, path: str, normalize: bool = True) -> SnowflakeCatalog:
+        """
+        Creates a catalog out of a JSON snapshot. The file is only read once the catalog is used.
+
+        Args:
+            path: the path of a JSON file containing a mapping of the form
+                {database: {schema: {table: {column: type}}}}.
+            normalize: whether to normalize the names in the file as Snowflake identifiers.
+
+        Returns:
+            The catalog.
+        """
+        catalog = cls()
+        catalog._source = ("json", path, normalize)
+        catalog._loader = partial(_DictIndex.from_json, path, normalize)
+        return catalog
+
+    @classmethod
+    def from_index(cls, path: str) -> SnowflakeCatalog:
+        """
+        Creates a catalog out of an index file written by `save_index`. The file is memory-mapped
+        once the catalog is used, and such catalogs are read-only.
+
+        Args:
+            path: the path of the index file.
+
+        Returns:
+            The catalog.
+        """
+        catalog = cls()
+        catalog._source = ("index", path, True)
+        catalog._loader = partial(_MappedIndex, path)
+        return catalog
+
+    def save_index(self, path: str) -> None:
+        """
+        Writes the catalog to an index file, to be loaded with `from_index`. The file is written
+        next to `path` first and then moved into place, so readers never see a partial file.
+
+        Args:
+            path: the path of the index file.
+        """
+        index = self.index
+        if isinstance(index, _MappedIndex):
+            raise SchemaError("The catalog is already backed by an index file")
+        index.write(path)
+
+    @property
+    def index(self) -> _Index:
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._loader()
+        return self._index
+
+    @property
+    def empty(self) -> bool:
+        return not len(self.index)
+
+    @property
+    def supported_table_args(self) -> t.Tuple[str, ...]:
+        return ("this", "db", "catalog")
+
+    def add_table(
+        self,
+        table: exp.Table | str,
+        column_mapping: t.Optional[ColumnMapping] = None,
+        dialect: DialectType = None,
+    ) -> None:
+        """
+        Register or update a table. Updates are only performed if a new column mapping is provided.
+
+        Args:
+            table: the `Table` expression instance or string representing the table.
+            column_mapping: a mapping of the table's column names to their types.
+            dialect: unused, names are always parsed as Snowflake identifiers.
+        """
+        index = self.index
+        if isinstance(index, _MappedIndex):
+            raise SchemaError("Catalogs that are backed by an index file are read-only")
+
+        parts = self._table_parts(table)
+        if len(parts) != 3:
+            raise SchemaError(f"Tables must be fully qualified, got {table}")
+
+        key = t.cast("TableKey", parts)
+        if key in index.tables and not column_mapping:
+            return
+
+        columns = {
+            normalize_name(k): str(v) for k, v in ensure_column_mapping(column_mapping).items()
+        }
+        index.add(key, columns)
+        self._tables.pop(key, None)
+
+    def column_names(
+        self,
+        table: exp.Table | str,
+        only_visible: bool = False,
+        dialect: DialectType = None,
+    ) -> t.List[str]:
+        columns = self.find(table)
+        return list(columns) if columns else []
+
+    def get_column_type(
+        self,
+        table: exp.Table | str,
+        column: exp.Column,
+        dialect: DialectType = None,
+    ) -> exp.DataType:
+        columns = self.find(table, raise_on_missing=False)
+        if columns:
+            column_type = columns.get(
+                self._name(column if isinstance(column, str) else column.this)
+            )
+            if column_type is not None:
+                return self._to_data_type(column_type)
+
+        return exp.DataType.build("unknown")
+
+    def find(
+        self, table: exp.Table | str, raise_on_missing: bool = True
+    ) -> t.Optional[t.Dict[str, str]]:
+        """
+        Looks up the columns of a table.
+
+        Args:
+            table: the table, which may be partially qualified.
+            raise_on_missing: whether to raise if a partially qualified name is ambiguous.
+
+        Returns:
+            A mapping of the table's column names to their types, or `None` if it wasn't found.
+        """
+        parts = self._table_parts(table)
+        if not parts:
+            return None
+
+        if len(parts) == 3:
+            key = t.cast("TableKey", parts)
+        else:
+            candidates = self.index.candidates(parts)
+            if not candidates:
+                return None
+            if len(candidates) > 1:
+                if raise_on_missing:
+                    message = ", ".join(".".join(candidate) for candidate in candidates)
+                    raise SchemaError(f"Ambiguous mapping for {table}: {message}.")
+                return None
+            key = candidates[0]
+
+        columns = self._tables.get(key)
+        if columns is None:
+            columns = self.index.columns(key)
+            if columns is not None:
+                self._tables[key] = columns
+
+        return columns
+
+    def _table_parts(self, table: exp.Table | str) -> t.Tuple[str, ...]:
+        if isinstance(table, str):
+            table = exp.to_table(table, dialect="snowflake")
+
+        parts = []
+        for arg in TABLE_PARTS:
+            value = table.args.get(arg)
+            if value:
+                if not isinstance(value, (str, exp.Identifier)):
+                    return ()
+                parts.append(self._name(value))
+
+        return tuple(parts)
+
+    def _name(self, name: str | exp.Identifier) -> str:
+        if isinstance(name, exp.Identifier):
+            return name.name if name.quoted else name.name.upper()
+        return normalize_name(name)
+
+    def _to_data_type(self, column_type: str) -> exp.DataType:
+        data_type = self._types.get(column_type)
+        if data_type is None:
+            try:
+                data_type = exp.DataType.build(column_type, dialect="snowflake")
+            except Exception:
+                raise SchemaError(f"Failed to build type '{column_type}' in dialect snowflake.")
+            self._types[column_type] = data_type
+        return data_type
+
+    def __getstate__(self) -> t.Dict[str, t.Any]:
+        # File-backed catalogs are sent to worker processes as their path, so that each worker
+        # maps the file itself instead of receiving a copy of it
+        if self._source is None:
+            return {"index": self.index}
+        return {"source": self._source}
+
+    def __setstate__(self, state: t.Dict[str, t.Any]) -> None:
+        source = state.get("source")
+        if source is None:
+            self.__init__()  # type: ignore
+            self._index = state["index"]
+            return
+
+        kind, path, normalize = source
+        other = self.from_json(path, normalize) if kind == "json" else self.from_index(path)
+        self.__dict__.update(other.__dict__)
+
+
+class _DictIndex:
+    def __init__(self) -> None:
+        self.tables: t.Dict[TableKey, t.Dict[str, str]] = {}
+        self.partial: t.Dict[t.Tuple[str, ...], t.List[TableKey]] = {}
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def __getstate__(self) -> t.Dict[str, t.Any]:
+        return {"tables": self.tables}
+
+    def __setstate__(self, state: t.Dict[str, t.Any]) -> None:
+        self.__init__()  # type: ignore
+        for key, columns in state["tables"].items():
+            self.add(key, columns)
+
+    @classmethod
+    def from_json(cls, path: str, normalize: bool) -> _DictIndex:
+        with open(path, encoding="utf-8") as file:
+            return cls.from_mapping(json.load(file), normalize)
+
+    @classmethod
+    def from_mapping(cls, mapping: t.Dict, normalize: bool) -> _DictIndex:
+        if mapping and dict_depth(mapping) != 4:
+            raise SchemaError(
+                "Catalog mappings must be of the form {database: {schema: {table: {column: type}}}}"
+            )
+
+        name = normalize_name if normalize else str
+        index = cls()
+
+        for database, schemas in mapping.items():
+            for schema, tables in schemas.items():
+                for table, columns in tables.items():
+                    index.add(
+                        (name(database), name(schema), name(table)),
+                        {name(column): str(kind) for column, kind in columns.items()},
+                    )
+
+        return index
+
+    def add(self, key: TableKey, columns: t.Dict[str, str]) -> None:
+        if key not in self.tables:
+            self.partial.setdefault(key[1:], []).append(key)
+            self.partial.setdefault(key[2:], []).append(key)
+        self.tables[key] = columns
+
+    def columns(self, key: TableKey) -> t.Optional[t.Dict[str, str]]:
+        return self.tables.get(key)
+
+    def candidates(self, parts: t.Tuple[str, ...]) -> t.List[TableKey]:
+        return self.partial.get(parts, [])
+
+    def write(self, path: str) -> None:
+        entries = [
+            (key, _UNIT_SEPARATOR.join(part for item in columns.items() for part in item))
+            for key, columns in self.tables.items()
+        ]
+        entries.extend(
+            (parts, _RECORD_SEPARATOR.join(_UNIT_SEPARATOR.join(key) for key in keys))
+            for parts, keys in self.partial.items()
+        )
+
+        # Open addressing with linear probing, at a load factor of at most 0.5
+        bucket_count = 1
+        while bucket_count < 2 * len(entries):
+            bucket_count <<= 1
+
+        mask = bucket_count - 1
+        buckets = array("Q", bytes(_OFFSET.size * bucket_count))
+        records = bytearray()
+        base = _HEADER.size + _OFFSET.size * bucket_count
+
+        for parts, value in entries:
+            key = _UNIT_SEPARATOR.join(parts).encode()
+            bucket = zlib.crc32(key) & mask
+            while buckets[bucket]:
+                bucket = (bucket + 1) & mask
+            buckets[bucket] = base + len(records)
+
+            data = value.encode()
+            records += _LENGTH.pack(len(key))
+            records += key
+            records += _LENGTH.pack(len(data))
+            records += data
+
+        if buckets.itemsize != _OFFSET.size:
+            raise SchemaError("Unsupported platform: 64-bit unsigned integers are required")
+        if struct.pack("=H", 1) != struct.pack("<H", 1):
+            buckets.byteswap()
+
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(_HEADER.pack(INDEX_MAGIC, bucket_count, len(self.tables)))
+            file.write(buckets.tobytes())
+            file.write(records)
+        os.replace(temporary, path)
+
+
+class _MappedIndex:
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.bucket_count, self.size = _HEADER.unpack_from(self.buffer, 0)
+        if magic != INDEX_MAGIC:
+            raise SchemaError(f"{path} is not a catalog index file")
+
+    def __len__(self) -> int:
+        return self.size
+
+    def columns(self, key: TableKey) -> t.Optional[t.Dict[str, str]]:
+        value = self._get(key)
+        if value is None:
+            return None
+
+        parts = value.split(_UNIT_SEPARATOR) if value else []
+        return dict(zip(parts[::2], parts[1::2]))
+
+    def candidates(self, parts: t.Tuple[str, ...]) -> t.List[TableKey]:
+        value = self._get(parts)
+        if not value:
+            return []
+        return [
+            t.cast("TableKey", tuple(key.split(_UNIT_SEPARATOR)))
+            for key in value.split(_RECORD_SEPARATOR)
+        ]
+
+    def _get(self, parts: t.Tuple[str, ...]) -> t.Optional[str]:
+        buffer = self.buffer
+        key = _UNIT_SEPARATOR.join(parts).encode()
+        mask = self.bucket_count - 1
+        bucket = zlib.crc32(key) & mask
+
+        while True:
+            (offset,) = _OFFSET.unpack_from(buffer, _HEADER.size + _OFFSET.size * bucket)
+            if not offset:
+                return None
+
+            (key_length,) = _LENGTH.unpack_from(buffer, offset)
+            start = offset + _LENGTH.size
+            end = start + key_length
+
+            if buffer[start:end] == key:
+                (value_length,) = _LENGTH.unpack_from(buffer, end)
+                start = end + _LENGTH.size
+                return buffer[start : start + value_length].decode()
+
+            bucket = (bucket + 1) & mask
@@ -0,0 +1,174 @@
+import json
+import pickle
+
+import pytest
+
+from sqlglot import exp, parse_one
+from sqlglot.errors import SchemaError
+from sqlglot.optimizer.qualify import qualify
+from snowflake_catalog import SnowflakeCatalog, normalize_name
+
+MAPPING = {
+    "db": {
+        "s": {
+            "orders": {"id": "INT", '"Note"': "TEXT"},
+            '"Mixed"': {"a": "DOUBLE"},
+        },
+        "t": {"orders": {"id": "BIGINT"}, "items": {"price": "DECIMAL(10, 2)"}},
+    },
+    "other": {"s": {"items": {"sku": "VARCHAR"}}},
+}
+
+
+@pytest.fixture(params=["mapping", "json", "index"])
+def catalog(request, tmp_path):
+    if request.param == "mapping":
+        return SnowflakeCatalog(MAPPING)
+
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps(MAPPING), encoding="utf-8")
+    if request.param == "json":
+        return SnowflakeCatalog.from_json(str(path))
+
+    index = str(tmp_path / "catalog.idx")
+    SnowflakeCatalog.from_json(str(path)).save_index(index)
+    return SnowflakeCatalog.from_index(index)
+
+
+def test_normalize_name():
+    assert normalize_name("orders") == "ORDERS"
+    assert normalize_name('"Orders"') == "Orders"
+    assert normalize_name('"a""b"') == 'a"b'
+    assert normalize_name('"') == '"'
+
+
+def test_names_are_resolved_like_snowflake(catalog):
+    assert catalog.column_names("db.s.orders") == ["ID", "Note"]
+    assert catalog.column_names('"DB"."S"."ORDERS"') == ["ID", "Note"]
+    assert catalog.column_names('DB.S."Mixed"') == ["A"]
+    assert catalog.column_names('db.s."orders"') == []
+    assert catalog.column_names("db.s.mixed") == []
+    assert not catalog.empty
+
+
+def test_partially_qualified_names(catalog):
+    assert catalog.column_names("s.orders") == ["ID", "Note"]
+    assert catalog.column_names("t.orders") == ["ID"]
+    assert catalog.column_names("s.items") == ["SKU"]
+    assert catalog.column_names('"Mixed"') == ["A"]
+    assert catalog.find("nothing") is None
+    assert catalog.find("x.y") is None
+
+
+@pytest.mark.parametrize("name", ["orders", "items"])
+def test_ambiguous_names(catalog, name):
+    with pytest.raises(SchemaError, match="Ambiguous mapping"):
+        catalog.find(name)
+    assert catalog.find(name, raise_on_missing=False) is None
+
+
+def test_column_types(catalog):
+    assert catalog.get_column_type("db.t.items", exp.column("price")).sql("snowflake") == (
+        "DECIMAL(10, 2)"
+    )
+    assert catalog.get_column_type("db.s.orders", exp.column("Note", quoted=True)).sql() == "TEXT"
+    assert catalog.get_column_type("db.s.orders", exp.column("note")).is_type("unknown")
+    assert catalog.get_column_type("orders", exp.column("id")).is_type("unknown")
+    assert catalog.get_column_type("db.s.orders", exp.column("id")) is catalog.get_column_type(
+        "db.s.orders", exp.column("id")
+    )
+
+
+def test_qualify(catalog):
+    expression = qualify(
+        parse_one("SELECT id, price FROM s.orders, db.t.items", read="snowflake"),
+        schema=catalog,
+        dialect="snowflake",
+    )
+    assert expression.sql("snowflake") == (
+        'SELECT "ORDERS"."ID" AS "ID", "ITEMS"."PRICE" AS "PRICE" '
+        'FROM "S"."ORDERS" AS "ORDERS", "DB"."T"."ITEMS" AS "ITEMS"'
+    )
+
+
+def test_pickling(catalog):
+    copy = pickle.loads(pickle.dumps(catalog))
+    assert copy.column_names("s.orders") == ["ID", "Note"]
+    with pytest.raises(SchemaError):
+        copy.find("orders")
+
+
+def test_file_backed_catalogs_pickle_as_their_path(tmp_path):
+    index = str(tmp_path / "catalog.idx")
+    SnowflakeCatalog(MAPPING).save_index(index)
+
+    catalog = SnowflakeCatalog.from_index(index)
+    catalog.column_names("db.s.orders")
+    assert index.encode() in pickle.dumps(catalog)
+    assert b"DECIMAL" not in pickle.dumps(catalog)
+
+
+def test_add_table():
+    catalog = SnowflakeCatalog(MAPPING)
+    catalog.add_table("db.u.orders", {"id": "INT", '"x"': "TEXT"})
+    assert catalog.column_names("db.u.orders") == ["ID", "x"]
+    with pytest.raises(SchemaError):
+        catalog.find("orders")
+
+    # Tables are only updated when columns are given
+    catalog.add_table("db.u.orders")
+    assert catalog.column_names("db.u.orders") == ["ID", "x"]
+    catalog.column_names("db.s.orders")
+    catalog.add_table("db.s.orders", {"y": "INT"})
+    assert catalog.column_names("db.s.orders") == ["Y"]
+
+    with pytest.raises(SchemaError, match="fully qualified"):
+        catalog.add_table("u.orders", {"id": "INT"})
+
+
+def test_index_files_are_read_only(tmp_path):
+    index = str(tmp_path / "catalog.idx")
+    SnowflakeCatalog(MAPPING).save_index(index)
+    catalog = SnowflakeCatalog.from_index(index)
+
+    with pytest.raises(SchemaError):
+        catalog.add_table("db.u.orders", {"id": "INT"})
+    with pytest.raises(SchemaError):
+        catalog.save_index(str(tmp_path / "copy.idx"))
+
+
+def test_index_file_round_trip(tmp_path):
+    mapping = {
+        "db": {
+            f"s{i}": {f"t{j}": {f"c{k}": "INT" for k in range(j)} for j in range(20)}
+            for i in range(20)
+        }
+    }
+    index = str(tmp_path / "catalog.idx")
+    SnowflakeCatalog(mapping).save_index(index)
+    catalog = SnowflakeCatalog.from_index(index)
+
+    assert len(catalog.index) == 400
+    for i in range(20):
+        for j in range(20):
+            assert catalog.column_names(f"db.s{i}.t{j}") == [f"C{k}" for k in range(j)]
+            assert catalog.column_names(f"s{i}.t{j}") == [f"C{k}" for k in range(j)]
+
+    assert catalog.find("db.s0.t20") is None
+    assert catalog.find("t0", raise_on_missing=False) is None
+
+
+def test_invalid_inputs(tmp_path):
+    with pytest.raises(SchemaError):
+        SnowflakeCatalog({"db": {"t": {"a": "INT"}}}).find("db.t")
+
+    path = tmp_path / "catalog.idx"
+    path.write_bytes(b"not an index, not at all")
+    with pytest.raises(SchemaError, match="not a catalog index"):
+        SnowflakeCatalog.from_index(str(path)).find("db.s.t")
+
+
+def test_names_can_be_taken_as_is():
+    catalog = SnowflakeCatalog({"DB": {"S": {"orders": {"Id": "INT"}}}}, normalize=False)
+    assert catalog.column_names('db.s."orders"') == ["Id"]
+    assert catalog.column_names("db.s.orders") == []
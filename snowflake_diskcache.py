@@ -0,0 +1,336 @@
+"""
+A persistent cache of transpiled statements, shared across processes and runs.
+
+Jobs that transpile the same statements over and over can keep the results in a local SQLite
+database. Entries are content-addressed: they're keyed by a hash of the SQL text, the source and
+target dialects, the sqlglot version, the source code of the dialects and the generator options,
+so a cached output is only reused if transpiling the statement again would produce it. The
+database runs in WAL mode, so any number of processes can read from and write to it at the same
+time, and the least recently used entries are evicted once it grows past its size limit.
+
+Example:
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), "transpile.db")
+    >>> with DiskCache(path) as cache:
+    ...     cache.transpile("SELECT IFF(a, 1, 2)", write="duckdb")
+    ['SELECT CASE WHEN a THEN 1 ELSE 2 END']
+    >>> with DiskCache(path) as cache:
+    ...     cache.transpile("SELECT IFF(a, 1, 2)", write="duckdb")
+    ...     cache.info().hits
+    ['SELECT CASE WHEN a THEN 1 ELSE 2 END']
+    1
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import typing as t
+from functools import lru_cache
+
+from sqlglot import __version__
+from sqlglot.dialects.dialect import Dialect, DialectType
+from sqlglot.errors import ErrorLevel
+
+DEFAULT_MAX_SIZE = 1 << 30
+DEFAULT_BATCH_SIZE = 512
+DEFAULT_TIMEOUT = 60.0
+
+# Access times are only refreshed when they're older than this many seconds, so that warm runs
+# don't have to write to the database for every hit
+ACCESS_RESOLUTION = 3600
+
+# Evicting entries stops once the size of the cache drops below this fraction of its limit
+EVICTION_RATIO = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key BLOB PRIMARY KEY,
+    output TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    accessed INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('size', 0);
+"""
+
+
+class DiskCacheInfo(t.NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int
+    max_size: int
+
+
+class DiskCache:
+    """
+    A size-bounded, persistent cache of transpiled SQL, stored in a SQLite database.
+
+    New entries and access time updates are buffered in memory and written in batches of
+    `batch_size`, so they only become visible to other processes once a batch is flushed, which
+    also happens when the cache is closed. Only successful transpilations are cached.
+
+    Args:
+        path: the path of the database file, which is created if it doesn't exist.
+        max_size: the maximum total size of the cached entries, in bytes.
+        read: the default dialect of the statements to transpile.
+        batch_size: the number of pending writes that triggers a flush.
+        timeout: how long to wait for another process to release the database, in seconds.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_size: int = DEFAULT_MAX_SIZE,
+        read: DialectType = "snowflake",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError(f"Cache size must be positive, got {max_size}")
+
+        self.path = path
+        self.max_size = max_size
+        self.read = Dialect.get_or_raise(read)()
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._pending: t.Dict[bytes, str] = {}
+        self._touched: t.Set[bytes] = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        # Creates the database right away, so that a bad path fails early
+        self._connection()
+
+    def __enter__(self) -> DiskCache:
+        return self
+
+    def __exit__(self, *exc_info: t.Any) -> None:
+        self.close()
+
+    def transpile(
+        self,
+        sql: str,
+        read: DialectType = None,
+        write: DialectType = None,
+        identity: bool = True,
+        error_level: t.Optional[ErrorLevel] = None,
+        **opts,
+    ) -> t.List[str]:
+        """
+        Mirrors `sqlglot.transpile`, but returns the cached output if there is one.
+
+        Args:
+            sql: the SQL code string to transpile.
+            read: the source dialect. Defaults to the cache's dialect.
+            write: the target dialect.
+            identity: if set to `True` and if the target dialect is not specified the source
+                dialect will be used as both: the source and the target dialect.
+            error_level: the desired error level of the parser.
+            **opts: other `sqlglot.generator.Generator` options.
+
+        Returns:
+            The list of transpiled SQL statements.
+        """
+        source = self.read if read is None else Dialect.get_or_raise(read)()
+        target = source if write is None and identity else Dialect.get_or_raise(write)()
+        key = self.key(sql, source, target, error_level=error_level, **opts)
+
+        output = self.get(key)
+        if output is None:
+            parse_opts = {} if error_level is None else {"error_level": error_level}
+            output = [target.generate(e, **opts) for e in source.parse(sql, **parse_opts)]
+            self.put(key, output)
+
+        return output
+
+    def key(
+        self,
+        sql: str,
+        source: Dialect,
+        target: Dialect,
+        error_level: t.Optional[ErrorLevel] = None,
+        **opts,
+    ) -> bytes:
+        """Returns the key of the entry for the given statement and transpilation settings."""
+        header = repr(
+            (
+                __version__,
+                _revision(type(source)),
+                _revision(type(target)),
+                error_level,
+                sorted(opts.items()),
+            )
+        )
+        digest = hashlib.blake2b(header.encode(), digest_size=16)
+        digest.update(b"\0")
+        digest.update(sql.encode("utf-8", "surrogatepass"))
+        return digest.digest()
+
+    def get(self, key: bytes) -> t.Optional[t.List[str]]:
+        """Returns the cached output for `key`, or `None` if there isn't one."""
+        with self._lock:
+            value = self._pending.get(key)
+            if value is not None:
+                self.hits += 1
+                return json.loads(value)
+
+        row = (
+            self._connection()
+            .execute("SELECT output, accessed FROM entries WHERE key = ?", (key,))
+            .fetchone()
+        )
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            if row[1] < time.time() - ACCESS_RESOLUTION:
+                self._touched.add(key)
+            flush = len(self._pending) + len(self._touched) >= self.batch_size
+
+        if flush:
+            self.flush()
+        return json.loads(row[0])
+
+    def put(self, key: bytes, output: t.List[str]) -> None:
+        """Adds an entry to the cache. It's written to the database with the next batch."""
+        with self._lock:
+            self._pending[key] = json.dumps(output)
+            flush = len(self._pending) + len(self._touched) >= self.batch_size
+
+        if flush:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the pending entries and access times, evicting old entries if needed."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            touched, self._touched = self._touched, set()
+
+        if not pending and not touched:
+            return
+
+        now = int(time.time())
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            added = 0
+            for key, value in pending.items():
+                size = len(key) + len(value.encode("utf-8", "surrogatepass"))
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO entries VALUES (?, ?, ?, ?)", (key, value, size, now)
+                )
+                if cursor.rowcount == 1:
+                    added += size
+
+            connection.executemany(
+                "UPDATE entries SET accessed = ? WHERE key = ?", ((now, key) for key in touched)
+            )
+            connection.execute("UPDATE meta SET value = value + ? WHERE name = 'size'", (added,))
+            evicted = self._evict(connection)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        if evicted:
+            with self._lock:
+                self.evictions += evicted
+            connection.execute("PRAGMA incremental_vacuum")
+
+    def info(self) -> DiskCacheInfo:
+        """Returns the cache statistics, including the entries written by other processes."""
+        self.flush()
+        connection = self._connection()
+        entries = connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        size = connection.execute("SELECT value FROM meta WHERE name = 'size'").fetchone()[0]
+        return DiskCacheInfo(self.hits, self.misses, self.evictions, entries, size, self.max_size)
+
+    def clear(self) -> None:
+        """Removes every entry from the database and resets the statistics."""
+        with self._lock:
+            self._pending.clear()
+            self._touched.clear()
+            self.hits = self.misses = self.evictions = 0
+
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute("DELETE FROM entries")
+        connection.execute("UPDATE meta SET value = 0 WHERE name = 'size'")
+        connection.execute("COMMIT")
+        connection.execute("PRAGMA incremental_vacuum")
+
+    def close(self) -> None:
+        """Flushes the pending writes and closes the current thread's connection."""
+        self.flush()
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections are per thread and can't be carried over to forked processes
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False
+            )
+            # auto_vacuum only takes effect if it's set before the tables are created
+            connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _evict(self, connection: sqlite3.Connection) -> int:
+        size = connection.execute("SELECT value FROM meta WHERE name = 'size'").fetchone()[0]
+        if size <= self.max_size:
+            return 0
+
+        target = int(self.max_size * EVICTION_RATIO)
+        keys = []
+        freed = 0
+        for key, entry_size in connection.execute(
+            "SELECT key, size FROM entries ORDER BY accessed"
+        ):
+            if size - freed <= target:
+                break
+            keys.append((key,))
+            freed += entry_size
+
+        connection.executemany("DELETE FROM entries WHERE key = ?", keys)
+        connection.execute("UPDATE meta SET value = value - ? WHERE name = 'size'", (freed,))
+        return len(keys)
+
+
+@lru_cache(maxsize=None)
+def _revision(dialect: t.Type[Dialect]) -> str:
+    """
+    Identifies the code of a dialect, so that cached outputs are dropped when the dialect
+    changes, even if the sqlglot version stays the same.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    paths = {
+        getattr(sys.modules.get(klass.__module__), "__file__", None) for klass in dialect.__mro__
+    }
+    for path in sorted(path for path in paths if path and os.path.exists(path)):
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return f"{dialect.__module__}.{dialect.__qualname__}:{digest.hexdigest()}"
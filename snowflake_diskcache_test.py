@@ -0,0 +1,194 @@
+import multiprocessing
+import sqlite3
+import sys
+
+import pytest
+
+import sqlglot
+import snowflake_diskcache
+from sqlglot.errors import ErrorLevel
+from snowflake_diskcache import ACCESS_RESOLUTION, DiskCache
+
+# The statements all have the same size, so that their entries do too
+STATEMENTS = [f"SELECT IFF(a > {i}, DIV0(b, {i}), {i})" for i in range(10, 30)]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "transpile.db")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(snowflake_diskcache.time, "time", lambda: now[0])
+    return now
+
+
+def _rows(path):
+    with sqlite3.connect(path) as connection:
+        return dict(connection.execute("SELECT key, accessed FROM entries"))
+
+
+def test_outputs_are_reused_across_instances(path):
+    with DiskCache(path) as cache:
+        for sql in STATEMENTS:
+            assert cache.transpile(sql, write="duckdb") == sqlglot.transpile(
+                sql, read="snowflake", write="duckdb"
+            )
+        assert cache.info().misses == len(STATEMENTS)
+
+    with DiskCache(path) as cache:
+        for sql in STATEMENTS:
+            assert cache.transpile(sql, write="duckdb") == sqlglot.transpile(
+                sql, read="snowflake", write="duckdb"
+            )
+        assert cache.info()[:4] == (len(STATEMENTS), 0, 0, len(STATEMENTS))
+
+
+def test_keys_include_the_settings(path):
+    with DiskCache(path) as cache:
+        sql = "SELECT IFF(a, 1, 2)"
+        assert cache.transpile(sql) == ["SELECT IFF(a, 1, 2)"]
+        assert cache.transpile(sql, write="duckdb") == ["SELECT CASE WHEN a THEN 1 ELSE 2 END"]
+        assert cache.transpile(sql, write="duckdb", pretty=True) == [
+            "SELECT\n  CASE WHEN a THEN 1 ELSE 2 END"
+        ]
+        assert cache.transpile(sql, read="duckdb") == ["SELECT IFF(a, 1, 2)"]
+        assert cache.transpile(sql, identity=False) == sqlglot.transpile(
+            sql, read="snowflake", identity=False
+        )
+        assert cache.transpile("SELECT (", error_level=ErrorLevel.IGNORE) == ["SELECT ()"]
+        assert cache.info().misses == 6
+        assert cache.transpile(sql, write="duckdb", pretty=True)
+        assert cache.info().hits == 1
+
+
+def test_errors_arent_cached(path):
+    with DiskCache(path) as cache:
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                cache.transpile("SELECT TO_TIMESTAMP(1, 5)")
+        assert cache.info().entries == 0
+
+
+def test_writes_are_batched(path):
+    cache = DiskCache(path, batch_size=3)
+    cache.transpile(STATEMENTS[0])
+    cache.transpile(STATEMENTS[1])
+    assert len(_rows(path)) == 0
+
+    # Pending entries are already served to this instance
+    cache.transpile(STATEMENTS[0])
+    assert cache.hits == 1
+
+    cache.transpile(STATEMENTS[2])
+    assert len(_rows(path)) == 3
+    cache.transpile(STATEMENTS[3])
+    cache.close()
+    assert len(_rows(path)) == 4
+
+
+def test_access_times_are_refreshed_lazily(path, clock):
+    with DiskCache(path) as cache:
+        cache.transpile(STATEMENTS[0])
+    (accessed,) = _rows(path).values()
+
+    clock[0] += ACCESS_RESOLUTION / 2
+    with DiskCache(path) as cache:
+        cache.transpile(STATEMENTS[0])
+    assert list(_rows(path).values()) == [accessed]
+
+    clock[0] += ACCESS_RESOLUTION
+    with DiskCache(path) as cache:
+        cache.transpile(STATEMENTS[0])
+    assert list(_rows(path).values()) == [int(clock[0])]
+
+
+def test_least_recently_used_entries_are_evicted(path, clock):
+    with DiskCache(path, batch_size=1) as cache:
+        for sql in STATEMENTS[:10]:
+            cache.transpile(sql)
+            clock[0] += 1
+        size = cache.info().size
+        entry_size = size // 10
+
+        # The first entry is used again, so the second one is the least recently used
+        clock[0] += ACCESS_RESOLUTION
+        cache.transpile(STATEMENTS[0])
+        cache.flush()
+
+    with DiskCache(path, max_size=size + entry_size // 2, batch_size=1) as cache:
+        cache.transpile(STATEMENTS[10])
+        info = cache.info()
+
+        # Entries are evicted until the cache is down to 90% of its limit
+        assert info.evictions == 2
+        assert info.size <= cache.max_size * 0.9
+        assert info.entries == 9
+        with sqlite3.connect(path) as connection:
+            assert info.size == connection.execute("SELECT SUM(size) FROM entries").fetchone()[0]
+
+        cache.transpile(STATEMENTS[0])
+        cache.transpile(STATEMENTS[3])
+        assert cache.hits == 2
+        cache.transpile(STATEMENTS[1])
+        cache.transpile(STATEMENTS[2])
+        assert cache.misses == 3
+
+
+def test_clear(path):
+    with DiskCache(path) as cache:
+        cache.transpile(STATEMENTS[0])
+        cache.flush()
+        cache.clear()
+        assert cache.info() == (0, 0, 0, 0, 0, cache.max_size)
+
+
+def test_invalid_settings(path):
+    with pytest.raises(ValueError):
+        DiskCache(path, max_size=0)
+    with pytest.raises(sqlite3.OperationalError):
+        DiskCache(path + "/nested/transpile.db")
+
+
+def test_database_is_in_wal_mode(path):
+    DiskCache(path).close()
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+
+
+def _transpile_all(path, offset):
+    with DiskCache(path, batch_size=4) as cache:
+        for i in range(len(STATEMENTS)):
+            cache.transpile(STATEMENTS[(i + offset) % len(STATEMENTS)], write="duckdb")
+
+
+def test_processes_share_the_database(path):
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_transpile_all, args=(path, i * 7)) for i in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0, 0, 0]
+
+    with DiskCache(path) as cache:
+        info = cache.info()
+        assert info.entries == len(STATEMENTS)
+        with sqlite3.connect(path) as connection:
+            assert info.size == connection.execute("SELECT SUM(size) FROM entries").fetchone()[0]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fork isn't available")
+def test_connections_are_reopened_after_fork(path):
+    cache = DiskCache(path)
+    context = multiprocessing.get_context("fork")
+    process = context.Process(target=lambda: (cache.transpile(STATEMENTS[0]), cache.close()))
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+
+    assert cache.transpile(STATEMENTS[0]) == sqlglot.transpile(STATEMENTS[0], read="snowflake")
+    assert cache.hits == 1
+    cache.close()
@@ -0,0 +1,887 @@
+"""
+Columnar evaluation of Snowflake expressions in sqlglot's Python executor, backed by NumPy.
+
+sqlglot's `PythonExecutor` evaluates projections, filters and sort keys one row at a time, by
+running generated Python code. The `VectorizedExecutor` instead evaluates them over batches of
+rows, with each column of a batch stored as a NumPy array along with a mask of its NULL values.
+This covers the scalar functions Snowflake queries lean on, most of which the row-at-a-time
+executor can't run at all:
+
+- `IFF`, which is what `DIV0`, `ZEROIFNULL` and `NULLIFZERO` are parsed into, along with searched
+  `CASE` expressions and `COALESCE`.
+- `SQUARE`, i.e. `POWER(x, 2)`, and arithmetic, comparison and boolean operators.
+- `TO_TIMESTAMP` of a number of seconds, milliseconds or microseconds since the epoch.
+- `DATEADD` and `DATEDIFF`, which count unit boundaries the way Snowflake does.
+- `RLIKE`, `LIKE`, `ILIKE`, `LIKE ANY` and `ILIKE ANY`.
+
+NULLs propagate the way they do in Snowflake, boolean operators use three-valued logic and the
+branches of conditional expressions are only evaluated for the rows that select them, so that
+`DIV0(a, 0)` doesn't divide by zero. Sorts follow the dialect's `NULL_ORDERING`, which for
+Snowflake means that NULLs sort as if they were larger than any other value. Expressions that
+can't be evaluated over arrays fall back to the generated Python code, row by row.
+
+This module requires NumPy.
+
+Example:
+    >>> tables = {"T": [{"A": 1, "B": 0}, {"A": 4, "B": 2}, {"A": None, "B": 1}]}
+    >>> execute("SELECT DIV0(a, b) AS x, SQUARE(a) AS y FROM t ORDER BY a DESC", tables=tables).rows
+    [(None, None), (2.0, 16.0), (0, 1.0)]
+    >>> tables = {"T": [{"S": "apple"}, {"S": "Banana"}, {"S": None}]}
+    >>> execute("SELECT s ILIKE ANY ('b%', '%x') AS b FROM t", tables=tables).rows
+    [(False,), (True,), (None,)]
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import operator
+import re
+import time
+import typing as t
+from datetime import date, datetime
+from functools import lru_cache, partial
+
+import numpy as np
+
+from sqlglot import exp
+from sqlglot.dialects.dialect import Dialect, DialectType
+from sqlglot.errors import ExecuteError
+from sqlglot.executor import ensure_tables
+from sqlglot.executor.python import PythonExecutor
+from sqlglot.executor.table import Table, TableIter
+from sqlglot.helper import dict_depth
+from sqlglot.optimizer import optimize
+from sqlglot.planner import Plan
+from sqlglot.schema import ensure_schema, flatten_schema, nested_get, nested_set
+
+if t.TYPE_CHECKING:
+    from sqlglot.executor.context import Context
+    from sqlglot.schema import Schema
+
+logger = logging.getLogger("sqlglot")
+
+BATCH_SIZE = 65536
+
+# Canonical date parts, along with their NumPy datetime unit when they have a fixed length
+DATE_PARTS = {
+    "year": "Y",
+    "quarter": None,
+    "month": "M",
+    "week": None,
+    "day": "D",
+    "hour": "h",
+    "minute": "m",
+    "second": "s",
+    "millisecond": "ms",
+    "microsecond": "us",
+}
+
+DATE_PART_ALIASES = {
+    **{alias: "year" for alias in ("y", "yy", "yyy", "yyyy", "yr", "years", "yrs")},
+    **{alias: "quarter" for alias in ("q", "qtr", "qtrs", "quarters")},
+    **{alias: "month" for alias in ("mm", "mon", "mons", "months")},
+    **{alias: "week" for alias in ("w", "wk", "weekofyear", "woy", "wy", "weeks")},
+    **{alias: "day" for alias in ("d", "dd", "days", "dayofmonth")},
+    **{alias: "hour" for alias in ("h", "hh", "hr", "hours", "hrs")},
+    **{alias: "minute" for alias in ("m", "mi", "min", "minutes", "mins")},
+    **{alias: "second" for alias in ("s", "sec", "seconds", "secs")},
+    **{alias: "millisecond" for alias in ("ms", "msec", "milliseconds")},
+    **{alias: "microsecond" for alias in ("us", "usec", "microseconds")},
+}
+
+# The number of microseconds in a unit of each of the UnixToTime scales
+UNIX_SCALES = {
+    exp.UnixToTime.SECONDS.name: 1_000_000,
+    exp.UnixToTime.MILLIS.name: 1_000,
+    exp.UnixToTime.MICROS.name: 1,
+}
+
+# Integer arithmetic whose estimate in float64 reaches this magnitude may have overflown int64,
+# given the float64 rounding error, so it's computed again with Python's integers
+INT64_SAFE_MAGNITUDE = float(2**62)
+
+REGEXP_FLAGS = {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL}
+
+COMPARISONS = {
+    exp.EQ: operator.eq,
+    exp.NEQ: operator.ne,
+    exp.GT: operator.gt,
+    exp.GTE: operator.ge,
+    exp.LT: operator.lt,
+    exp.LTE: operator.le,
+}
+
+ARITHMETIC = {
+    exp.Add: operator.add,
+    exp.Sub: operator.sub,
+    exp.Mul: operator.mul,
+    exp.Mod: operator.mod,
+}
+
+
+class Vector(t.NamedTuple):
+    """
+    A column of values.
+
+    Attributes:
+        values: the values. The entries of NULL values are placeholders.
+        nulls: a mask of the NULL values.
+    """
+
+    values: np.ndarray
+    nulls: np.ndarray
+
+
+class Batch:
+    """
+    A batch of rows, whose columns are converted to vectors the first time they're referenced.
+
+    Args:
+        rows: the rows the batch is taken from.
+        layout: the column indexes of the tables of the context, by table and column name.
+        indices: the positions of the batch's rows in `rows`, or `None` if it has all of them.
+    """
+
+    __slots__ = ("rows", "layout", "indices", "vectors")
+
+    def __init__(
+        self,
+        rows: t.Sequence[t.Tuple],
+        layout: t.Dict[t.Optional[str], t.Dict[str, int]],
+        indices: t.Optional[np.ndarray] = None,
+    ) -> None:
+        self.rows = rows
+        self.layout = layout
+        self.indices = indices
+        self.vectors: t.Dict[t.Tuple[t.Optional[str], str], Vector] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows) if self.indices is None else len(self.indices)
+
+    def column(self, table: t.Optional[str], name: str) -> Vector:
+        vector = self.vectors.get((table, name))
+        if vector is None:
+            index = self.layout[table][name]
+            vector = self.vectors[(table, name)] = to_vector(
+                [row[index] for row in self.selected()]
+            )
+        return vector
+
+    def selected(self) -> t.Sequence[t.Tuple]:
+        """Returns the rows of the batch."""
+        if self.indices is None:
+            return self.rows
+        rows = self.rows
+        return [rows[i] for i in self.indices.tolist()]
+
+    def take(self, mask: np.ndarray) -> Batch:
+        """Returns the batch of the rows selected by `mask`."""
+        indices = np.flatnonzero(mask) if self.indices is None else self.indices[mask]
+        batch = Batch(self.rows, self.layout, indices)
+        batch.vectors = {
+            key: Vector(vector.values[mask], vector.nulls[mask])
+            for key, vector in self.vectors.items()
+        }
+        return batch
+
+
+def to_vector(values: t.Sequence[t.Any]) -> Vector:
+    """Converts a sequence of Python values to a vector, picking the narrowest array type."""
+    size = len(values)
+    nulls = np.fromiter((value is None for value in values), dtype=bool, count=size)
+    kinds = {type(value) for value in values}
+    kinds.discard(type(None))
+
+    try:
+        if kinds == {bool}:
+            return Vector(np.array([bool(value) for value in values], dtype=bool), nulls)
+        if kinds == {int}:
+            return Vector(np.array([value or 0 for value in values], dtype=np.int64), nulls)
+        if kinds and kinds <= {int, float}:
+            return Vector(np.array([value or 0 for value in values], dtype=np.float64), nulls)
+        if kinds == {datetime} and all(value.tzinfo is None for value in values if value):
+            return Vector(np.array(values, dtype="datetime64[us]"), nulls)
+        if kinds == {date}:
+            return Vector(np.array(values, dtype="datetime64[D]"), nulls)
+    except OverflowError:
+        pass
+
+    return Vector(np.fromiter(values, dtype=object, count=size), nulls)
+
+
+def to_python(vector: Vector) -> t.List[t.Any]:
+    """Converts a vector back to a list of Python values."""
+    values = vector.values.tolist()
+    for i in np.flatnonzero(vector.nulls).tolist():
+        values[i] = None
+    return values
+
+
+def constant(value: t.Any, size: int) -> Vector:
+    vector = to_vector([value])
+    return Vector(np.repeat(vector.values, size), np.repeat(vector.nulls, size))
+
+
+def truth(vector: Vector) -> np.ndarray:
+    """Returns the mask of the values that are true, i.e. that are truthy and not NULL."""
+    return vector.values.astype(bool) & ~vector.nulls
+
+
+def merge(size: int, parts: t.Sequence[t.Tuple[np.ndarray, Vector]]) -> Vector:
+    """
+    Combines vectors that hold the values of disjoint subsets of rows, given by masks. Vectors
+    of different types are combined into an object array, which keeps each value's own type.
+    """
+    dtypes = {vector.values.dtype for _, vector in parts if not vector.nulls.all()}
+    dtype = dtypes.pop() if len(dtypes) == 1 else np.dtype(object)
+    values = np.full(size, None, dtype=object) if dtype == object else np.zeros(size, dtype)
+    nulls = np.ones(size, dtype=bool)
+
+    for mask, vector in parts:
+        if not vector.nulls.all():
+            values[mask] = vector.values.astype(dtype, copy=False)
+        nulls[mask] = vector.nulls
+
+    return Vector(values, nulls)
+
+
+def apply(function: t.Callable[..., np.ndarray], *vectors: Vector) -> Vector:
+    """
+    Applies a function to the values of vectors, which is NULL whenever one of its arguments is.
+    The function is only given the values of the rows where none of the arguments are NULL.
+    """
+    nulls = np.logical_or.reduce([vector.nulls for vector in vectors])
+    if not nulls.any():
+        return Vector(function(*(vector.values for vector in vectors)), nulls)
+
+    valid = ~nulls
+    result = function(*(vector.values[valid] for vector in vectors))
+    size = len(nulls)
+    values = (
+        np.full(size, None, dtype=object)
+        if result.dtype == object
+        else np.zeros(size, result.dtype)
+    )
+    values[valid] = result
+    return Vector(values, nulls)
+
+
+def _exact(function: t.Callable[..., np.ndarray], *values: np.ndarray) -> np.ndarray:
+    # NumPy's integer arithmetic wraps around silently, while SQL integers don't
+    if all(value.dtype == np.int64 for value in values):
+        estimate = function(*(value.astype(np.float64) for value in values))
+        if (np.abs(estimate) >= INT64_SAFE_MAGNITUDE).any():
+            return function(*(value.astype(object) for value in values))
+    return function(*values)
+
+
+def _divide(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    if (right == 0).any():
+        raise ZeroDivisionError("division by zero")
+    if left.dtype == object or right.dtype == object:
+        return left / right
+    return np.true_divide(left, right)
+
+
+def _power(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    # Snowflake's POWER always returns a FLOAT
+    with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+        return np.power(left.astype(np.float64), right.astype(np.float64))
+
+
+def _datetimes(values: np.ndarray) -> np.ndarray:
+    if values.dtype.kind == "M":
+        return values
+    if values.dtype == object:
+        return values.astype("datetime64[us]")
+    raise ExecuteError(f"Expected dates or timestamps, got values of type {values.dtype}")
+
+
+def _date_part(expression: t.Optional[exp.Expression]) -> str:
+    name = expression.name.lower() if expression else "day"
+    part = DATE_PART_ALIASES.get(name, name)
+    if part not in DATE_PARTS:
+        raise ExecuteError(f"Unsupported date part '{name}'")
+    return part
+
+
+def _add_months(values: np.ndarray, months: np.ndarray) -> np.ndarray:
+    # The day of the month is clamped to the length of the resulting month, as in Snowflake
+    days = values.astype("datetime64[D]")
+    start = days.astype("datetime64[M]")
+    day = (days - start.astype("datetime64[D]")).astype(np.int64)
+    target = start + months.astype("timedelta64[M]")
+    target_start = target.astype("datetime64[D]")
+    length = ((target + 1).astype("datetime64[D]") - target_start).astype(np.int64)
+    result = target_start + np.minimum(day, length - 1).astype("timedelta64[D]")
+
+    if values.dtype == np.dtype("datetime64[D]"):
+        return result
+    return result.astype(values.dtype) + (values - days.astype(values.dtype))
+
+
+def _date_add(values: np.ndarray, amounts: np.ndarray, part: str) -> np.ndarray:
+    values = _datetimes(values)
+    amounts = amounts.astype(np.int64)
+
+    if part in ("year", "quarter", "month"):
+        return _add_months(values, amounts * {"year": 12, "quarter": 3, "month": 1}[part])
+    if part == "week":
+        return values + (amounts * 7).astype("timedelta64[D]")
+    if part == "day":
+        return values + amounts.astype("timedelta64[D]")
+
+    # Adding a time part to a DATE results in a TIMESTAMP
+    values = values.astype(np.result_type(values.dtype, np.dtype("datetime64[us]")))
+    return values + amounts.astype(f"timedelta64[{DATE_PARTS[part]}]")
+
+
+def _date_index(values: np.ndarray, part: str) -> np.ndarray:
+    """Returns the number of `part` boundaries between the epoch and each of the values."""
+    values = _datetimes(values)
+
+    if part == "quarter":
+        return values.astype("datetime64[M]").astype(np.int64) // 3
+    if part == "week":
+        # Weeks start on Mondays and 1970-01-01 was a Thursday
+        return (values.astype("datetime64[D]").astype(np.int64) + 3) // 7
+    return values.astype(f"datetime64[{DATE_PARTS[part]}]").astype(np.int64)
+
+
+def _date_diff(end: np.ndarray, start: np.ndarray, part: str) -> np.ndarray:
+    return _date_index(end, part) - _date_index(start, part)
+
+
+def _unix_to_time(values: np.ndarray, scale: exp.Expression) -> np.ndarray:
+    if scale.is_int:
+        # A numeric scale is the number of decimal digits of a second
+        digits = int(scale.name)
+        factor: t.Union[int, float] = 10 ** (6 - digits) if digits <= 6 else 10.0 ** (6 - digits)
+    else:
+        factor = UNIX_SCALES[scale.name]
+
+    if values.dtype.kind in "iu" and isinstance(factor, int):
+        micros = values.astype(np.int64) * factor
+    else:
+        micros = np.floor(values.astype(np.float64) * factor).astype(np.int64)
+    return micros.astype("datetime64[us]")
+
+
+@lru_cache(maxsize=1024)
+def _like_regex(pattern: str, ignore_case: bool) -> t.Pattern:
+    """Compiles a LIKE pattern, where backslashes escape wildcards."""
+    parts = []
+    chars = iter(pattern)
+    for char in chars:
+        if char == "\\":
+            parts.append(re.escape(next(chars, "\\")))
+        elif char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts), re.DOTALL | (re.IGNORECASE if ignore_case else 0))
+
+
+@lru_cache(maxsize=1024)
+def _regex(pattern: str, flags: str) -> t.Pattern:
+    value = 0
+    for flag in flags:
+        if flag == "c":
+            value &= ~re.IGNORECASE
+        else:
+            value |= REGEXP_FLAGS.get(flag, 0)
+    return re.compile(pattern, value)
+
+
+def _match(subjects: np.ndarray, patterns: np.ndarray, compile: t.Callable) -> np.ndarray:
+    """
+    Matches the subjects against the patterns, as whole strings. Each distinct subject is only
+    matched once per pattern, which pays off for the low-cardinality columns that usually get
+    filtered with patterns.
+    """
+    values = [value if isinstance(value, str) else str(value) for value in subjects.tolist()]
+
+    if len(set(patterns.tolist())) <= 1:
+        if not values:
+            return np.zeros(0, dtype=bool)
+        regex = compile(str(patterns[0]))
+        matches = {value: regex.fullmatch(value) is not None for value in set(values)}
+        return np.fromiter(map(matches.__getitem__, values), dtype=bool, count=len(values))
+
+    return np.array(
+        [compile(str(p)).fullmatch(s) is not None for s, p in zip(values, patterns.tolist())],
+        dtype=bool,
+    )
+
+
+def _sort_ranks(vector: Vector, desc: bool) -> np.ndarray:
+    ranks = np.zeros(len(vector.nulls), dtype=np.int64)
+    valid = ~vector.nulls
+    if valid.any():
+        _, inverse = np.unique(vector.values[valid], return_inverse=True)
+        inverse = inverse.reshape(-1)
+        ranks[valid] = -inverse if desc else inverse
+    return ranks
+
+
+class Evaluator:
+    """
+    Evaluates expressions over batches of rows.
+
+    Args:
+        executor: the executor whose generated code is used for the expressions that can't be
+            evaluated over arrays.
+    """
+
+    def __init__(self, executor: PythonExecutor) -> None:
+        self.executor = executor
+        self._code: t.Dict[int, t.Tuple[exp.Expression, t.Any]] = {}
+        self._handlers: t.Dict[t.Type[exp.Expression], t.Callable] = {
+            exp.Column: self._column,
+            exp.Literal: self._literal,
+            exp.Boolean: self._boolean,
+            exp.Null: self._null,
+            exp.Paren: self._unwrap,
+            exp.Alias: self._unwrap,
+            exp.Neg: self._neg,
+            exp.Div: self._div,
+            exp.Pow: self._pow,
+            exp.And: self._and,
+            exp.Or: self._or,
+            exp.Not: self._not,
+            exp.Is: self._is,
+            exp.If: self._if,
+            exp.Case: self._case,
+            exp.Coalesce: self._coalesce,
+            exp.UnixToTime: self._unix_to_time,
+            exp.DateAdd: self._date_add,
+            exp.DateDiff: self._date_diff,
+            exp.RegexpLike: self._regexp_like,
+            exp.Like: self._like,
+            exp.ILike: self._like,
+            exp.LikeAny: self._like_any,
+            exp.ILikeAny: self._like_any,
+            **{klass: self._arithmetic for klass in ARITHMETIC},
+            **{klass: self._comparison for klass in COMPARISONS},
+        }
+
+    def evaluate(self, expression: exp.Expression, batch: Batch, context: Context) -> Vector:
+        """
+        Evaluates an expression for every row of a batch.
+
+        Args:
+            expression: the expression.
+            batch: the rows to evaluate the expression for.
+            context: the context the rows belong to.
+
+        Returns:
+            The values of the expression.
+        """
+        handler = self._handlers.get(type(expression))
+        if handler is not None:
+            vector = handler(expression, batch, context)
+            if vector is not None:
+                return vector
+        return self._fallback(expression, batch, context)
+
+    def _fallback(self, expression: exp.Expression, batch: Batch, context: Context) -> Vector:
+        # The expression is kept along with its code, so that its id can't be reused
+        entry = self._code.get(id(expression))
+        if entry is None:
+            entry = self._code[id(expression)] = (expression, self.executor.generate(expression))
+
+        code = entry[1]
+        values = []
+        for row in batch.selected():
+            context.set_row(row)
+            values.append(context.eval(code))
+        return to_vector(values)
+
+    def _column(self, expression: exp.Column, batch: Batch, context: Context) -> Vector:
+        return batch.column(expression.text("table") or None, expression.name)
+
+    def _literal(self, expression: exp.Literal, batch: Batch, context: Context) -> Vector:
+        if expression.is_string:
+            return constant(expression.this, len(batch))
+        return constant(
+            int(expression.this) if expression.is_int else float(expression.this), len(batch)
+        )
+
+    def _boolean(self, expression: exp.Boolean, batch: Batch, context: Context) -> Vector:
+        return constant(expression.this, len(batch))
+
+    def _null(self, expression: exp.Null, batch: Batch, context: Context) -> Vector:
+        return constant(None, len(batch))
+
+    def _unwrap(self, expression: exp.Expression, batch: Batch, context: Context) -> Vector:
+        return self.evaluate(expression.this, batch, context)
+
+    def _neg(self, expression: exp.Neg, batch: Batch, context: Context) -> Vector:
+        return apply(partial(_exact, operator.neg), self.evaluate(expression.this, batch, context))
+
+    def _binary(
+        self, function: t.Callable, expression: exp.Expression, batch: Batch, context: Context
+    ) -> Vector:
+        left = self.evaluate(expression.this, batch, context)
+        right = self.evaluate(expression.expression, batch, context)
+        return apply(function, left, right)
+
+    def _arithmetic(self, expression: exp.Binary, batch: Batch, context: Context) -> Vector:
+        function = partial(_exact, ARITHMETIC[type(expression)])
+        return self._binary(function, expression, batch, context)
+
+    def _comparison(self, expression: exp.Binary, batch: Batch, context: Context) -> Vector:
+        return self._binary(COMPARISONS[type(expression)], expression, batch, context)
+
+    def _div(self, expression: exp.Div, batch: Batch, context: Context) -> Vector:
+        return self._binary(_divide, expression, batch, context)
+
+    def _pow(self, expression: exp.Pow, batch: Batch, context: Context) -> Vector:
+        return self._binary(_power, expression, batch, context)
+
+    def _and(self, expression: exp.And, batch: Batch, context: Context) -> Vector:
+        left = self.evaluate(expression.this, batch, context)
+        right = self.evaluate(expression.expression, batch, context)
+        left_false = ~left.nulls & ~left.values.astype(bool)
+        right_false = ~right.nulls & ~right.values.astype(bool)
+        nulls = (left.nulls | right.nulls) & ~left_false & ~right_false
+        return Vector(truth(left) & truth(right), nulls)
+
+    def _or(self, expression: exp.Or, batch: Batch, context: Context) -> Vector:
+        left = self.evaluate(expression.this, batch, context)
+        right = self.evaluate(expression.expression, batch, context)
+        either = truth(left) | truth(right)
+        return Vector(either, (left.nulls | right.nulls) & ~either)
+
+    def _not(self, expression: exp.Not, batch: Batch, context: Context) -> Vector:
+        vector = self.evaluate(expression.this, batch, context)
+        return Vector(~vector.values.astype(bool) & ~vector.nulls, vector.nulls)
+
+    def _is(self, expression: exp.Is, batch: Batch, context: Context) -> t.Optional[Vector]:
+        if not isinstance(expression.expression, exp.Null):
+            return None
+        vector = self.evaluate(expression.this, batch, context)
+        return Vector(vector.nulls.copy(), np.zeros(len(batch), dtype=bool))
+
+    def _if(self, expression: exp.If, batch: Batch, context: Context) -> Vector:
+        return self._branches(
+            [(expression.this, expression.args["true"])],
+            expression.args.get("false"),
+            batch,
+            context,
+        )
+
+    def _case(self, expression: exp.Case, batch: Batch, context: Context) -> t.Optional[Vector]:
+        if expression.this:
+            return None
+        return self._branches(
+            [(e.this, e.args["true"]) for e in expression.args["ifs"]],
+            expression.args.get("default"),
+            batch,
+            context,
+        )
+
+    def _branches(
+        self,
+        branches: t.List[t.Tuple[exp.Expression, exp.Expression]],
+        default: t.Optional[exp.Expression],
+        batch: Batch,
+        context: Context,
+    ) -> Vector:
+        # Each value is only evaluated for the rows that select it
+        size = len(batch)
+        remaining = np.ones(size, dtype=bool)
+        parts = []
+
+        for condition, value in branches:
+            positions = np.flatnonzero(remaining)
+            selected = np.zeros(size, dtype=bool)
+            selected[
+                positions[truth(self.evaluate(condition, batch.take(remaining), context))]
+            ] = True
+            if selected.any():
+                parts.append((selected, self.evaluate(value, batch.take(selected), context)))
+            remaining &= ~selected
+            if not remaining.any():
+                break
+
+        if remaining.any():
+            rest = batch.take(remaining)
+            parts.append(
+                (
+                    remaining,
+                    self.evaluate(default, rest, context) if default else constant(None, len(rest)),
+                )
+            )
+
+        return merge(size, parts)
+
+    def _coalesce(self, expression: exp.Coalesce, batch: Batch, context: Context) -> Vector:
+        # Each argument is only evaluated for the rows where the previous ones were all NULL
+        size = len(batch)
+        remaining = np.ones(size, dtype=bool)
+        parts = []
+
+        for argument in [expression.this, *expression.expressions]:
+            positions = np.flatnonzero(remaining)
+            vector = self.evaluate(argument, batch.take(remaining), context)
+            valid = ~vector.nulls
+            found = np.zeros(size, dtype=bool)
+            found[positions[valid]] = True
+            parts.append((found, Vector(vector.values[valid], vector.nulls[valid])))
+            remaining &= ~found
+            if not remaining.any():
+                break
+
+        return merge(size, parts)
+
+    def _unix_to_time(
+        self, expression: exp.UnixToTime, batch: Batch, context: Context
+    ) -> t.Optional[Vector]:
+        if any(expression.args.get(arg) for arg in ("zone", "hours", "minutes")):
+            return None
+        scale = expression.args.get("scale") or exp.UnixToTime.SECONDS
+        if not isinstance(scale, exp.Literal):
+            return None
+        return apply(
+            lambda values: _unix_to_time(values, scale),
+            self.evaluate(expression.this, batch, context),
+        )
+
+    def _date_add(self, expression: exp.DateAdd, batch: Batch, context: Context) -> Vector:
+        part = _date_part(expression.args.get("unit"))
+        return apply(
+            lambda values, amounts: _date_add(values, amounts, part),
+            self.evaluate(expression.this, batch, context),
+            self.evaluate(expression.expression, batch, context),
+        )
+
+    def _date_diff(self, expression: exp.DateDiff, batch: Batch, context: Context) -> Vector:
+        part = _date_part(expression.args.get("unit"))
+        return apply(
+            lambda end, start: _date_diff(end, start, part),
+            self.evaluate(expression.this, batch, context),
+            self.evaluate(expression.expression, batch, context),
+        )
+
+    def _regexp_like(self, expression: exp.RegexpLike, batch: Batch, context: Context) -> Vector:
+        flag = expression.args.get("flag")
+        if flag is not None and not flag.is_string:
+            return None
+        flags = flag.name if flag else ""
+        return apply(
+            lambda subjects, patterns: _match(subjects, patterns, lambda p: _regex(p, flags)),
+            self.evaluate(expression.this, batch, context),
+            self.evaluate(expression.expression, batch, context),
+        )
+
+    def _like(self, expression: exp.Like | exp.ILike, batch: Batch, context: Context) -> Vector:
+        ignore_case = isinstance(expression, exp.ILike)
+        return apply(
+            lambda subjects, patterns: _match(
+                subjects, patterns, lambda p: _like_regex(p, ignore_case)
+            ),
+            self.evaluate(expression.this, batch, context),
+            self.evaluate(expression.expression, batch, context),
+        )
+
+    def _like_any(
+        self, expression: exp.LikeAny | exp.ILikeAny, batch: Batch, context: Context
+    ) -> Vector:
+        ignore_case = isinstance(expression, exp.ILikeAny)
+        patterns = expression.expression
+        if isinstance(patterns, exp.Tuple):
+            patterns = patterns.expressions
+        elif isinstance(patterns, exp.Paren):
+            patterns = [patterns.this]
+        else:
+            patterns = [patterns]
+
+        subjects = self.evaluate(expression.this, batch, context)
+        matched = np.zeros(len(batch), dtype=bool)
+        unknown = subjects.nulls.copy()
+
+        for pattern in patterns:
+            result = apply(
+                lambda subjects, patterns: _match(
+                    subjects, patterns, lambda p: _like_regex(p, ignore_case)
+                ),
+                subjects,
+                self.evaluate(pattern, batch, context),
+            )
+            matched |= truth(result)
+            unknown |= result.nulls
+
+        # The result is NULL if no pattern matched and some of them were NULL
+        return Vector(matched, unknown & ~matched)
+
+
+class VectorizedExecutor(PythonExecutor):
+    """
+    An executor that evaluates the projections and filters of scans and joins, as well as sorts,
+    over batches of rows stored in NumPy arrays.
+
+    Args:
+        env: the functions available to the expressions evaluated row by row.
+        tables: the tables to query.
+        batch_size: the maximum number of rows evaluated at once.
+        dialect: the dialect whose `NULL_ORDERING` is used for sort keys that don't specify it.
+    """
+
+    def __init__(
+        self,
+        env: t.Optional[t.Dict] = None,
+        tables: t.Optional[t.Dict] = None,
+        batch_size: int = BATCH_SIZE,
+        dialect: DialectType = "snowflake",
+    ) -> None:
+        super().__init__(env=env, tables=tables)
+        self.batch_size = batch_size
+        self.null_ordering = Dialect.get_or_raise(dialect).NULL_ORDERING
+        self.evaluator = Evaluator(self)
+
+    def _project_and_filter(self, context, step, table_iter):
+        sink = self.table(step.projections if step.projections else context.columns)
+        layout = _layout(context)
+        for rows in _row_batches(table_iter, self.batch_size):
+            if len(sink) >= step.limit:
+                break
+
+            batch = Batch(rows, layout)
+            if step.condition:
+                batch = batch.take(truth(self.evaluator.evaluate(step.condition, batch, context)))
+
+            if step.projections:
+                columns = [
+                    to_python(self.evaluator.evaluate(projection, batch, context))
+                    for projection in step.projections
+                ]
+                output = list(zip(*columns))
+            else:
+                output = list(batch.selected())
+
+            if not math.isinf(step.limit):
+                output = output[: int(step.limit) - len(sink)]
+            sink.rows.extend(output)
+
+        return sink
+
+    def sort(self, step, context):
+        projection_columns = [p.alias_or_name for p in step.projections]
+        all_columns = list(context.columns) + projection_columns
+        rows = context.table.rows
+
+        batch = Batch(rows, _layout(context))
+        projected = [
+            to_python(self.evaluator.evaluate(projection, batch, context))
+            for projection in step.projections
+        ]
+        sink = self.table(all_columns)
+        sink.rows = [row + values for row, values in zip(rows, zip(*projected))]
+
+        sort_ctx = self.context({None: sink, **{table: sink for table in context.tables}})
+        batch = Batch(sink.rows, _layout(sort_ctx))
+
+        # np.lexsort sorts by its last key first; within a key, the NULL mask comes first
+        keys = []
+        for ordered in reversed(step.key):
+            vector = self.evaluator.evaluate(ordered.this, batch, sort_ctx)
+            desc = bool(ordered.args.get("desc"))
+            nulls_first = ordered.args.get("nulls_first")
+            if nulls_first is None:
+                nulls_first = self._nulls_first(desc)
+            keys.append(_sort_ranks(vector, desc))
+            keys.append(~vector.nulls if nulls_first else vector.nulls)
+
+        order = np.lexsort(keys) if keys else np.arange(len(sink.rows))
+        if not math.isinf(step.limit):
+            order = order[: int(step.limit)]
+
+        width = len(context.columns)
+        output = Table(projection_columns, rows=[sink.rows[i][width:] for i in order.tolist()])
+        return self.context({step.name: output})
+
+    def _nulls_first(self, desc: bool) -> bool:
+        if self.null_ordering == "nulls_are_small":
+            return not desc
+        if self.null_ordering == "nulls_are_large":
+            return desc
+        return False
+
+
+def _row_batches(table_iter: t.Iterable, size: int) -> t.Iterator[t.List[t.Tuple]]:
+    if isinstance(table_iter, TableIter):
+        # Slicing the rows of a table is much cheaper than going through its reader row by row
+        rows = table_iter.table.rows
+        for start in range(table_iter.index + 1, len(rows), size):
+            yield rows[start : start + size]
+        return
+
+    # Context.table_iter yields the readers along with their context
+    readers = (item[0] if isinstance(item, tuple) else item for item in table_iter)
+    while True:
+        batch = [reader.row for _, reader in zip(range(size), readers)]
+        if not batch:
+            return
+        yield batch
+
+
+def _layout(context: Context) -> t.Dict[t.Optional[str], t.Dict[str, int]]:
+    return {name: table.reader.columns for name, table in context.tables.items()}
+
+
+def execute(
+    sql: str | exp.Expression,
+    schema: t.Optional[t.Dict | Schema] = None,
+    read: DialectType = "snowflake",
+    tables: t.Optional[t.Dict] = None,
+    batch_size: int = BATCH_SIZE,
+) -> Table:
+    """
+    Runs a query against data with the `VectorizedExecutor`, as `sqlglot.executor.execute` does
+    with the row-at-a-time executor. Unquoted identifiers are normalized the way the dialect does,
+    e.g. upper-cased for Snowflake, so the names of the tables and their columns should follow it.
+
+    Args:
+        sql: a sql statement.
+        schema: database schema, in one of the forms `sqlglot.executor.execute` accepts.
+        read: the SQL dialect to apply during parsing.
+        tables: additional tables to register.
+        batch_size: the maximum number of rows evaluated at once.
+
+    Returns:
+        Simple columnar data structure.
+    """
+    tables_ = ensure_tables(tables)
+
+    if not schema:
+        schema = {}
+        flattened_tables = flatten_schema(tables_.mapping, depth=dict_depth(tables_.mapping))
+
+        for keys in flattened_tables:
+            table = nested_get(tables_.mapping, *zip(keys, keys))
+            assert table is not None
+
+            for column in table.columns:
+                nested_set(schema, [*keys, column], type(table[0][column]).__name__)
+
+    schema = ensure_schema(schema, dialect=read)
+
+    if tables_.supported_table_args and tables_.supported_table_args != schema.supported_table_args:
+        raise ExecuteError("Tables must support the same table args as schema")
+
+    now = time.time()
+    expression = optimize(sql, schema, leave_tables_isolated=True, dialect=read)
+    logger.debug("Optimization finished: %f", time.time() - now)
+
+    plan = Plan(expression)
+
+    now = time.time()
+    executor = VectorizedExecutor(tables=tables_, batch_size=batch_size, dialect=read)
+    result = executor.execute(plan)
+    logger.debug("Query finished: %f", time.time() - now)
+
+    return result
@@ -0,0 +1,140 @@
+import datetime
+
+import pytest
+
+from sqlglot.executor import execute as execute_rows
+from snowflake_bench import EXECUTOR_QUERIES, build_executor_tables
+from snowflake_executor import execute
+
+# The schema is inferred from the first row, so it can't hold any NULLs
+TABLES = {
+    "T": [
+        {"A": 3, "B": 0, "S": "Ab"},
+        {"A": 1, "B": None, "S": "x"},
+        {"A": None, "B": 2, "S": None},
+    ]
+}
+
+
+@pytest.mark.parametrize("query", EXECUTOR_QUERIES)
+@pytest.mark.parametrize("batch_size", [1, 7, 65536])
+def test_queries_match_the_row_executor(query, batch_size):
+    tables = build_executor_tables(rows=200)
+    sql = EXECUTOR_QUERIES[query]
+    assert execute(sql, tables=tables, batch_size=batch_size).rows == (
+        execute_rows(sql, read="snowflake", tables=tables).rows
+    )
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT a + b AS x, a * 2 AS y, a > b AS z FROM t",
+        "SELECT a IS NULL AS x, COALESCE(a, b, 7) AS y FROM t",
+        "SELECT a FROM t WHERE a > 1 OR b > 1",
+        "SELECT CASE WHEN a > 2 THEN 'big' WHEN b > 1 THEN 'b' ELSE 'other' END AS x FROM t",
+        # Functions that can't be evaluated over arrays fall back to the row-at-a-time code
+        "SELECT UPPER(s) AS x FROM t",
+    ],
+)
+def test_nulls_match_the_row_executor(sql):
+    assert (
+        execute(sql, tables=TABLES).rows == execute_rows(sql, read="snowflake", tables=TABLES).rows
+    )
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT a * b AS x, a + b AS y, a - b AS z, -a AS n, a % 7 AS m FROM t",
+        "SELECT a FROM t WHERE a * b > 1000000000000000000000000",
+        "SELECT a, b FROM t ORDER BY a * b",
+    ],
+)
+def test_integers_dont_overflow(sql):
+    tables = {
+        "T": [
+            {"A": 2**40, "B": 2**40},
+            {"A": -(2**63), "B": 1},
+            {"A": 2**62, "B": 2**62},
+            {"A": 3, "B": 4},
+        ]
+    }
+    assert (
+        execute(sql, tables=tables).rows == execute_rows(sql, read="snowflake", tables=tables).rows
+    )
+
+
+def test_three_valued_logic():
+    sql = "SELECT a > 1 AND b > 1 AS x, a > 1 OR b > 1 AS y, NOT a > 1 AS z FROM t"
+    assert execute(sql, tables=TABLES).rows == [
+        (False, True, False),
+        (False, None, True),
+        (None, True, None),
+    ]
+    assert execute("SELECT s FROM t WHERE NOT a > 1", tables=TABLES).rows == [("x",)]
+
+
+def test_conditionals_dont_evaluate_other_branches():
+    sql = "SELECT DIV0(a, b) AS d, ZEROIFNULL(b) AS z, NULLIFZERO(b) AS n FROM t"
+    assert execute(sql, tables=TABLES).rows == [(0, 0, None), (None, 0, None), (None, 2, 2)]
+
+
+def test_patterns():
+    sql = "SELECT s LIKE ANY ('x', 'A%') AS l, s ILIKE ANY ('a%') AS i, s RLIKE '[a-z]' AS r FROM t"
+    assert execute(sql, tables=TABLES).rows == [
+        (True, True, False),
+        (True, False, True),
+        (None, None, None),
+    ]
+
+
+def test_dates():
+    sql = (
+        "SELECT TO_TIMESTAMP(1500, 3) AS s, DATEADD(month, 1, TO_TIMESTAMP(0)) AS m, "
+        "DATEDIFF(year, TO_TIMESTAMP(86400 * 364), TO_TIMESTAMP(86400 * 366)) AS d FROM t LIMIT 1"
+    )
+    assert execute(sql, tables=TABLES).rows == [
+        (
+            datetime.datetime(1970, 1, 1, 0, 0, 1, 500000),
+            datetime.datetime(1970, 2, 1),
+            1,
+        )
+    ]
+
+
+@pytest.mark.parametrize(
+    "order, expected",
+    [
+        # Snowflake's NULLs are large: last in ascending sorts and first in descending ones
+        ("a", [1, 3, None]),
+        ("a DESC", [None, 3, 1]),
+        ("a NULLS FIRST", [None, 1, 3]),
+        ("a DESC NULLS LAST", [3, 1, None]),
+    ],
+)
+def test_nulls_are_large(order, expected):
+    rows = execute(f"SELECT a FROM t ORDER BY {order}", tables=TABLES).rows
+    assert [a for (a,) in rows] == expected
+
+
+@pytest.mark.parametrize(
+    "read, expected",
+    [("spark", ([None, 1, 3], [3, 1, None])), ("duckdb", ([1, 3, None], [3, 1, None]))],
+)
+def test_null_ordering_follows_the_dialect(read, expected):
+    tables = {"t": [{"a": 3}, {"a": None}, {"a": 1}]}
+    for order, values in zip(["a", "a DESC"], expected):
+        rows = execute(f"SELECT a FROM t ORDER BY {order}", read=read, tables=tables).rows
+        assert [a for (a,) in rows] == values
+
+
+def test_limits_span_batches():
+    tables = {"T": [{"A": i % 3 or None, "B": i} for i in range(1, 10)]}
+    assert execute("SELECT a, b FROM t WHERE b > 2 LIMIT 3", tables=tables, batch_size=2).rows == [
+        (None, 3),
+        (1, 4),
+        (2, 5),
+    ]
+    sql = "SELECT a, b FROM t ORDER BY a DESC NULLS LAST, b DESC LIMIT 4"
+    assert execute(sql, tables=tables, batch_size=2).rows == [(2, 8), (2, 5), (2, 2), (1, 7)]
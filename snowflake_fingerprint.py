@@ -0,0 +1,156 @@
+"""
+Literal-normalized fingerprints of Snowflake SQL.
+
+Two statements that only differ in their literal values share the same fingerprint, e.g.
+
+    >>> fingerprint("SELECT * FROM t WHERE x = 1 AND y = 'a'").text
+    "SELECT * FROM t WHERE x = ? AND y = '?'"
+    >>> fingerprint("select * from t where x = 2 and y = 'b'").text == fingerprint(
+    ...     "select * from t where x = 3 and y = 'c'"
+    ... ).text
+    True
+
+Literals whose value changes the way the Snowflake parser interprets a statement, such as the
+scale argument of `TO_TIMESTAMP`, are kept verbatim so that they result in distinct fingerprints.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import typing as t
+
+from sqlglot.dialects.dialect import Dialect, DialectType
+from sqlglot.tokens import Token, TokenType
+
+# Maps function names to the (0-based) positions of the arguments whose literal values need to
+# be preserved, because the parser or the generator inspects them.
+PRESERVED_LITERAL_ARGS: t.Dict[str, t.Set[int]] = {
+    "DATEADD": {0},
+    "DATEDIFF": {0},
+    "DATE_TRUNC": {0},
+    "TO_CHAR": {1},
+    "TO_DATE": {1},
+    "TO_TIMESTAMP": {1},
+    "TO_VARCHAR": {1},
+}
+
+# The literal that follows one of these tokens is always preserved, e.g. INTERVAL '1 day'
+PRESERVING_TOKENS = {TokenType.INTERVAL}
+
+LITERAL_TOKENS = {TokenType.NUMBER, TokenType.STRING}
+
+QUOTED_TOKEN_FORMATS = {
+    TokenType.BIT_STRING: "b'{}'",
+    TokenType.BYTE_STRING: "b'{}'",
+    TokenType.HEX_STRING: "x'{}'",
+    TokenType.IDENTIFIER: '"{}"',
+    TokenType.NATIONAL_STRING: "N'{}'",
+    TokenType.RAW_STRING: "r'{}'",
+    TokenType.STRING: "'{}'",
+}
+
+
+class Slot(t.NamedTuple):
+    """A literal that has been replaced by a placeholder in a fingerprint."""
+
+    kind: str
+    text: str
+    start: int
+    end: int
+
+
+class Fingerprint(t.NamedTuple):
+    """
+    The normalized shape of a SQL string.
+
+    Attributes:
+        text: the tokens of the SQL string, separated by single spaces, with every normalized
+            number replaced by `?`, every normalized string by `'?'` and every normalized
+            integer string by `'#'` (these are kept apart because `TO_TIMESTAMP` treats them
+            as epochs rather than dates).
+        slots: the literals that were normalized, in the order they appear in.
+        comments: all the comments in the SQL string.
+        sql: the original SQL string.
+    """
+
+    text: str
+    slots: t.Tuple[Slot, ...]
+    comments: t.Tuple[str, ...]
+    sql: str
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha1(self.text.encode()).hexdigest()
+
+
+def is_integer_string(text: str) -> bool:
+    return bool(text) and (text[1:] if text[0] in ("-", "+") else text).isdigit()
+
+
+def fingerprint(sql: str, dialect: DialectType = "snowflake") -> Fingerprint:
+    """
+    Computes the literal-normalized fingerprint of a SQL string.
+
+    Args:
+        sql: the SQL code string.
+        dialect: the dialect used to tokenize `sql`.
+
+    Returns:
+        The fingerprint of `sql`.
+    """
+    tokens = Dialect.get_or_raise(dialect)().tokenize(sql)
+
+    parts = []
+    slots = []
+    comments = []
+
+    # Each open parenthesis pushes the (upper-cased) text of the token before it, i.e. the name
+    # of the function being called, if any, along with the index of the current argument
+    calls: t.List[t.List] = []
+    previous: t.Optional[Token] = None
+
+    for token in tokens:
+        token_type = token.token_type
+        comments.extend(token.comments)
+
+        if token_type == TokenType.L_PAREN:
+            calls.append([previous.text.upper() if previous else "", 0])
+        elif token_type == TokenType.R_PAREN:
+            if calls:
+                calls.pop()
+        elif token_type == TokenType.COMMA:
+            if calls:
+                calls[-1][1] += 1
+
+        if token_type in LITERAL_TOKENS and not _is_preserved(previous, calls):
+            if token_type == TokenType.NUMBER:
+                kind, part = "number", "?"
+            elif is_integer_string(token.text):
+                kind, part = "integer_string", "'#'"
+            else:
+                kind, part = "string", "'?'"
+
+            slots.append(Slot(kind, token.text, token.start, token.end))
+        elif token_type == TokenType.PLACEHOLDER:
+            # Keeps bind parameters apart from normalized numbers
+            part = f":{token.text}"
+        elif token_type in QUOTED_TOKEN_FORMATS:
+            quoted = QUOTED_TOKEN_FORMATS[token_type]
+            part = quoted.format(token.text.replace(quoted[-1], quoted[-1] * 2))
+        else:
+            part = token.text
+
+        parts.append(part)
+        previous = token
+
+    return Fingerprint(" ".join(parts), tuple(slots), tuple(comments), sql)
+
+
+def _is_preserved(previous: t.Optional[Token], calls: t.List[t.List]) -> bool:
+    if previous and previous.token_type in PRESERVING_TOKENS:
+        return True
+    if not calls:
+        return False
+
+    name, index = calls[-1]
+    return index in PRESERVED_LITERAL_ARGS.get(name, ())
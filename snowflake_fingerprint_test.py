@@ -0,0 +1,67 @@
+import pytest
+
+from snowflake_fingerprint import Slot, fingerprint, is_integer_string
+
+
+def test_literals_are_normalized():
+    shape = fingerprint("SELECT * FROM t WHERE x = 1 AND y = 'a'")
+    assert shape.text == "SELECT * FROM t WHERE x = ? AND y = '?'"
+    assert shape.slots == (Slot("number", "1", 26, 26), Slot("string", "a", 36, 38))
+    assert shape.digest == fingerprint("SELECT * FROM t WHERE x = 22 AND y = 'bcd'").digest
+
+
+def test_slots_span_the_literals():
+    sql = "SELECT 'it''s', 12.5, '42' FROM t"
+    shape = fingerprint(sql)
+    assert [slot.kind for slot in shape.slots] == ["string", "number", "integer_string"]
+    assert [sql[slot.start : slot.end + 1] for slot in shape.slots] == ["'it''s'", "12.5", "'42'"]
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("SELECT TO_TIMESTAMP(a, 3)", "SELECT TO_TIMESTAMP(a, 9)"),
+        ("SELECT TO_TIMESTAMP('1', 'YYYY')", "SELECT TO_TIMESTAMP('1', 'DD')"),
+        ("SELECT DATEADD(day, 1, a)", "SELECT DATEADD(month, 1, a)"),
+        ("SELECT DATEADD('day', 1, a)", "SELECT DATEADD('month', 1, a)"),
+        ("SELECT a + INTERVAL '1 day'", "SELECT a + INTERVAL '2 days'"),
+        ("SELECT TO_TIMESTAMP('1')", "SELECT TO_TIMESTAMP('a')"),
+        ("SELECT 1", "SELECT :p"),
+        ('SELECT "a" FROM t', 'SELECT "A" FROM t'),
+        ("SELECT a FROM t", "SELECT b FROM t"),
+    ],
+)
+def test_semantic_differences_are_kept(a, b):
+    assert fingerprint(a).text != fingerprint(b).text
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("SELECT TO_TIMESTAMP(1, 3)", "SELECT TO_TIMESTAMP(2, 3)"),
+        ("SELECT DATEADD(day, 1, a)", "SELECT DATEADD(day, 5, a)"),
+        ("SELECT TO_TIMESTAMP('2020-01-01')", "SELECT TO_TIMESTAMP('2021-02-02')"),
+        ("SELECT x FROM t WHERE y IN (1, 2)", "SELECT x FROM t WHERE y IN (3, 4)"),
+        ("select 1 /* c */", "SELECT 2 /* d */"),
+    ],
+)
+def test_literal_differences_are_dropped(a, b):
+    assert fingerprint(a).text.upper() == fingerprint(b).text.upper()
+
+
+def test_comments_are_collected():
+    shape = fingerprint("SELECT 1 /* a */ -- b\nFROM t")
+    assert shape.comments == (" a ", " b")
+
+
+def test_quoted_identifiers_are_escaped():
+    assert fingerprint('SELECT "a""b"').text == 'SELECT "a""b"'
+
+
+def test_is_integer_string():
+    assert is_integer_string("42")
+    assert is_integer_string("-42")
+    assert is_integer_string("+0")
+    assert not is_integer_string("")
+    assert not is_integer_string("-")
+    assert not is_integer_string("4.2")
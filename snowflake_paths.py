@@ -0,0 +1,417 @@
+"""
+Extraction and indexing of the semi-structured paths that queries read.
+
+The Snowflake parser represents path accesses like `payload:user.id` or `src:items[0].price` as
+`VariantPath` nodes. `extract_paths` collects them from a statement in a single pass over its
+syntax tree, along with plain subscripts of columns such as `arr[0]`, and resolves each one to a
+`(table, column, path)` triple. Identifiers are normalized the way Snowflake resolves them, i.e.
+unquoted names are upper-cased, while path keys are case-sensitive and kept as is.
+
+A `PathIndex` maps such triples to the queries that contain them. It's built once from a query
+corpus, possibly across worker processes, and can be saved to a file and loaded back, so finding
+the queries that read a given path is a lookup instead of parsing the whole corpus again.
+
+Example:
+    >>> accesses = extract_paths("SELECT e.payload:user.id FROM events AS e WHERE payload:type = 1")
+    >>> accesses[0]
+    PathAccess(table='EVENTS', column='PAYLOAD', path='user.id')
+    >>> [access.path for access in accesses]
+    ['user.id', 'type']
+    >>> index = PathIndex()
+    >>> index.add_many(
+    ...     [
+    ...         "SELECT payload:user.id FROM events",
+    ...         "SELECT payload:items[0].sku, payload:user.id FROM events",
+    ...         "SELECT data:user.id FROM logs",
+    ...     ]
+    ... )
+    >>> index.lookup("events.payload:user.id")
+    [0, 1]
+    >>> index.lookup("payload:items", prefix=True)
+    [1]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import typing as t
+from array import array
+from collections import deque
+from concurrent.futures import Executor
+from functools import lru_cache
+
+from sqlglot import exp
+from sqlglot.dialects.dialect import Dialect, DialectType
+from sqlglot.dialects.snowflake import TOKENIZE_ERRORS, VariantPath
+from sqlglot.errors import ParseError
+
+DEFAULT_CHUNK_SIZE = 256
+
+INDEX_MAGIC = b"SFPATHX1"
+
+_HEADER = struct.Struct("<8sQ")  # magic, size of the JSON header
+
+PARSE_ERRORS = (ParseError, *TOKENIZE_ERRORS)
+
+
+class PathAccess(t.NamedTuple):
+    """
+    A path read from a semi-structured column.
+
+    Attributes:
+        table: the name of the table the column belongs to, or the alias of the derived table or
+            table function it comes from. It's `None` if it can't be told without a schema.
+        column: the name of the column.
+        path: the path, e.g. `items[0].price`. See `VariantPath.format_path`.
+    """
+
+    table: t.Optional[str]
+    column: str
+    path: str
+
+
+def extract_paths(
+    sql: str | exp.Expression, dialect: DialectType = "snowflake"
+) -> t.List[PathAccess]:
+    """
+    Collects the semi-structured paths read by one or more statements.
+
+    Args:
+        sql: the statements, or the syntax tree of one of them.
+        dialect: the dialect of the statements.
+
+    Returns:
+        The distinct paths, in the order they first appear in.
+    """
+    if isinstance(sql, exp.Expression):
+        expressions: t.List[t.Optional[exp.Expression]] = [sql]
+    else:
+        expressions = Dialect.get_or_raise(dialect)().parse(sql)
+
+    accesses: t.Dict[PathAccess, None] = {}
+    for expression in expressions:
+        if expression is None:
+            continue
+
+        sources: t.Dict[int, t.Dict[str, str]] = {}
+        for node in expression.find_all(exp.Bracket, bfs=False):
+            access = _access(node, sources)
+            if access:
+                accesses[access] = None
+
+    return list(accesses)
+
+
+def _access(node: exp.Bracket, sources: t.Dict[int, t.Dict[str, str]]) -> t.Optional[PathAccess]:
+    # Only the outermost node of a path describes all of it
+    parent = node.parent
+    if isinstance(parent, exp.Bracket) and node.arg_key == "this":
+        return None
+
+    steps = []
+    root: exp.Expression = node
+    while isinstance(root, exp.Bracket) and len(root.expressions) == 1:
+        steps.append(root.expressions[0])
+        root = root.this
+    if not isinstance(root, exp.Column) or not isinstance(root.this, exp.Identifier) or not steps:
+        return None
+
+    steps.reverse()
+    return PathAccess(_table(root, sources), _name(root.this), VariantPath.format_path(steps))
+
+
+def _table(column: exp.Column, sources: t.Dict[int, t.Dict[str, str]]) -> t.Optional[str]:
+    scope = column.find_ancestor(exp.Select, exp.Update, exp.Delete)
+    if scope is None:
+        return _qualified_name(column, "table") if column.table else None
+
+    names = sources.get(id(scope))
+    if names is None:
+        names = sources[id(scope)] = _sources(scope)
+
+    if column.table:
+        qualifier = _name(column.args["table"])
+        return names.get(qualifier, qualifier)
+    if len(names) == 1:
+        return next(iter(names.values()))
+    return None
+
+
+def _sources(scope: exp.Expression) -> t.Dict[str, str]:
+    """Maps the aliases of the sources of a statement to the names of the tables they refer to."""
+    from_ = scope.args.get("from")
+    candidates = [from_.this] if from_ else []
+    if isinstance(scope, (exp.Update, exp.Delete)):
+        candidates.append(scope.this)
+    candidates.extend(join.this for join in scope.args.get("joins") or [])
+
+    names = {}
+    for source in candidates:
+        alias = source.args.get("alias")
+        alias_name = _name(alias.this) if alias and alias.this else None
+
+        if isinstance(source, exp.Table):
+            names[alias_name or _name(source.this)] = _qualified_name(source, "this")
+        elif alias_name:
+            names[alias_name] = alias_name
+
+    return names
+
+
+def _qualified_name(node: exp.Expression, key: str) -> str:
+    """Joins the normalized catalog, db and `key` parts of a table or column, e.g. `DB.EVENTS`."""
+    parts = [node.args.get(part) for part in ("catalog", "db", key)]
+    return ".".join(_name(part) for part in parts if part)
+
+
+def _name(identifier: exp.Expression) -> str:
+    if isinstance(identifier, exp.Identifier) and identifier.quoted:
+        return identifier.name
+    return identifier.name.upper()
+
+
+@lru_cache(maxsize=4096)
+def _extract_text(sql: str, dialect: t.Type[Dialect]) -> t.Optional[t.Tuple[PathAccess, ...]]:
+    # Query logs tend to repeat the same texts, which are only parsed once, and queries without
+    # any colon or subscript can't read a path, so they aren't parsed at all
+    if ":" not in sql and "[" not in sql:
+        return ()
+    try:
+        return tuple(extract_paths(sql, dialect))
+    except PARSE_ERRORS:
+        return None
+
+
+def _extract_chunk(
+    chunk: t.List[str], dialect: t.Type[Dialect]
+) -> t.List[t.Optional[t.Tuple[PathAccess, ...]]]:
+    return [_extract_text(sql, dialect) for sql in chunk]
+
+
+class PathIndex:
+    """
+    An inverted index from the semi-structured paths read by a corpus of queries to the queries
+    that read them.
+
+    Queries are numbered in the order they're added and can be given ids of their own, which are
+    what lookups return. Queries that can't be parsed are counted in `errors` and don't read any
+    path, although queries that can't possibly read one, i.e. that have neither colons nor
+    subscripts, are skipped without being parsed.
+
+    Args:
+        dialect: the dialect of the queries.
+    """
+
+    def __init__(self, dialect: DialectType = "snowflake") -> None:
+        self.dialect = Dialect.get_or_raise(dialect)
+        self.ids: t.List[t.Any] = []
+        self.errors = 0
+        # The numbers of the queries that read each path, by column, table and path
+        self._postings: t.Dict[str, t.Dict[t.Optional[str], t.Dict[str, array]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, sql: str, query_id: t.Any = None) -> int:
+        """
+        Indexes a query.
+
+        Args:
+            sql: the query, which may consist of several statements.
+            query_id: the id of the query. Defaults to its number.
+
+        Returns:
+            The number of the query.
+        """
+        return self._add(query_id, _extract_text(sql, self.dialect))
+
+    def add_many(
+        self,
+        queries: t.Iterable[str | t.Tuple[t.Any, str]],
+        workers: int = 1,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> None:
+        """
+        Indexes a corpus of queries.
+
+        Args:
+            queries: the queries, or pairs of query ids and queries.
+            workers: the number of processes that parse the queries.
+            chunk_size: the number of queries sent to a worker at once.
+        """
+        pairs = ((None, q) if isinstance(q, str) else q for q in queries)
+
+        if workers <= 1:
+            for query_id, sql in pairs:
+                self.add(sql, query_id)
+            return
+
+        # Only parallel indexing needs worker processes
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunks = _chunked(pairs, chunk_size)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for ids, results in _map_chunks(pool, chunks, self.dialect, workers):
+                for query_id, accesses in zip(ids, results):
+                    self._add(query_id, accesses)
+
+    def lookup(self, access: str | PathAccess, prefix: bool = False) -> t.List[t.Any]:
+        """
+        Finds the queries that read a path.
+
+        Args:
+            access: the path, either as a `PathAccess` or as SQL, e.g. `payload:user.id` or
+                `events.payload:user.id`. If no table is given, paths of any table match.
+            prefix: whether paths that extend the given one also match, e.g. `user.id` for
+                `user`.
+
+        Returns:
+            The ids of the matching queries, in the order they were added.
+        """
+        if not isinstance(access, PathAccess):
+            accesses = extract_paths(exp.maybe_parse(access, dialect=self.dialect))
+            if len(accesses) != 1:
+                raise ValueError(f"Expected a single path, got '{access}'")
+            access = accesses[0]
+
+        matches: t.Set[int] = set()
+        for table, paths in self._postings.get(access.column, {}).items():
+            if access.table not in (None, table):
+                continue
+            if not prefix:
+                matches.update(paths.get(access.path, ()))
+                continue
+            for path, numbers in paths.items():
+                if path == access.path or path.startswith((f"{access.path}.", f"{access.path}[")):
+                    matches.update(numbers)
+
+        return [self.ids[number] for number in sorted(matches)]
+
+    def paths(self) -> t.Dict[PathAccess, int]:
+        """Returns the number of queries that read each of the indexed paths."""
+        return {access: len(numbers) for access, numbers in self._entries()}
+
+    def save(self, path: str) -> None:
+        """
+        Writes the index to a file, to be read with `load`. The query ids must be serializable
+        to JSON. The file is written next to `path` first and then moved into place.
+
+        Args:
+            path: the path of the file.
+        """
+        keys = []
+        postings = array("I")
+        for (table, column, access_path), numbers in self._entries():
+            keys.append([table, column, access_path, len(numbers)])
+            postings.extend(numbers)
+
+        if postings.itemsize != 4:
+            raise ValueError("Unsupported platform: 32-bit unsigned integers are required")
+        if struct.pack("=H", 1) != struct.pack("<H", 1):
+            postings.byteswap()
+
+        header = json.dumps(
+            {
+                "dialect": self.dialect.__name__.lower(),
+                "ids": self.ids,
+                "errors": self.errors,
+                "keys": keys,
+            }
+        ).encode()
+
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(_HEADER.pack(INDEX_MAGIC, len(header)))
+            file.write(header)
+            file.write(postings.tobytes())
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> PathIndex:
+        """Reads an index written by `save`."""
+        with open(path, "rb") as file:
+            data = file.read()
+
+        magic, size = _HEADER.unpack_from(data, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"{path} is not a path index file")
+
+        offset = _HEADER.size + size
+        header = json.loads(data[_HEADER.size : offset])
+        postings = array("I")
+        postings.frombytes(data[offset:])
+        if struct.pack("=H", 1) != struct.pack("<H", 1):
+            postings.byteswap()
+
+        index = cls(header["dialect"])
+        index.ids = header["ids"]
+        index.errors = header["errors"]
+
+        start = 0
+        for table, column, access_path, count in header["keys"]:
+            paths = index._postings.setdefault(column, {}).setdefault(table, {})
+            paths[access_path] = postings[start : start + count]
+            start += count
+
+        return index
+
+    def _add(self, query_id: t.Any, accesses: t.Optional[t.Tuple[PathAccess, ...]]) -> int:
+        number = len(self.ids)
+        self.ids.append(number if query_id is None else query_id)
+
+        if accesses is None:
+            self.errors += 1
+            return number
+
+        for table, column, path in accesses:
+            paths = self._postings.setdefault(column, {}).setdefault(table, {})
+            numbers = paths.get(path)
+            if numbers is None:
+                numbers = paths[path] = array("I")
+            numbers.append(number)
+
+        return number
+
+    def _entries(self) -> t.Iterator[t.Tuple[PathAccess, array]]:
+        for column, tables in self._postings.items():
+            for table, paths in tables.items():
+                for path, numbers in paths.items():
+                    yield PathAccess(table, column, path), numbers
+
+    def __repr__(self) -> str:
+        return f"PathIndex(queries={len(self.ids)}, paths={sum(1 for _ in self._entries())})"
+
+
+def _chunked(
+    pairs: t.Iterable[t.Tuple[t.Any, str]], size: int
+) -> t.Iterator[t.Tuple[t.List[t.Any], t.List[str]]]:
+    ids: t.List[t.Any] = []
+    texts: t.List[str] = []
+    for query_id, sql in pairs:
+        ids.append(query_id)
+        texts.append(sql)
+        if len(texts) >= size:
+            yield ids, texts
+            ids, texts = [], []
+    if texts:
+        yield ids, texts
+
+
+def _map_chunks(
+    pool: Executor,
+    chunks: t.Iterator[t.Tuple[t.List[t.Any], t.List[str]]],
+    dialect: t.Type[Dialect],
+    workers: int,
+) -> t.Iterator[t.Tuple[t.List[t.Any], t.List[t.Optional[t.Tuple[PathAccess, ...]]]]]:
+    # A bounded number of chunks is in flight, so that the corpus is never held in memory at once
+    pending: t.Deque[t.Tuple[t.List[t.Any], t.Any]] = deque()
+    for ids, texts in chunks:
+        pending.append((ids, pool.submit(_extract_chunk, texts, dialect)))
+        if len(pending) >= 2 * workers:
+            ids, future = pending.popleft()
+            yield ids, future.result()
+
+    for ids, future in pending:
+        yield ids, future.result()
@@ -0,0 +1,143 @@
+import pytest
+
+from sqlglot import parse_one
+from sqlglot.dialects.snowflake import VariantPath
+from sqlglot.errors import ParseError
+from snowflake_paths import INDEX_MAGIC, PathAccess, PathIndex, extract_paths
+
+CORPUS = [
+    "SELECT payload:user.id FROM events",
+    "SELECT e.payload:items[0].sku, e.payload:user.id FROM db.events AS e",
+    "SELECT data:user.id FROM logs",
+    "SELECT v:a FROM (",
+    "SELECT 1",
+    "SELECT arr[1] FROM logs",
+]
+
+
+@pytest.mark.parametrize(
+    "sql, root, path",
+    [
+        ("SELECT src:items[0].price FROM t", "src", "items[0].price"),
+        ('SELECT src:"my key"[i].Price FROM t', "src", '"my key"[*].Price'),
+        ("SELECT v:a::INT FROM t", "v", "a"),
+        ("SELECT v:type.user.first FROM t", "v", "type.user.first"),
+        ('SELECT v:a."b c" FROM t', "v", 'a."b c"'),
+    ],
+)
+def test_variant_path_round_trip(sql, root, path):
+    expression = parse_one(sql, read="snowflake")
+    node = expression.find(VariantPath)
+    assert (node.root.sql(), node.path) == (root, path)
+    assert parse_one(expression.sql("snowflake"), read="snowflake") == expression
+
+
+@pytest.mark.parametrize(
+    "sql", ["SELECT a:b.", "SELECT a:b. FROM t", "SELECT a:b.c.*", "SELECT a:b.1 FROM t"]
+)
+def test_dots_must_be_followed_by_a_key(sql):
+    with pytest.raises(ParseError):
+        parse_one(sql, read="snowflake")
+
+    index = PathIndex()
+    index.add(sql)
+    assert (len(index), index.errors) == (1, 1)
+
+
+def test_variant_paths_are_subscripts_elsewhere():
+    expression = parse_one("SELECT src:items[0].price FROM t", read="snowflake")
+    assert expression.sql("duckdb") == "SELECT src['items'][0]['price'] FROM t"
+
+
+def test_extract_paths():
+    sql = (
+        "SELECT x.v:a FROM (SELECT v FROM t) AS x; "
+        "UPDATE t SET a = 1 WHERE v:b = 2; "
+        "SELECT o.v:c, o.arr[0] FROM a JOIN b AS o ON 1 = 1; "
+        "SELECT v:d FROM a JOIN b ON 1 = 1"
+    )
+    assert extract_paths(sql) == [
+        PathAccess("X", "V", "a"),
+        PathAccess("T", "V", "b"),
+        PathAccess("B", "V", "c"),
+        PathAccess("B", "ARR", "[0]"),
+        PathAccess(None, "V", "d"),
+    ]
+
+
+def test_qualified_tables():
+    assert extract_paths("SELECT e.payload:a FROM db.events AS e") == [
+        PathAccess("DB.EVENTS", "PAYLOAD", "a")
+    ]
+    assert extract_paths(parse_one("cat.db.events.payload:a", read="snowflake")) == [
+        PathAccess("CAT.DB.EVENTS", "PAYLOAD", "a")
+    ]
+
+    index = PathIndex()
+    index.add("SELECT e.payload:a FROM db.events e")
+    index.add("SELECT payload:a FROM events")
+    assert index.lookup("db.events.payload:a") == [0]
+    assert index.lookup("events.payload:a") == [1]
+    assert index.lookup("payload:a") == [0, 1]
+
+
+def test_lookup():
+    index = PathIndex()
+    index.add_many(CORPUS)
+    assert (len(index), index.errors) == (6, 1)
+    assert index.lookup("payload:user.id") == [0, 1]
+    assert index.lookup("events.payload:user.id") == [0]
+    assert index.lookup("db.events.payload:user.id") == [1]
+    assert index.lookup("payload:user") == []
+    assert index.lookup("payload:user", prefix=True) == [0, 1]
+    assert index.lookup("payload:items", prefix=True) == [1]
+    assert index.lookup("payload:item", prefix=True) == []
+    assert index.lookup("arr[1]") == [5]
+    assert index.lookup(PathAccess(None, "DATA", "user.id")) == [2]
+
+    with pytest.raises(ValueError):
+        index.lookup("SELECT a:b, c:d FROM t")
+
+
+def test_query_ids():
+    index = PathIndex()
+    index.add_many([("a", CORPUS[0]), ("b", CORPUS[2])])
+    assert index.add(CORPUS[1], "c") == 2
+    assert index.lookup("payload:user.id") == ["a", "c"]
+
+
+def test_workers():
+    single = PathIndex()
+    single.add_many(CORPUS * 10)
+    parallel = PathIndex()
+    parallel.add_many(CORPUS * 10, workers=2, chunk_size=4)
+    assert parallel.paths() == single.paths()
+    assert (parallel.ids, parallel.errors) == (single.ids, single.errors)
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "paths.idx")
+    index = PathIndex()
+    index.add_many((f"q{i}", sql) for i, sql in enumerate(CORPUS * 3))
+    index.save(path)
+
+    loaded = PathIndex.load(path)
+    assert loaded.dialect is index.dialect
+    assert (loaded.ids, loaded.errors) == (index.ids, index.errors)
+    assert loaded.paths() == index.paths()
+    assert repr(loaded) == repr(index)
+    for access in index.paths():
+        assert loaded.lookup(access) == index.lookup(access)
+    assert loaded.lookup("payload:user", prefix=True) == ["q0", "q1", "q6", "q7", "q12", "q13"]
+
+    # The loaded index can still be added to
+    loaded.add(CORPUS[0])
+    assert loaded.lookup("events.payload:user.id") == ["q0", "q6", "q12", 18]
+    assert list(tmp_path.iterdir()) == [tmp_path / "paths.idx"]
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "other.idx"
+    path.write_bytes(INDEX_MAGIC[::-1] + bytes(8))
+    with pytest.raises(ValueError):
+        PathIndex.load(str(path))
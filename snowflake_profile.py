@@ -0,0 +1,259 @@
+"""
+Opt-in profiling of the Snowflake dialect.
+
+While a `Profiler` is enabled, the dialect's tokenizer, parser and generator entry points, as
+well as the handlers in its parser and generator tables (e.g. `FUNCTIONS["TO_TIMESTAMP"]`,
+`FUNCTION_PARSERS["DATE_PART"]`, `COLUMN_OPERATORS[TokenType.COLON]` or
+`TRANSFORMS[exp.ToChar]`), are swapped for timed wrappers. The original objects are put back
+when it's disabled, so profiling costs nothing at all unless it's turned on.
+
+Example:
+    >>> from sqlglot import transpile
+    >>> sql = "SELECT TO_TIMESTAMP(1) EXCEPT ALL SELECT 2"
+    >>> with Profiler() as profiler:
+    ...     _ = transpile(sql, read="snowflake", write="snowflake")
+    >>> profiler.phases["parse"].calls
+    1
+    >>> profiler.handlers["parser.FUNCTIONS.TO_TIMESTAMP"].calls
+    1
+    >>> profiler.unsupported["except_op"]
+    1
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+import typing as t
+from collections import Counter
+
+from sqlglot.dialects.dialect import Dialect, DialectType
+
+# The handler tables that are instrumented, by the dialect attribute of the class they belong to
+HANDLER_TABLES: t.Tuple[t.Tuple[str, str], ...] = (
+    ("parser_class", "FUNCTIONS"),
+    ("parser_class", "FUNCTION_PARSERS"),
+    ("parser_class", "COLUMN_OPERATORS"),
+    ("parser_class", "RANGE_PARSERS"),
+    ("parser_class", "STATEMENT_PARSERS"),
+    ("generator_class", "TRANSFORMS"),
+)
+
+# Maps phase names to the methods that implement them
+PHASES: t.Tuple[t.Tuple[str, str, str], ...] = (
+    ("tokenize", "tokenizer_class", "tokenize"),
+    ("parse", "parser_class", "parse"),
+    ("parse", "parser_class", "parse_into"),
+    ("generate", "generator_class", "generate"),
+)
+
+_MISSING = object()
+
+# The dialect classes that are currently being profiled
+_active: t.Dict[t.Type[Dialect], Profiler] = {}
+
+
+class Timing:
+    """The number of calls made to a phase or a handler and the total time spent in them."""
+
+    __slots__ = ("calls", "seconds")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+
+    def __repr__(self) -> str:
+        return f"Timing(calls={self.calls}, seconds={self.seconds:.6f})"
+
+
+class Profiler:
+    """
+    Records wall time per phase, call counts and cumulative (inclusive) time per handler, as
+    well as the number of `Generator.unsupported` calls, keyed by the method that made them.
+
+    Only one profiler can be enabled for a given dialect at a time. Enabling a profiler changes
+    the dialect's parser tables, so it also invalidates the caches in `snowflake_cache`.
+
+    Args:
+        dialect: the dialect to profile.
+    """
+
+    def __init__(self, dialect: DialectType = "snowflake") -> None:
+        self.dialect = Dialect.get_or_raise(dialect)
+        self.phases: t.Dict[str, Timing] = {}
+        self.handlers: t.Dict[str, Timing] = {}
+        self.unsupported: t.Counter[str] = Counter()
+        self._patches: t.List[t.Tuple[t.Any, str, t.Any]] = []
+
+    @property
+    def enabled(self) -> bool:
+        return _active.get(self.dialect) is self
+
+    def __enter__(self) -> Profiler:
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info: t.Any) -> None:
+        self.disable()
+
+    def enable(self) -> None:
+        """Installs the instrumentation."""
+        if self.enabled:
+            return
+        if self.dialect in _active:
+            raise RuntimeError(f"{self.dialect.__name__} is already being profiled")
+
+        _active[self.dialect] = self
+
+        for phase, attribute, method in PHASES:
+            owner = getattr(self.dialect, attribute)
+            if hasattr(owner, method):
+                timing = self.phases.setdefault(phase, Timing())
+                self._patch(owner, method, _timed(getattr(owner, method), timing))
+
+        for attribute, name in HANDLER_TABLES:
+            owner = getattr(self.dialect, attribute)
+            prefix = f"{attribute[: -len('_class')]}.{name}"
+            table = {}
+
+            for key, handler in getattr(owner, name).items():
+                if callable(handler):
+                    timing = self.handlers.setdefault(f"{prefix}.{_key_name(key)}", Timing())
+                    handler = _timed(handler, timing)
+                table[key] = handler
+
+            self._patch(owner, name, table)
+
+        generator_class = self.dialect.generator_class
+        unsupported = generator_class.unsupported
+        counter = self.unsupported
+
+        def counted(generator: t.Any, message: str) -> None:
+            counter[sys._getframe(1).f_code.co_name] += 1
+            unsupported(generator, message)
+
+        self._patch(generator_class, "unsupported", counted)
+
+    def disable(self) -> None:
+        """Removes the instrumentation, restoring the dialect's original methods and tables."""
+        if not self.enabled:
+            return
+
+        for owner, name, original in reversed(self._patches):
+            if original is _MISSING:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+
+        self._patches = []
+        del _active[self.dialect]
+
+    def reset(self) -> None:
+        """Clears the recorded statistics."""
+        for timing in (*self.phases.values(), *self.handlers.values()):
+            timing.calls = 0
+            timing.seconds = 0.0
+        self.unsupported.clear()
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        """
+        Returns the recorded statistics. Handlers that were never called are left out.
+
+        Returns:
+            A dict with "phases" and "handlers" entries, mapping names to dicts of "calls" and
+            "seconds", and an "unsupported" entry that maps method names to counts.
+        """
+        return {
+            "phases": _timings_dict(self.phases),
+            "handlers": _timings_dict(self.handlers),
+            "unsupported": dict(self.unsupported),
+        }
+
+    def to_prometheus(self, prefix: str = "sqlglot") -> str:
+        """
+        Returns the recorded statistics in the Prometheus text exposition format.
+
+        Args:
+            prefix: the prefix of the metric names.
+
+        Returns:
+            The metrics, labeled with the name of the dialect.
+        """
+        dialect = _escape_label(self.dialect.__name__.lower())
+        lines = []
+
+        def family(name: str, help: str, samples: t.Iterable[t.Tuple[str, str, float]]) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for label, value, sample in samples:
+                lines.append(
+                    f'{prefix}_{name}{{dialect="{dialect}",{label}="{_escape_label(value)}"}} '
+                    f"{sample!r}"
+                )
+
+        phases = [(name, timing) for name, timing in self.phases.items() if timing.calls]
+        handlers = [(name, timing) for name, timing in self.handlers.items() if timing.calls]
+
+        family(
+            "phase_calls_total",
+            "Number of calls per phase.",
+            (("phase", name, timing.calls) for name, timing in phases),
+        )
+        family(
+            "phase_seconds_total",
+            "Wall time spent per phase.",
+            (("phase", name, timing.seconds) for name, timing in phases),
+        )
+        family(
+            "handler_calls_total",
+            "Number of calls per handler.",
+            (("handler", name, timing.calls) for name, timing in handlers),
+        )
+        family(
+            "handler_seconds_total",
+            "Cumulative wall time spent per handler, including nested calls.",
+            (("handler", name, timing.seconds) for name, timing in handlers),
+        )
+        family(
+            "unsupported_total",
+            "Number of unsupported() calls per calling method.",
+            (("method", name, count) for name, count in self.unsupported.items()),
+        )
+
+        return "\n".join(lines) + "\n"
+
+    def _patch(self, owner: t.Any, name: str, value: t.Any) -> None:
+        self._patches.append((owner, name, owner.__dict__.get(name, _MISSING)))
+        setattr(owner, name, value)
+
+
+def _timed(function: t.Callable, timing: Timing) -> t.Callable:
+    perf_counter = time.perf_counter
+
+    def wrapper(*args: t.Any, **kwargs: t.Any) -> t.Any:
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            timing.calls += 1
+            timing.seconds += perf_counter() - start
+
+    return wrapper
+
+
+def _key_name(key: t.Any) -> str:
+    if isinstance(key, type):
+        return key.__name__
+    return getattr(key, "name", None) or str(key)
+
+
+def _timings_dict(timings: t.Dict[str, Timing]) -> t.Dict[str, t.Dict[str, t.Any]]:
+    return {
+        name: {"calls": timing.calls, "seconds": timing.seconds}
+        for name, timing in timings.items()
+        if timing.calls
+    }
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,102 @@
+import pytest
+
+from sqlglot import transpile
+from sqlglot.dialects.snowflake import Snowflake
+from snowflake_cache import ParseCache
+from snowflake_profile import HANDLER_TABLES, PHASES, Profiler
+
+SQL = "SELECT TO_TIMESTAMP(1), DATE_PART(year, a) FROM t EXCEPT ALL SELECT 1, 2"
+
+
+def _state(dialect=Snowflake):
+    owners = {getattr(dialect, attribute) for attribute, *_ in (*PHASES, *HANDLER_TABLES)}
+    return {owner: dict(vars(owner)) for owner in owners}
+
+
+def test_disable_restores_the_dialect():
+    before = _state()
+    profiler = Profiler()
+
+    with profiler:
+        assert profiler.enabled
+        assert _state() != before
+        transpile(SQL, read="snowflake")
+
+    assert not profiler.enabled
+    after = _state()
+    assert after.keys() == before.keys()
+    for owner, attributes in before.items():
+        assert after[owner].keys() == attributes.keys(), owner
+        assert all(after[owner][name] is value for name, value in attributes.items()), owner
+
+
+def test_disable_restores_on_errors():
+    before = _state()
+    with pytest.raises(ValueError):
+        with Profiler():
+            transpile("SELECT TO_TIMESTAMP(1, 5)", read="snowflake")
+    assert _state() == before
+
+
+def test_only_one_profiler_per_dialect():
+    with Profiler() as profiler:
+        with pytest.raises(RuntimeError):
+            Profiler().enable()
+
+        # Enabling the same profiler again is a no-op
+        profiler.enable()
+        transpile("SELECT 1", read="snowflake")
+        assert profiler.phases["parse"].calls == 1
+
+    profiler.disable()
+    with Profiler():
+        pass
+
+
+def test_statistics():
+    with Profiler() as profiler:
+        transpile(SQL, read="snowflake")
+        transpile(SQL, read="snowflake")
+
+    stats = profiler.to_dict()
+    assert stats["phases"]["tokenize"]["calls"] == 2
+    assert stats["phases"]["generate"]["calls"] == 2
+    assert stats["handlers"]["parser.FUNCTIONS.TO_TIMESTAMP"]["calls"] == 2
+    assert stats["handlers"]["parser.FUNCTION_PARSERS.DATE_PART"]["calls"] == 2
+    assert stats["unsupported"] == {"except_op": 2}
+    assert all(timing["seconds"] >= 0 for timing in stats["handlers"].values())
+    assert "parser.FUNCTIONS.ABS" not in stats["handlers"]
+
+    # Statistics aren't recorded while the profiler is disabled
+    transpile(SQL, read="snowflake")
+    assert profiler.to_dict() == stats
+
+    profiler.reset()
+    assert profiler.to_dict() == {"phases": {}, "handlers": {}, "unsupported": {}}
+
+
+def test_prometheus_export():
+    with Profiler() as profiler:
+        transpile(SQL, read="snowflake")
+
+    lines = profiler.to_prometheus(prefix="test").splitlines()
+    assert "# TYPE test_phase_calls_total counter" in lines
+    assert 'test_phase_calls_total{dialect="snowflake",phase="parse"} 1' in lines
+    assert (
+        'test_handler_calls_total{dialect="snowflake",handler="parser.FUNCTIONS.TO_TIMESTAMP"} 1'
+        in lines
+    )
+    assert 'test_unsupported_total{dialect="snowflake",method="except_op"} 1' in lines
+
+
+def test_profiling_invalidates_caches():
+    cache = ParseCache()
+    cache.parse(SQL)
+
+    with Profiler() as profiler:
+        cache.parse(SQL)
+        assert profiler.phases["parse"].calls == 1
+
+    cache.parse(SQL)
+    assert cache.info().invalidations == 2
+    assert cache.info().misses == 3
@@ -0,0 +1,641 @@
+"""
+An asyncio-facing service that transpiles SQL in a bounded pool of workers.
+
+Tokenizing, parsing and generating SQL is CPU-bound, so doing it in a coroutine blocks the event
+loop for as long as the statement takes. A `TranspileService` offloads that work to a process
+(or thread) pool instead, where every worker keeps a warm copy of the dialects it has used.
+
+Identical requests that are in flight at the same time share a single job. The number of jobs
+that are submitted to the pool is bounded, so callers wait for a free slot when the pool is
+saturated, and requests can be given a timeout. Queueing, per-phase and end-to-end latencies are
+recorded in histograms.
+
+Example:
+    >>> import asyncio
+    >>> async def main():
+    ...     async with TranspileService(workers=1, executor="thread") as service:
+    ...         return await asyncio.gather(
+    ...             service.transpile("SELECT IFF(a, 1, 2)", write="duckdb"),
+    ...             service.transpile("SELECT IFF(a, 1, 2)", write="duckdb"),
+    ...         )
+    >>> asyncio.run(main())
+    [['SELECT CASE WHEN a THEN 1 ELSE 2 END'], ['SELECT CASE WHEN a THEN 1 ELSE 2 END']]
+
+It can also be run as a local server, which reads JSON requests such as
+`{"id": 1, "sql": "SELECT 1", "write": "duckdb"}` from stdin, one per line, or over HTTP:
+
+    python snowflake_service.py --stdio
+    python snowflake_service.py --http --port 8080
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import typing as t
+from bisect import bisect_left
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+from sqlglot.dialects.dialect import Dialect, DialectType
+from sqlglot.errors import ErrorLevel
+
+# Upper bounds of the latency histograms' buckets, in seconds
+LATENCY_BUCKETS: t.Tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# The phases that are timed by the workers
+PHASES = ("tokenize", "parse", "generate")
+
+# The largest request body accepted by the HTTP server, in bytes
+MAX_BODY_SIZE = 16 << 20
+
+# Per-worker state: the dialects that were used so far, one set per worker thread
+_local = threading.local()
+
+
+class Histogram:
+    """A histogram of latencies, with fixed buckets in the style of Prometheus."""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: t.Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile of the observed latencies.
+
+        Args:
+            q: the quantile, between 0 and 1.
+
+        Returns:
+            The upper bound of the bucket that contains the quantile, which is infinite if it's
+            the overflow bucket, or 0 if nothing was observed.
+        """
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        """Returns the number and sum of observations and the cumulative bucket counts."""
+        buckets = {}
+        seen = 0
+        for bound, count in zip((*self.bounds, float("inf")), self.counts):
+            seen += count
+            buckets[_format_bound(bound)] = seen
+        return {"count": self.count, "sum": self.sum, "buckets": buckets}
+
+    def __repr__(self) -> str:
+        return f"Histogram(count={self.count}, sum={self.sum:.6f})"
+
+
+class _Job:
+    __slots__ = ("future", "waiters", "started")
+
+    def __init__(self) -> None:
+        self.future: t.Optional[asyncio.Future] = None
+        self.waiters = 0
+        self.started = False
+
+
+class TranspileService:
+    """
+    Transpiles SQL without blocking the event loop.
+
+    The pool is started by `start`, or by the first request, and must be shut down with `close`;
+    the service can also be used as an async context manager. Requests must be made from the
+    event loop the service was started in.
+
+    Args:
+        read: the dialect of the SQL to transpile.
+        workers: the number of workers. Defaults to the number of CPUs.
+        executor: "process" to use a process pool or "thread" to use a thread pool. Threads don't
+            run Python code in parallel, but they avoid sending requests to other processes.
+        max_pending: the maximum number of jobs submitted to the pool at any time. Further jobs
+            wait for one of them to finish. Defaults to twice the number of workers.
+        timeout: the default timeout of a request, in seconds. Defaults to no timeout.
+    """
+
+    def __init__(
+        self,
+        read: DialectType = "snowflake",
+        workers: t.Optional[int] = None,
+        executor: str = "process",
+        max_pending: t.Optional[int] = None,
+        timeout: t.Optional[float] = None,
+    ) -> None:
+        if executor not in ("process", "thread"):
+            raise ValueError(f"Unknown executor '{executor}', expected 'process' or 'thread'")
+
+        self.read = Dialect.get_or_raise(read)
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = executor
+        self.max_pending = max_pending or 2 * self.workers
+        self.timeout = timeout
+
+        self.histograms = {name: Histogram() for name in ("queue", *PHASES, "total")}
+        self.requests = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.errors = 0
+
+        self._pool: t.Optional[Executor] = None
+        self._slots: t.Optional[asyncio.Semaphore] = None
+        self._jobs: t.Dict[t.Hashable, _Job] = {}
+
+    async def __aenter__(self) -> TranspileService:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: t.Any) -> None:
+        await self.close()
+
+    @property
+    def pending(self) -> int:
+        """The number of distinct jobs that are queued or running."""
+        return len(self._jobs)
+
+    async def start(self) -> None:
+        """Starts the pool. Every worker builds the dialect's state before its first job."""
+        if self._pool is not None:
+            return
+
+        pool_class: t.Callable[..., Executor] = ThreadPoolExecutor
+        if self.executor == "process":
+            # Services backed by threads never start a process
+            from concurrent.futures import ProcessPoolExecutor
+
+            pool_class = ProcessPoolExecutor
+
+        self._pool = pool_class(
+            max_workers=self.workers, initializer=_init_worker, initargs=(self.read,)
+        )
+        self._slots = asyncio.Semaphore(self.max_pending)
+
+    async def close(self) -> None:
+        """Waits for the running jobs to finish and shuts down the pool."""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+
+    async def transpile(
+        self,
+        sql: str,
+        write: DialectType = None,
+        identity: bool = True,
+        error_level: t.Optional[ErrorLevel] = None,
+        timeout: t.Optional[float] = None,
+        **opts,
+    ) -> t.List[str]:
+        """
+        Transpiles the given SQL string in the pool.
+
+        Args:
+            sql: the SQL code string to transpile.
+            write: the target dialect.
+            identity: if set to `True` and if the target dialect is not specified the source
+                dialect will be used as both: the source and the target dialect.
+            error_level: the desired error level of the parser.
+            timeout: the timeout of this request, in seconds. Defaults to the service's timeout.
+            **opts: other `sqlglot.generator.Generator` options.
+
+        Returns:
+            The list of transpiled SQL statements.
+
+        Raises:
+            asyncio.TimeoutError: if the request timed out. The job that serves it keeps running
+                if it had already started or if other requests are waiting for it.
+        """
+        if self._pool is None:
+            await self.start()
+
+        start = time.perf_counter()
+        target = self.read if write is None and identity else Dialect.get_or_raise(write)
+        key = (sql, target, error_level, tuple(sorted(opts.items())))
+        self.requests += 1
+
+        job = self._jobs.get(key)
+        if job is None:
+            job = self._jobs[key] = _Job()
+            job.future = asyncio.ensure_future(self._run(job, sql, target, error_level, opts))
+            job.future.add_done_callback(lambda future: self._done(key, job))
+        else:
+            self.coalesced += 1
+
+        assert job.future
+        job.waiters += 1
+        try:
+            output = await asyncio.wait_for(
+                asyncio.shield(job.future), self.timeout if timeout is None else timeout
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            job.waiters -= 1
+            # Jobs that nobody is waiting for anymore are dropped, unless they're already running
+            if not job.waiters and not job.started and not job.future.done():
+                job.future.cancel()
+            self.histograms["total"].observe(time.perf_counter() - start)
+
+        return list(output)
+
+    def metrics(self) -> t.Dict[str, t.Any]:
+        """Returns the request counters and the latency histograms."""
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "pending": self.pending,
+            "latency": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+        }
+
+    def to_prometheus(self, prefix: str = "sqlglot_service") -> str:
+        """
+        Returns the metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix: the prefix of the metric names.
+
+        Returns:
+            The counters, the number of pending jobs and the latency histograms, labeled by stage.
+        """
+        lines = []
+        for name, value, kind in (
+            ("requests_total", self.requests, "counter"),
+            ("coalesced_total", self.coalesced, "counter"),
+            ("timeouts_total", self.timeouts, "counter"),
+            ("errors_total", self.errors, "counter"),
+            ("pending", self.pending, "gauge"),
+        ):
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            lines.append(f"{prefix}_{name} {value}")
+
+        lines.append(f"# TYPE {prefix}_latency_seconds histogram")
+        for stage, histogram in self.histograms.items():
+            for bound, count in histogram.to_dict()["buckets"].items():
+                lines.append(
+                    f'{prefix}_latency_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}'
+                )
+            lines.append(f'{prefix}_latency_seconds_sum{{stage="{stage}"}} {histogram.sum!r}')
+            lines.append(f'{prefix}_latency_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        return "\n".join(lines) + "\n"
+
+    async def _run(
+        self,
+        job: _Job,
+        sql: str,
+        target: t.Type[Dialect],
+        error_level: t.Optional[ErrorLevel],
+        opts: t.Dict[str, t.Any],
+    ) -> t.List[str]:
+        assert self._pool and self._slots
+        queued = time.perf_counter()
+
+        async with self._slots:
+            job.started = True
+            self.histograms["queue"].observe(time.perf_counter() - queued)
+            loop = asyncio.get_running_loop()
+            work = loop.run_in_executor(
+                self._pool, _transpile, sql, self.read, target, error_level, opts
+            )
+            try:
+                output, timings = await work
+            except Exception:
+                self.errors += 1
+                raise
+
+        for phase, seconds in zip(PHASES, timings):
+            self.histograms[phase].observe(seconds)
+
+        return output
+
+    def _done(self, key: t.Hashable, job: _Job) -> None:
+        if self._jobs.get(key) is job:
+            del self._jobs[key]
+
+        # Marks the exception as retrieved, in case every request for the job timed out
+        assert job.future
+        if not job.future.cancelled():
+            job.future.exception()
+
+
+def _dialect(dialect: t.Type[Dialect]) -> Dialect:
+    dialects = getattr(_local, "dialects", None)
+    if dialects is None:
+        dialects = _local.dialects = {}
+
+    instance = dialects.get(dialect)
+    if instance is None:
+        instance = dialects[dialect] = dialect()
+    return instance
+
+
+def _init_worker(read: t.Type[Dialect]) -> None:
+    # Builds the dialect's tokenizer, parser and generator state ahead of the first request
+    dialect = _dialect(read)
+    for expression in dialect.parse("SELECT 1"):
+        dialect.generate(expression)
+
+
+def _transpile(
+    sql: str,
+    read: t.Type[Dialect],
+    write: t.Type[Dialect],
+    error_level: t.Optional[ErrorLevel],
+    opts: t.Dict[str, t.Any],
+) -> t.Tuple[t.List[str], t.Tuple[float, float, float]]:
+    source = _dialect(read)
+    target = _dialect(write)
+    parse_opts = {} if error_level is None else {"error_level": error_level}
+
+    start = time.perf_counter()
+    tokens = source.tokenize(sql)
+    tokenized = time.perf_counter()
+    expressions = source.parser(**parse_opts).parse(tokens, sql)
+    parsed = time.perf_counter()
+    output = [target.generate(expression, **opts) for expression in expressions]
+
+    return output, (tokenized - start, parsed - tokenized, time.perf_counter() - parsed)
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+async def handle_request(
+    service: TranspileService, request: t.Dict[str, t.Any]
+) -> t.Dict[str, t.Any]:
+    """
+    Serves a JSON request of the local entry points.
+
+    Args:
+        service: the service to transpile with.
+        request: a dict with a "sql" entry and optional "id", "write", "timeout" and "opts"
+            entries, "opts" being a dict of generator options.
+
+    Returns:
+        A dict with the request's "id" and either an "output" entry, with the transpiled
+        statements, or an "error" entry, formatted as "<exception type>: <message>".
+    """
+    response: t.Dict[str, t.Any] = {"id": request.get("id")}
+    try:
+        sql = request["sql"]
+        if not isinstance(sql, str):
+            raise TypeError("Expected 'sql' to be a string")
+
+        response["output"] = await service.transpile(
+            sql,
+            write=request.get("write"),
+            timeout=request.get("timeout"),
+            **(request.get("opts") or {}),
+        )
+    except asyncio.TimeoutError:
+        response["error"] = "TimeoutError: the request timed out"
+    except Exception as e:
+        response["error"] = f"{type(e).__name__}: {e}"
+    return response
+
+
+async def serve_stdio(service: TranspileService, max_requests: t.Optional[int] = None) -> None:
+    """
+    Reads JSON requests from stdin, one per line, and writes the responses to stdout as they
+    complete, so they may come out of order. Stops reading stdin while `max_requests` requests,
+    4 times the service's `max_pending` by default, are outstanding.
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=MAX_BODY_SIZE)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+    outstanding = asyncio.Semaphore(max_requests or 4 * service.max_pending)
+    tasks: t.Set[asyncio.Task] = set()
+
+    async def serve(line: bytes) -> None:
+        try:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Expected a JSON object")
+            except ValueError as e:
+                response: t.Dict[str, t.Any] = {"id": None, "error": f"{type(e).__name__}: {e}"}
+            else:
+                response = await handle_request(service, request)
+
+            sys.stdout.write(json.dumps(response) + "\n")
+            sys.stdout.flush()
+        finally:
+            outstanding.release()
+
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+
+        await outstanding.acquire()
+        task = asyncio.ensure_future(serve(line))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def serve_http(service: TranspileService, host: str = "127.0.0.1", port: int = 8080) -> None:
+    """
+    Serves HTTP requests until cancelled:
+
+    - `POST /transpile` takes a JSON request, as described in `handle_request`, and responds with
+      200 and the output, 400 and the error if transpiling failed, or 504 on timeouts.
+    - `GET /metrics` responds with the service's metrics in the Prometheus text format.
+    - `GET /healthz` responds with "ok".
+    """
+
+    async def respond(
+        writer: asyncio.StreamWriter, status: str, body: str, content_type: str
+    ) -> None:
+        payload = body.encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode("latin-1")
+            + payload
+        )
+        await writer.drain()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            method, path, *_ = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            if method == "GET" and path == "/healthz":
+                await respond(writer, "200 OK", "ok\n", "text/plain")
+            elif method == "GET" and path == "/metrics":
+                await respond(
+                    writer, "200 OK", service.to_prometheus(), "text/plain; version=0.0.4"
+                )
+            elif method == "POST" and path == "/transpile":
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_SIZE:
+                    await respond(writer, "413 Payload Too Large", "", "text/plain")
+                    return
+
+                try:
+                    request = json.loads(await reader.readexactly(length))
+                    if not isinstance(request, dict):
+                        raise ValueError("Expected a JSON object")
+                except ValueError as e:
+                    body = json.dumps({"id": None, "error": f"{type(e).__name__}: {e}"})
+                    await respond(writer, "400 Bad Request", body, "application/json")
+                    return
+
+                response = await handle_request(service, request)
+                if "output" in response:
+                    status = "200 OK"
+                elif response["error"].startswith("TimeoutError"):
+                    status = "504 Gateway Timeout"
+                else:
+                    status = "400 Bad Request"
+                await respond(writer, status, json.dumps(response), "application/json")
+            else:
+                await respond(writer, "404 Not Found", "", "text/plain")
+        except (ValueError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: t.Optional[t.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve SQL transpilation requests")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--stdio",
+        dest="http",
+        action="store_false",
+        help="Read JSON requests from stdin, one per line (default)",
+    )
+    mode.add_argument(
+        "--http",
+        dest="http",
+        action="store_true",
+        help="Serve JSON requests over HTTP",
+    )
+    parser.set_defaults(http=False)
+    parser.add_argument(
+        "--host",
+        dest="host",
+        type=str,
+        default="127.0.0.1",
+        help="Address to listen on, default is 127.0.0.1",
+    )
+    parser.add_argument(
+        "--port",
+        dest="port",
+        type=int,
+        default=8080,
+        help="Port to listen on, default is 8080",
+    )
+    parser.add_argument(
+        "--read",
+        dest="read",
+        type=str,
+        default="snowflake",
+        help="Dialect to read, default is snowflake",
+    )
+    parser.add_argument(
+        "--workers",
+        dest="workers",
+        type=int,
+        default=None,
+        help="Number of workers, default is the number of CPUs",
+    )
+    parser.add_argument(
+        "--threads",
+        dest="threads",
+        action="store_true",
+        help="Use a thread pool instead of a process pool",
+    )
+    parser.add_argument(
+        "--max-pending",
+        dest="max_pending",
+        type=int,
+        default=None,
+        help="Maximum number of jobs submitted to the pool, default is twice the workers",
+    )
+    parser.add_argument(
+        "--timeout",
+        dest="timeout",
+        type=float,
+        default=None,
+        help="Default request timeout in seconds, default is no timeout",
+    )
+    args = parser.parse_args(argv)
+
+    async def run() -> None:
+        async with TranspileService(
+            read=args.read,
+            workers=args.workers,
+            executor="thread" if args.threads else "process",
+            max_pending=args.max_pending,
+            timeout=args.timeout,
+        ) as service:
+            if args.http:
+                await serve_http(service, args.host, args.port)
+            else:
+                await serve_stdio(service)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import snowflake_service
+from sqlglot.errors import ParseError
+from snowflake_service import Histogram, TranspileService, handle_request, serve_http
+
+SQL = "SELECT IFF(a, 1, 2)"
+DUCKDB = ["SELECT CASE WHEN a THEN 1 ELSE 2 END"]
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    """Holds the workers' jobs until the gate is opened, recording the SQL of each one."""
+    gate = threading.Event()
+    gate.calls = []
+    transpile = snowflake_service._transpile
+
+    def gated(sql, *args):
+        gate.calls.append(sql)
+        gate.wait(10)
+        return transpile(sql, *args)
+
+    monkeypatch.setattr(snowflake_service, "_transpile", gated)
+    yield gate
+    gate.set()
+
+
+async def _until(condition):
+    for _ in range(1000):
+        if condition():
+            return
+        await asyncio.sleep(0.001)
+    raise AssertionError("Timed out")
+
+
+def test_transpile():
+    async def main():
+        async with TranspileService(workers=2, executor="thread") as service:
+            assert await service.transpile(SQL) == ["SELECT IFF(a, 1, 2)"]
+            assert await service.transpile(SQL, write="duckdb") == DUCKDB
+            assert await service.transpile("SELECT 1; SELECT 2") == ["SELECT 1", "SELECT 2"]
+            assert await service.transpile(SQL, write="duckdb", pretty=True) == [
+                "SELECT\n  CASE WHEN a THEN 1 ELSE 2 END"
+            ]
+            return service.metrics()
+
+    metrics = asyncio.run(main())
+    assert metrics["requests"] == 4
+    assert metrics["pending"] == 0
+    assert metrics["latency"]["total"]["count"] == 4
+    assert metrics["latency"]["parse"]["count"] == 4
+
+
+def test_process_pool():
+    async def main():
+        async with TranspileService(workers=1) as service:
+            return await asyncio.gather(
+                service.transpile(SQL, write="duckdb"), service.transpile("SELECT 2")
+            )
+
+    assert asyncio.run(main()) == [DUCKDB, ["SELECT 2"]]
+
+
+def test_identical_requests_are_coalesced(gate):
+    async def main():
+        async with TranspileService(workers=3, executor="thread") as service:
+            requests = [
+                asyncio.ensure_future(service.transpile(SQL, write="duckdb")),
+                asyncio.ensure_future(service.transpile(SQL, write="duckdb")),
+                asyncio.ensure_future(service.transpile(SQL, write="duckdb", pretty=True)),
+                asyncio.ensure_future(service.transpile(SQL)),
+            ]
+            await _until(lambda: len(gate.calls) == 3)
+            assert service.pending == 3
+            gate.set()
+
+            results = await asyncio.gather(*requests)
+            assert results[0] == results[1] == DUCKDB
+            assert results[0] is not results[1]
+            return service
+
+    service = asyncio.run(main())
+    assert (service.requests, service.coalesced, service.pending) == (4, 1, 0)
+
+
+def test_jobs_are_bounded(gate):
+    async def main():
+        async with TranspileService(workers=2, executor="thread", max_pending=1) as service:
+            requests = [asyncio.ensure_future(service.transpile(f"SELECT {i}")) for i in range(3)]
+            await _until(lambda: gate.calls)
+            await asyncio.sleep(0.05)
+            assert gate.calls == ["SELECT 0"]
+            assert service.pending == 3
+
+            gate.set()
+            return await asyncio.gather(*requests)
+
+    assert asyncio.run(main()) == [["SELECT 0"], ["SELECT 1"], ["SELECT 2"]]
+    assert gate.calls == ["SELECT 0", "SELECT 1", "SELECT 2"]
+
+
+def test_timeouts(gate):
+    async def main():
+        async with TranspileService(workers=1, executor="thread", max_pending=1) as service:
+            running = asyncio.ensure_future(service.transpile("SELECT 1", timeout=0.05))
+            await _until(lambda: gate.calls)
+
+            # The queued job is dropped once its only request times out
+            with pytest.raises(asyncio.TimeoutError):
+                await service.transpile("SELECT 2", timeout=0.05)
+            with pytest.raises(asyncio.TimeoutError):
+                await running
+            await _until(lambda: service.pending == 1)
+
+            # The running job can't be dropped, so later requests still share it
+            rejoined = asyncio.ensure_future(service.transpile("SELECT 1"))
+            await asyncio.sleep(0.01)
+            gate.set()
+            assert await rejoined == ["SELECT 1"]
+            assert await service.transpile("SELECT 3") == ["SELECT 3"]
+            return service
+
+    service = asyncio.run(main())
+    assert gate.calls == ["SELECT 1", "SELECT 3"]
+    assert (service.timeouts, service.coalesced, service.pending) == (2, 1, 0)
+
+
+def test_errors():
+    async def main():
+        async with TranspileService(workers=1, executor="thread") as service:
+            with pytest.raises(ValueError):
+                await service.transpile("SELECT TO_TIMESTAMP(1, 5)")
+            with pytest.raises(ParseError):
+                await service.transpile("SELECT (")
+            assert await service.transpile("SELECT (", error_level="IGNORE") == ["SELECT ()"]
+            return service
+
+    service = asyncio.run(main())
+    assert service.errors == 2
+    assert service.pending == 0
+
+
+def test_invalid_executor():
+    with pytest.raises(ValueError):
+        TranspileService(executor="fiber")
+
+
+def test_handle_request(gate):
+    async def main():
+        async with TranspileService(workers=1, executor="thread") as service:
+            gate.set()
+            responses = [
+                await handle_request(service, {"id": 1, "sql": SQL, "write": "duckdb"}),
+                await handle_request(service, {"id": 2, "sql": SQL, "opts": {"pretty": True}}),
+                await handle_request(service, {"id": 3, "sql": "SELECT ("}),
+                await handle_request(service, {"id": 4, "sql": 5}),
+                await handle_request(service, {"id": 5}),
+            ]
+            gate.clear()
+            responses.append(await handle_request(service, {"sql": "SELECT 1", "timeout": 0.01}))
+            gate.set()
+            return responses
+
+    responses = asyncio.run(main())
+    assert responses[0] == {"id": 1, "output": DUCKDB}
+    assert responses[1] == {"id": 2, "output": ["SELECT\n  IFF(a, 1, 2)"]}
+    assert responses[2]["error"].startswith("ParseError: ")
+    assert responses[3]["error"] == "TypeError: Expected 'sql' to be a string"
+    assert responses[4]["error"] == "KeyError: 'sql'"
+    assert responses[5] == {"id": None, "error": "TimeoutError: the request timed out"}
+
+
+def test_metrics():
+    async def main():
+        async with TranspileService(workers=1, executor="thread") as service:
+            await service.transpile(SQL)
+            return service.to_prometheus(prefix="test")
+
+    lines = asyncio.run(main()).splitlines()
+    assert "test_requests_total 1" in lines
+    assert "# TYPE test_pending gauge" in lines
+    assert 'test_latency_seconds_bucket{stage="parse",le="+Inf"} 1' in lines
+    assert 'test_latency_seconds_count{stage="queue"} 1' in lines
+
+
+def test_histogram():
+    histogram = Histogram([0.1, 1.0])
+    assert histogram.quantile(0.5) == 0.0
+    for seconds in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(seconds)
+
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.75) == 1.0
+    assert histogram.quantile(1.0) == float("inf")
+    assert histogram.to_dict() == {
+        "count": 4,
+        "sum": 2.65,
+        "buckets": {"0.1": 2, "1.0": 3, "+Inf": 4},
+    }
+
+
+def test_http_server():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    async def request(method, path, body=b""):
+        for _ in range(100):
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                break
+            except ConnectionError:
+                await asyncio.sleep(0.01)
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        response = await reader.read()
+        writer.close()
+        head, _, payload = response.decode().partition("\r\n\r\n")
+        return head.split("\r\n")[0], payload
+
+    async def main():
+        async with TranspileService(workers=1, executor="thread") as service:
+            server = asyncio.ensure_future(serve_http(service, port=port))
+            try:
+                return [
+                    await request("GET", "/healthz"),
+                    await request("POST", "/transpile", json.dumps({"sql": SQL}).encode()),
+                    await request("POST", "/transpile", b'{"sql": "SELECT ("}'),
+                    await request("POST", "/transpile", b"[1]"),
+                    await request("GET", "/metrics"),
+                    await request("GET", "/nothing"),
+                ]
+            finally:
+                server.cancel()
+
+    responses = asyncio.run(main())
+    assert responses[0] == ("HTTP/1.1 200 OK", "ok\n")
+    assert responses[1] == ("HTTP/1.1 200 OK", '{"id": null, "output": ["SELECT IFF(a, 1, 2)"]}')
+    assert responses[2][0] == "HTTP/1.1 400 Bad Request"
+    assert json.loads(responses[2][1])["error"].startswith("ParseError")
+    assert json.loads(responses[3][1]) == {
+        "id": None,
+        "error": "ValueError: Expected a JSON object",
+    }
+    assert "sqlglot_service_requests_total 2" in responses[4][1]
+    assert responses[5][0] == "HTTP/1.1 404 Not Found"
+
+
+def test_stdio_server():
+    directory = os.path.dirname(os.path.abspath(__file__))
+    requests = [{"id": i, "sql": f"SELECT IFF(a, {i}, 2)", "write": "duckdb"} for i in range(5)]
+    stdin = "\n".join(map(json.dumps, requests)) + "\n\nnot json\n"
+
+    result = subprocess.run(
+        [sys.executable, os.path.join(directory, "snowflake_service.py"), "--stdio", "--threads"],
+        input=stdin,
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+    responses = [json.loads(line) for line in result.stdout.splitlines()]
+    assert sorted(responses, key=lambda response: str(response["id"])) == [
+        *({"id": i, "output": [f"SELECT CASE WHEN a THEN {i} ELSE 2 END"]} for i in range(5)),
+        {"id": None, "error": "JSONDecodeError: Expecting value: line 1 column 1 (char 0)"},
+    ]
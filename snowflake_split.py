@@ -0,0 +1,215 @@
+"""
+Splits Snowflake scripts into individual statements without tokenizing them.
+
+The scanner only understands as much of Snowflake's lexical structure as it needs in order to
+find the semicolons that terminate statements: string literals (including backslash escapes
+and doubled quotes), $$-quoted strings, quoted identifiers and --, // and /* */ comments.
+Scripts can be consumed from file-like objects, in which case they are read in chunks, so that
+memory usage is bounded by the size of the largest statement rather than the size of the script.
+
+Example:
+    >>> list(split_statements("SELECT 'a;b'; // c;\\nSELECT $$d;$$;"))
+    ["SELECT 'a;b'", '// c;\\nSELECT $$d;$$']
+"""
+
+from __future__ import annotations
+
+import re
+import typing as t
+
+from sqlglot import exp
+from sqlglot.dialects.dialect import Dialect, DialectType
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# Scanner states
+CODE = 0
+STRING = 1
+IDENTIFIER = 2
+DOLLAR_STRING = 3
+LINE_COMMENT = 4
+BLOCK_COMMENT = 5
+
+_CODE_RE = re.compile(r"'|\"|\$\$|--|//|/\*|;")
+_STRING_RE = re.compile(r"[\\']")
+
+_OPENERS = {
+    "'": STRING,
+    '"': IDENTIFIER,
+    "$$": DOLLAR_STRING,
+    "--": LINE_COMMENT,
+    "//": LINE_COMMENT,
+    "/*": BLOCK_COMMENT,
+}
+
+_CLOSERS = {
+    IDENTIFIER: '"',
+    DOLLAR_STRING: "$$",
+    LINE_COMMENT: "\n",
+    BLOCK_COMMENT: "*/",
+}
+
+
+class Statement(t.NamedTuple):
+    """A statement of a script, along with the offsets of the text it was sliced from."""
+
+    sql: str
+    start: int
+    end: int
+
+
+def split_statements(
+    source: str | t.TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> t.Iterator[str]:
+    """
+    Lazily splits a script into its statements.
+
+    Args:
+        source: the script, either as a string or as a file-like object.
+        chunk_size: the number of characters to read at a time from file-like objects.
+
+    Returns:
+        A generator of the script's statements, stripped of surrounding whitespace. Empty
+        statements, including the ones that only consist of comments, are skipped.
+    """
+    for statement in scan_statements(source, chunk_size=chunk_size):
+        yield statement.sql.strip()
+
+
+def parse_statements(
+    source: str | t.TextIO,
+    read: DialectType = "snowflake",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    **opts,
+) -> t.Iterator[t.Optional[exp.Expression]]:
+    """
+    Lazily parses a script, one statement at a time.
+
+    Args:
+        source: the script, either as a string or as a file-like object.
+        read: the SQL dialect to apply during parsing.
+        chunk_size: the number of characters to read at a time from file-like objects.
+        **opts: other `sqlglot.parser.Parser` options.
+
+    Returns:
+        A generator of the syntax trees of the script's statements.
+    """
+    dialect = Dialect.get_or_raise(read)()
+    for sql in split_statements(source, chunk_size=chunk_size):
+        yield from dialect.parse(sql, **opts)
+
+
+def scan_statements(
+    source: str | t.TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> t.Iterator[Statement]:
+    """
+    Lazily splits a script into its statements, keeping track of where each one is located.
+
+    Args:
+        source: the script, either as a string or as a file-like object.
+        chunk_size: the number of characters to read at a time from file-like objects.
+
+    Returns:
+        A generator of the script's non-empty statements. Their text is sliced verbatim from
+        the script and doesn't include the terminating semicolon, which is at offset `end`
+        unless the statement is the last one in the script.
+    """
+    if isinstance(source, str):
+        chunks: t.Iterator[str] = iter((source,))
+    else:
+        chunks = iter(lambda: source.read(chunk_size), "")
+
+    # `text` holds the part of the script that hasn't been fully scanned yet, along with the
+    # current statement's prefix starting at `pos`. The statement's scanned prefix is moved to
+    # `parts` whenever more input is read, so that long statements aren't copied once per chunk
+    parts: t.List[str] = []
+    text = ""
+    offset = 0  # the offset of `text` in the script
+    start = 0  # the offset of the current statement in the script
+    pos = 0
+    i = 0
+    state = CODE
+    has_code = False
+    previous_char = ""
+    eof = False
+
+    while True:
+        # Keep one character of lookahead around, unless there is no more input
+        limit = len(text) if eof else len(text) - 1
+
+        if state == CODE:
+            match = _CODE_RE.search(text, i, max(limit, i))
+            if match:
+                j = match.start()
+                token = match.group()
+                has_code = has_code or (i < j and not text[i:j].isspace())
+
+                if token == ";":
+                    if has_code:
+                        yield Statement("".join(parts) + text[pos:j], start, offset + j)
+
+                    parts = []
+                    pos = i = j + 1
+                    start = offset + pos
+                    has_code = False
+                    continue
+
+                before = text[j - 1] if j else previous_char
+                if token == "$$" and (before.isalnum() or before in ("_", "$")):
+                    # Unquoted identifiers can contain dollar signs, e.g. a$$b
+                    has_code = True
+                    i = j + 2
+                    continue
+
+                state = _OPENERS[token]
+                has_code = has_code or state in (STRING, IDENTIFIER, DOLLAR_STRING)
+                i = j + len(token)
+                continue
+
+            # The last character may be the start of a two-character opener, e.g. --, so it's
+            # only scanned, and possibly counted as code, once the next chunk has been read
+            end = limit if eof else max(i, limit - 1)
+            has_code = has_code or (i < end and not text[i:end].isspace())
+            i = end
+        elif state == STRING:
+            match = _STRING_RE.search(text, i)
+            if match and match.start() < limit:
+                j = match.start()
+                if text[j] == "'" and text[j + 1 : j + 2] != "'":
+                    state = CODE
+                    i = j + 1
+                else:
+                    # Either a backslash escape or a doubled quote
+                    i = j + 2
+                continue
+
+            i = max(i, limit)
+        else:
+            closer = _CLOSERS[state]
+            j = text.find(closer, i)
+            if j != -1:
+                state = CODE
+                i = j + len(closer)
+                continue
+
+            i = max(i, len(text) - len(closer) + 1)
+
+        if eof:
+            break
+
+        # Move what has been scanned out of the way and read more input
+        chunk = next(chunks, "")
+        eof = not chunk
+
+        if i > pos:
+            parts.append(text[pos:i])
+        if i:
+            previous_char = text[i - 1]
+            offset += i
+            text = text[i:]
+            pos = i = 0
+
+        text += chunk
+
+    if has_code:
+        yield Statement("".join(parts) + text[pos:], start, offset + len(text))
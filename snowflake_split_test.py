@@ -0,0 +1,73 @@
+import io
+
+import pytest
+
+from snowflake_split import parse_statements, scan_statements, split_statements
+
+SCRIPTS = [
+    "SELECT 1; SELECT 2",
+    "SELECT 'a;b'; // c;\nSELECT $$d;$$;",
+    "SELECT 1;\n/* c */;\nSELECT 2",
+    "SELECT 1;\n--",
+    "SELECT 1;\n-- only a comment;\n;\n// another one\n;SELECT 2;",
+    "SELECT 'it''s;', 'back\\'slash;' FROM t; SELECT \"a;\"\"b\" FROM u",
+    "SELECT a$$b; SELECT $$x;y$$, a$$ FROM t",
+    "CREATE PROCEDURE p() RETURNS INT AS $$ BEGIN SELECT 1; RETURN 1; END $$; CALL p()",
+    "SELECT 1 /* a;\n b */ + 2 -- c;\n; SELECT 3 // d;",
+    "SELECT 1 - -2; SELECT 4 / 2; SELECT 5 -",
+    ";;  ;\n\n;",
+    "/* unterminated ; comment",
+    "SELECT 'unterminated ; string",
+]
+
+
+def _scan(script, chunk_size=None):
+    if chunk_size is None:
+        return list(scan_statements(script))
+    return list(scan_statements(io.StringIO(script), chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize("script", SCRIPTS)
+def test_chunk_size_doesnt_change_statements(script):
+    expected = _scan(script)
+    for chunk_size in range(1, len(script) + 2):
+        assert _scan(script, chunk_size) == expected, chunk_size
+
+
+@pytest.mark.parametrize("script", SCRIPTS)
+def test_statement_offsets(script):
+    for statement in _scan(script):
+        assert script[statement.start : statement.end] == statement.sql
+        assert statement.end == len(script) or script[statement.end] == ";"
+
+
+def test_comment_only_statements_are_skipped():
+    assert list(split_statements("SELECT 1;\n--")) == ["SELECT 1"]
+    assert list(split_statements("SELECT 1;\n// c\n;/* d */")) == ["SELECT 1"]
+    assert list(split_statements(io.StringIO("SELECT 1;\n/* c */;\nSELECT 2"), chunk_size=3)) == [
+        "SELECT 1",
+        "SELECT 2",
+    ]
+
+
+def test_lone_operator_is_code():
+    assert list(split_statements("SELECT 1;\n-")) == ["SELECT 1", "-"]
+    assert list(split_statements(io.StringIO("SELECT 1;/"), chunk_size=1)) == ["SELECT 1", "/"]
+
+
+def test_semicolons_in_strings_and_comments():
+    assert list(split_statements(SCRIPTS[1])) == ["SELECT 'a;b'", "// c;\nSELECT $$d;$$"]
+    assert list(split_statements(SCRIPTS[7])) == [
+        "CREATE PROCEDURE p() RETURNS INT AS $$ BEGIN SELECT 1; RETURN 1; END $$",
+        "CALL p()",
+    ]
+
+
+def test_dollar_signs_in_identifiers():
+    assert list(split_statements(SCRIPTS[6])) == ["SELECT a$$b", "SELECT $$x;y$$, a$$ FROM t"]
+
+
+def test_parse_statements_skips_comment_only_statements():
+    for chunk_size in range(1, 12):
+        expressions = list(parse_statements(io.StringIO(SCRIPTS[4]), chunk_size=chunk_size))
+        assert [expression.sql() for expression in expressions] == ["SELECT 1", "SELECT 2"]
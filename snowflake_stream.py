@@ -0,0 +1,367 @@
+"""
+Streaming SQL generation for statements with very large payloads.
+
+`Generator.generate` builds the SQL string of a statement bottom-up, so a statement such as an
+INSERT with 100k VALUES rows or an OBJECT_CONSTRUCT with thousands of arguments results in many
+large intermediate strings. `stream_sql` instead writes the output to a text sink as it goes:
+large argument lists are generated one element at a time and the nodes above them are split
+around placeholder markers, so the biggest string that exists at any point is roughly the size
+of a single list element.
+
+Some generators inspect the children that are swapped for markers, e.g. to tell a column list
+from a subquery, so every split is first checked against the output of the generator on a copy of
+the statement whose large lists are cut down to a few elements. The nodes that fail the check are
+generated as a whole.
+
+The literals of nodes parsed with `compact_literals` are materialized one element at a time as
+they are streamed, so that the nodes stay compact.
+
+Example:
+    >>> import io
+    >>> from sqlglot import parse_one
+    >>> sink = io.StringIO()
+    >>> stream_sql(parse_one("INSERT INTO t VALUES (1, 'a'), (2, 'b')"), sink, threshold=1)
+    >>> sink.getvalue()
+    "INSERT INTO t VALUES (1, 'a'), (2, 'b')"
+"""
+
+from __future__ import annotations
+
+import re
+import typing as t
+
+from sqlglot import exp
+from sqlglot.dialects.dialect import Dialect, DialectType
+from sqlglot.dialects.snowflake import _literal_run, _LiteralRun
+from sqlglot.errors import ErrorLevel, UnsupportedError, concat_messages
+from sqlglot.generator import Generator, logger
+from sqlglot.helper import ensure_list
+
+# Argument lists with more elements than this are generated one element at a time
+DEFAULT_THRESHOLD = 64
+
+_MARKER = "__sqlglot_stream_{}__"
+_MARKER_RE = re.compile(r"__sqlglot_stream_(\d+)__")
+
+
+def stream_sql(
+    expression: exp.Expression,
+    sink: t.IO[str],
+    dialect: DialectType = "snowflake",
+    threshold: int = DEFAULT_THRESHOLD,
+    **opts,
+) -> None:
+    """
+    Generates the SQL string corresponding to the given syntax tree and writes it to `sink`.
+
+    The output is the same as that of `Generator.generate`, except for pretty-printed output,
+    whose layout depends on the length of the generated pieces: in that case, the statement is
+    generated as a whole before being written.
+
+    Args:
+        expression: the syntax tree.
+        sink: the text stream to write to.
+        dialect: the dialect to generate.
+        threshold: argument lists with more elements than this are streamed.
+        **opts: other `sqlglot.generator.Generator` options.
+    """
+    generator = Dialect.get_or_raise(dialect)().generator(**opts)
+
+    if generator.pretty:
+        sink.write(generator.generate(expression))
+        return
+
+    generator.unsupported_messages = []
+    _Streamer(generator, threshold, sink.write).stream(expression)
+
+    if generator.unsupported_level == ErrorLevel.WARN:
+        for msg in generator.unsupported_messages:
+            logger.warning(msg)
+    elif generator.unsupported_level == ErrorLevel.RAISE and generator.unsupported_messages:
+        raise UnsupportedError(
+            concat_messages(generator.unsupported_messages, generator.max_unsupported)
+        )
+
+
+class _RunElements(t.Sequence[exp.Expression]):
+    """The elements a `_LiteralRun` stands for, each of which is only built when it's accessed."""
+
+    def __init__(self, node: exp.Expression, run: _LiteralRun) -> None:
+        self.node_class = type(node)
+        self.run = run
+
+    def __len__(self) -> int:
+        return len(self.run)
+
+    def __getitem__(self, index: t.Any) -> t.Any:
+        if isinstance(index, slice):
+            start, stop, _ = index.indices(len(self))
+            return self._expand(start, max(start, stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._expand(index, index + 1)[0]
+
+    def _expand(self, start: int, stop: int) -> t.List[exp.Expression]:
+        run = self.run
+        width = run.width
+        texts = run.texts[start * width : stop * width]
+        kinds = run.kinds[start * width : stop * width]
+        return _LiteralRun(texts, kinds, width).expand(self.node_class)
+
+
+def _args(node: exp.Expression) -> t.Iterator[t.Tuple[str, t.Any]]:
+    # Reads the args without expanding compact literals, whose elements are built lazily instead
+    run = _literal_run(node)
+    for key, value in dict.items(node.args):
+        yield key, _RunElements(node, run) if value is run and run is not None else value
+
+
+def _is_list(value: t.Any) -> bool:
+    return type(value) is list or type(value) is _RunElements
+
+
+class _Streamer:
+    def __init__(
+        self, generator: Generator, threshold: int, write: t.Callable[[str], t.Any]
+    ) -> None:
+        self.generator = generator
+        self.threshold = threshold
+        self.write = write
+        self.heavy: t.Dict[int, exp.Expression] = {}
+        # The keys of the list arguments that are streamed, for every heavy node
+        self.lists: t.Dict[int, t.List[str]] = {}
+        # The heavy nodes that can't be split around markers and are generated as a whole
+        self.unsafe: t.Set[int] = set()
+        self.markers = 0
+
+    def stream(self, expression: exp.Expression) -> None:
+        # A node is "heavy" if it or one of its descendants has a large argument list
+        stack = [expression]
+        while stack:
+            node = stack.pop()
+            for _, value in _args(node):
+                if _is_list(value):
+                    if len(value) > self.threshold:
+                        self._mark(node)
+                    # Literal runs have no heavy descendants
+                    if type(value) is list:
+                        stack.extend(v for v in value if isinstance(v, exp.Expression))
+                elif isinstance(value, exp.Expression):
+                    stack.append(value)
+
+        for node in self.heavy.values():
+            self.lists[id(node)] = [
+                key
+                for key, value in _args(node)
+                if _is_list(value)
+                and (
+                    len(value) > self.threshold
+                    or (type(value) is list and any(id(v) in self.heavy for v in value))
+                )
+            ]
+
+        if self.heavy:
+            self._verify(expression)
+        self._stream(expression)
+
+    def _mark(self, node: t.Optional[exp.Expression]) -> None:
+        while node and id(node) not in self.heavy:
+            self.heavy[id(node)] = node
+            node = node.parent
+
+    def _verify(self, expression: exp.Expression) -> None:
+        # The streamed lists are cut down to their first two elements, so that their separator
+        # still shows, and to their heavy elements, so that every heavy node is checked. This is
+        # done in place, like in `_render`, and undone once the check is over
+        originals = []
+        for node in self.heavy.values():
+            lists = self.lists[id(node)]
+            if not lists:
+                continue
+
+            replacements = {}
+            for key, value in _args(node):
+                if key in lists:
+                    replacements[key] = value[:2]
+                    if type(value) is list:
+                        replacements[key] += [v for v in value[2:] if id(v) in self.heavy]
+            originals.append((node, _swap_args(node, replacements)))
+
+        write = self.write
+        messages = list(self.generator.unsupported_messages)
+        try:
+            self._check(expression)
+        finally:
+            for node, original in reversed(originals):
+                _restore_args(node, original)
+            self.write = write
+            self.generator.unsupported_messages = messages
+
+    def _check(self, node: exp.Expression) -> None:
+        # Children are checked first, so that a node's check only depends on its own split
+        for _, value in _args(node):
+            for child in ensure_list(value):
+                if isinstance(child, exp.Expression) and id(child) in self.heavy:
+                    self._check(child)
+
+        pieces: t.List[str] = []
+        self.write = pieces.append
+        self._stream(node)
+        if "".join(pieces) != self.generator.sql(node):
+            self.unsafe.add(id(node))
+
+    def _stream(self, node: exp.Expression) -> None:
+        if id(node) not in self.heavy or id(node) in self.unsafe:
+            self.write(self.generator.sql(node))
+            return
+
+        # Every heavy argument is replaced by a marker, or two in the case of lists, so that the
+        # separator between the list's elements can be recovered from the generated SQL
+        lists = self.lists[id(node)]
+        replacements: t.Dict[str, t.Any] = {}
+        args = dict(_args(node))
+        for key, value in args.items():
+            if key in lists:
+                replacements[key] = [self._marker(), self._marker()]
+            elif type(value) is not list and id(value) in self.heavy:
+                replacements[key] = self._marker()
+
+        sql = self._render(node, replacements)
+        matches = list(_MARKER_RE.finditer(sql))
+        owners = {
+            marker.name: key for key, value in replacements.items() for marker in ensure_list(value)
+        }
+
+        plans = self._plans(node, replacements, [m.group(0) for m in matches], owners)
+        if plans is None:
+            self.write(self.generator.sql(node))
+            return
+
+        position = 0
+        for match in matches:
+            key = owners[match.group(0)]
+            value = replacements[key]
+
+            if isinstance(value, list):
+                if match.group(0) == value[1].name:
+                    continue
+
+                end = sql.index(value[1].name, match.end())
+                self.write(sql[position : match.start()])
+                self._stream_list(
+                    node, args[key], sql[match.end() : end], key, replacements, plans[key]
+                )
+                position = end + len(value[1].name)
+            else:
+                self.write(sql[position : match.start()])
+                self._stream(args[key])
+                position = match.end()
+
+        self.write(sql[position:])
+
+    def _plans(
+        self,
+        node: exp.Expression,
+        replacements: t.Dict[str, t.Any],
+        rendered_markers: t.List[str],
+        owners: t.Dict[str, str],
+    ) -> t.Optional[t.Dict[str, t.Tuple[str, str, str]]]:
+        # Make sure that the generator rendered every marker verbatim, exactly once, and that the
+        # elements of every list can be generated independently, before writing anything
+        if sorted(rendered_markers) != sorted(owners):
+            return None
+
+        plans = {}
+        for key, value in replacements.items():
+            if isinstance(value, list):
+                plan = self._plan(node, key, replacements)
+                if not plan:
+                    return None
+                plans[key] = plan
+
+        return plans
+
+    def _plan(
+        self, node: exp.Expression, key: str, replacements: t.Dict[str, t.Any]
+    ) -> t.Optional[t.Tuple[str, str, str]]:
+        """
+        Some transforms don't render a list's elements on their own, e.g. Snowflake's Struct
+        transform flattens each key-value pair, so this finds out whether the elements of the list
+        `key` are rendered as is ("plain"), if they need to be rendered in the context of `node`
+        ("context") or if the list can't be streamed at all (`None`).
+        """
+        marker = self._marker()
+        shell = self._render(node, {**replacements, key: [marker]})
+        prefix, _, suffix = shell.partition(marker.name)
+
+        probe = next(
+            (child for child in dict(_args(node))[key] if id(child) not in self.heavy), None
+        )
+        if probe is None:
+            return "plain", prefix, suffix
+
+        rendered = self._render(node, {**replacements, key: [probe]})
+        if rendered == f"{prefix}{self.generator.sql(probe)}{suffix}":
+            return "plain", prefix, suffix
+        if rendered.startswith(prefix) and rendered.endswith(suffix):
+            return "context", prefix, suffix
+        return None
+
+    def _stream_list(
+        self,
+        node: exp.Expression,
+        children: t.Sequence[exp.Expression],
+        separator: str,
+        key: str,
+        replacements: t.Dict[str, t.Any],
+        plan: t.Tuple[str, str, str],
+    ) -> None:
+        mode, prefix, suffix = plan
+
+        for i, child in enumerate(children):
+            if i:
+                self.write(separator)
+
+            if mode == "plain":
+                self._stream(child)
+            else:
+                rendered = self._render(node, {**replacements, key: [child]})
+                self.write(rendered[len(prefix) : len(rendered) - len(suffix)])
+
+    def _render(self, node: exp.Expression, replacements: t.Dict[str, t.Any]) -> str:
+        original = _swap_args(node, replacements)
+        try:
+            return self.generator.sql(node)
+        finally:
+            _restore_args(node, original)
+
+    def _marker(self) -> exp.Var:
+        self.markers += 1
+        return exp.Var(this=_MARKER.format(self.markers))
+
+
+def _swap_args(
+    node: exp.Expression, replacements: t.Dict[str, t.Any]
+) -> t.Tuple[t.Dict[str, t.Any], t.Optional[_LiteralRun]]:
+    # The arguments are swapped in place, rather than through `set`, so that the parent pointers
+    # of the original children are left untouched. A compact node is made to look expanded while
+    # its arguments are swapped, so that neither the swap nor the generator expand its literals
+    args = node.args
+    run = _literal_run(node)
+    if run is not None:
+        args.run = None  # type: ignore
+
+    original = {key: dict.get(args, key) for key in replacements}
+    dict.update(args, replacements)
+    return original, run
+
+
+def _restore_args(
+    node: exp.Expression, original: t.Tuple[t.Dict[str, t.Any], t.Optional[_LiteralRun]]
+) -> None:
+    values, run = original
+    dict.update(node.args, values)
+    if run is not None:
+        node.args.run = run  # type: ignore
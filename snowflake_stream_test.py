@@ -0,0 +1,149 @@
+import io
+
+import pytest
+
+from sqlglot import exp, parse_one
+from sqlglot.dialects.snowflake import _literal_run
+from snowflake_stream import stream_sql
+
+THRESHOLDS = [0, 1, 2, 3, 64]
+
+COLUMNS = ", ".join(f"c{i}" for i in range(70))
+VALUES = ", ".join(f"v{i}" for i in range(70))
+ROWS = ", ".join(f"({i}, 'a{i}', b{i})" for i in range(100))
+PAIRS = ", ".join(f"'k{i}', c{i}" for i in range(70))
+ELEMENTS = ", ".join(f"c{i}" for i in range(70))
+LITERAL_ROWS = ", ".join(f"({i}, 'a{i}', NULL, -{i}, TRUE)" for i in range(100))
+LITERAL_PAIRS = ", ".join(f"'k{i}', {i}" for i in range(70))
+NUMBERS = ", ".join(str(i) for i in range(70))
+
+STATEMENTS = [
+    # INSERT / VALUES
+    f"INSERT INTO t VALUES {ROWS}",
+    f"INSERT INTO t ({COLUMNS}) VALUES ({VALUES})",
+    f"INSERT INTO t ({COLUMNS}) SELECT {COLUMNS} FROM s",
+    f"SELECT * FROM (VALUES {ROWS}) AS v(a, b, c)",
+    # CTAS
+    f"CREATE TABLE t AS SELECT * FROM (VALUES {ROWS}) AS v(a, b, c)",
+    f"CREATE TABLE t ({', '.join(f'c{i} INT' for i in range(70))})",
+    # MERGE
+    "MERGE INTO t USING s ON t.id = s.id WHEN MATCHED THEN UPDATE SET "
+    + ", ".join(f"t.c{i} = s.c{i}" for i in range(70))
+    + f" WHEN NOT MATCHED THEN INSERT ({COLUMNS}) VALUES ({VALUES})",
+    # Struct / Array
+    f"SELECT OBJECT_CONSTRUCT({PAIRS})",
+    f"SELECT OBJECT_CONSTRUCT('a', OBJECT_CONSTRUCT({PAIRS}), 'b', ARRAY_CONSTRUCT({ELEMENTS}))",
+    f"SELECT ARRAY_CONSTRUCT({ELEMENTS})",
+    f"SELECT ARRAY_CONSTRUCT(ARRAY_CONSTRUCT({ELEMENTS}), {ELEMENTS})",
+    # _unix_to_time_sql
+    f"SELECT TO_TIMESTAMP(ARRAY_SIZE(ARRAY_CONSTRUCT({ELEMENTS})), 3)",
+    # _datatype_sql
+    f"SELECT CAST(ARRAY_CONSTRUCT({ELEMENTS}) AS ARRAY)",
+    "SELECT CAST(x AS MAP(VARCHAR, INT)), CAST(y AS DECIMAL(38, 2))",
+    # settag_sql
+    "ALTER TABLE t SET TAG " + ", ".join(f"tag{i} = 'v{i}'" for i in range(70)),
+    "ALTER TABLE t UNSET TAG " + ", ".join(f"tag{i}" for i in range(70)),
+    # describe_sql
+    "DESCRIBE TABLE t",
+    f"DESCRIBE SELECT ARRAY_CONSTRUCT({ELEMENTS})",
+]
+
+
+def _stream(expression, **kwargs):
+    sink = io.StringIO()
+    stream_sql(expression, sink, **kwargs)
+    return sink.getvalue()
+
+
+@pytest.mark.parametrize("threshold", THRESHOLDS)
+@pytest.mark.parametrize("sql", STATEMENTS)
+def test_output_matches_generator(sql, threshold):
+    expression = parse_one(sql, read="snowflake")
+    before = expression.sql("snowflake")
+
+    assert _stream(expression, threshold=threshold) == before
+    # The statement isn't modified while it's being streamed
+    assert expression.sql("snowflake") == before
+
+
+@pytest.mark.parametrize("threshold", THRESHOLDS)
+@pytest.mark.parametrize(
+    "sql, read",
+    [
+        (f"SELECT STRUCT({ELEMENTS}), [{ELEMENTS}]", "bigquery"),
+        (f"SELECT CAST(x AS STRUCT<{', '.join(f'f{i} INT64' for i in range(70))}>)", "bigquery"),
+        (f"SELECT DISTINCT ON (a) {COLUMNS} FROM t ORDER BY a, b", "postgres"),
+        (f"SELECT DISTINCT ON ({COLUMNS}) a FROM (VALUES {ROWS}) AS v(a, b, c)", "postgres"),
+        (f"SELECT x FROM (SELECT DISTINCT ON (a) {COLUMNS} FROM t) AS s", "postgres"),
+    ],
+)
+def test_transpiled_output_matches_generator(sql, read, threshold):
+    expression = parse_one(sql, read=read)
+    assert _stream(expression, threshold=threshold) == expression.sql("snowflake")
+
+
+def test_large_lists_are_written_one_element_at_a_time():
+    rows = ", ".join(f"({i}, 'a{i}', b{i})" for i in range(10000))
+    expression = parse_one(f"INSERT INTO t VALUES {rows}", read="snowflake")
+
+    writes = []
+
+    class Sink:
+        def write(self, text):
+            writes.append(text)
+
+    stream_sql(expression, Sink())
+    assert "".join(writes) == expression.sql("snowflake")
+    assert len(writes) > 10000
+    assert max(map(len, writes)) < 100
+
+
+@pytest.mark.parametrize("threshold", THRESHOLDS)
+@pytest.mark.parametrize(
+    "sql",
+    [
+        f"INSERT INTO t VALUES {LITERAL_ROWS}",
+        f"SELECT [{NUMBERS}], ({NUMBERS})",
+        f"SELECT OBJECT_CONSTRUCT({LITERAL_PAIRS})",
+    ],
+)
+def test_compact_literals_stay_compact(sql, threshold):
+    expression = parse_one(sql, read="snowflake", compact_literals=True)
+    # Walking the tree would expand the literals, so the containers are picked directly
+    containers = (
+        [expression.expression] if isinstance(expression, exp.Insert) else expression.selects
+    )
+    assert all(_literal_run(node) for node in containers)
+
+    assert _stream(expression, threshold=threshold) == parse_one(sql, read="snowflake").sql(
+        "snowflake"
+    )
+    assert all(_literal_run(node) for node in containers)
+
+
+def test_compact_literals_are_written_one_element_at_a_time():
+    rows = ", ".join(f"({i}, 'a{i}')" for i in range(10000))
+    expression = parse_one(f"INSERT INTO t VALUES {rows}", read="snowflake", compact_literals=True)
+
+    writes = []
+
+    class Sink:
+        def write(self, text):
+            writes.append(text)
+
+    stream_sql(expression, Sink())
+    assert _literal_run(expression.expression)
+    assert "".join(writes) == f"INSERT INTO t VALUES {rows}"
+    assert len(writes) > 10000
+    assert max(map(len, writes)) < 100
+
+
+def test_pretty_output_is_generated_as_a_whole():
+    expression = parse_one(f"SELECT ARRAY_CONSTRUCT({ELEMENTS})", read="snowflake")
+    assert _stream(expression, threshold=1, pretty=True) == expression.sql("snowflake", pretty=True)
+
+
+@pytest.mark.parametrize("dialect", ["duckdb", "spark"])
+def test_other_dialects(dialect):
+    expression = parse_one(f"INSERT INTO t VALUES {ROWS}", read="snowflake")
+    assert _stream(expression, dialect=dialect, threshold=1) == expression.sql(dialect)
@@ -0,0 +1,293 @@
+import tracemalloc
+
+import pytest
+
+from sqlglot import exp, parse_one, transforms
+from sqlglot.dialects.snowflake import ScriptBody, Snowflake, _folds_to_literal, _literal_run
+from sqlglot.optimizer.simplify import simplify_literals
+from snowflake_bench import build_to_timestamp_corpus, run_to_timestamp
+
+
+def _select_preprocessor():
+    return Snowflake.Generator.TRANSFORMS[exp.Select]
+
+
+def _count_copies(monkeypatch):
+    copies = []
+    copy = exp.Expression.copy
+
+    def counting_copy(self):
+        copies.append(self)
+        return copy(self)
+
+    monkeypatch.setattr(exp.Expression, "copy", counting_copy)
+    return copies
+
+
+def test_select_without_distinct_on_isnt_copied(monkeypatch):
+    preprocessor = _select_preprocessor()
+    expression = parse_one("SELECT a FROM (SELECT DISTINCT a FROM t) WHERE a > 1")
+    copies, skipped = preprocessor.copies, preprocessor.skipped_copies
+    calls = _count_copies(monkeypatch)
+
+    assert expression.sql("snowflake") == "SELECT a FROM (SELECT DISTINCT a FROM t) WHERE a > 1"
+    assert calls == []
+    assert preprocessor.copies == copies
+    assert preprocessor.skipped_copies == skipped + 2
+
+
+def test_select_with_distinct_on_is_copied_once(monkeypatch):
+    preprocessor = _select_preprocessor()
+    sql = "SELECT x FROM (SELECT DISTINCT ON (a) a, b FROM t ORDER BY c) AS s"
+    expression = parse_one(sql, read="postgres")
+    expected = transforms.preprocess([transforms.eliminate_distinct_on])(
+        Snowflake().generator(), expression.args["from"].this.this
+    )
+    copies, skipped = preprocessor.copies, preprocessor.skipped_copies
+    calls = _count_copies(monkeypatch)
+
+    generated = expression.sql("snowflake")
+    assert expected in generated
+    assert "DISTINCT ON" not in generated
+
+    # Only the Select that has a DISTINCT ON is copied, the outer one is handed over as is
+    inner = expression.args["from"].this.this
+    assert [node for node in calls if node is inner] == [inner]
+    assert not any(node is expression for node in calls)
+    # The rewritten Select is generated directly, but the outer Select and the subquery that
+    # numbers the rows go through the preprocessor, which doesn't copy them
+    assert preprocessor.copies == copies + 1
+    assert preprocessor.skipped_copies == skipped + 2
+
+    # The input tree isn't modified by the transform
+    assert expression.sql("postgres") == sql
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT DISTINCT ON (a) a, b FROM t ORDER BY a, c",
+        "SELECT DISTINCT ON (a, b) * FROM t",
+        "SELECT DISTINCT a FROM t",
+        "WITH x AS (SELECT DISTINCT ON (a) a FROM t) SELECT * FROM x UNION SELECT 1",
+    ],
+)
+def test_distinct_on_output_matches_preprocess(sql):
+    expression = parse_one(sql, read="postgres")
+
+    class Stock(Snowflake):
+        class Generator(Snowflake.Generator):
+            TRANSFORMS = {
+                **Snowflake.Generator.TRANSFORMS,
+                exp.Select: transforms.preprocess([transforms.eliminate_distinct_on]),
+            }
+
+    assert expression.sql("snowflake") == Stock().generate(expression)
+
+
+COMPACTABLE = [
+    "INSERT INTO t VALUES (1, 'a', NULL), (-2.5, 'it''s', TRUE), (3e2, 'back\\\\slash', FALSE)",
+    "SELECT OBJECT_CONSTRUCT('a', 1, 'b', -2, 'c', NULL, 'd', 'x''y')",
+    "SELECT ARRAY_CONSTRUCT(1, 'a', TRUE, NULL), [2, 'b'], ARRAY_CONSTRUCT()",
+    "SELECT a FROM t WHERE (a, b) IN ((1, 'a'), (2, 'b'))",
+    "SELECT * FROM (VALUES (1, 'a'), (2, 'b')) AS v(a, b)",
+    "SELECT [1, 2][0], ARRAY[1, -2], array_construct(1, 2) /* c */, ARRAY_CONSTRUCT(1) OVER ()",
+    # Not compacted: mixed widths, comments and elements that aren't plain literals
+    "INSERT INTO t VALUES (1, 2), (3)",
+    "INSERT INTO t VALUES (1 /* c */, 2), (3, 4)",
+    "SELECT ARRAY_CONSTRUCT(1, a, 2 + 3), OBJECT_CONSTRUCT('a', b)",
+    "SELECT ARRAY_CONSTRUCT(-a, -'1', 1)",
+    "SELECT [1, 'a' 'b', 2::INT, .5, - - 1, 2:3], [1, 2 /* c */, 3]",
+]
+
+
+def _compact(sql):
+    return parse_one(sql, read="snowflake", compact_literals=True)
+
+
+@pytest.mark.parametrize("write", ["snowflake", "duckdb", "spark", "bigquery"])
+@pytest.mark.parametrize("sql", COMPACTABLE)
+def test_compact_literals_generate_like_regular_ones(sql, write):
+    compact = _compact(sql)
+    regular = parse_one(sql, read="snowflake")
+
+    assert compact.sql(write) == regular.sql(write)
+    assert compact.sql(write, pretty=True) == regular.sql(write, pretty=True)
+    assert compact == regular
+
+
+@pytest.mark.parametrize("sql", COMPACTABLE)
+def test_compact_literals_expand_on_access(sql):
+    regular = parse_one(sql, read="snowflake")
+
+    assert repr(_compact(sql)) == repr(regular)
+    assert [node.sql() for node, *_ in _compact(sql).walk()] == [
+        node.sql() for node, *_ in regular.walk()
+    ]
+    assert _compact(sql).copy() == regular
+
+
+def test_compact_literals_stay_compact_when_generated():
+    expression = _compact("INSERT INTO t VALUES (1, 'a'), (2, 'b')")
+    values = expression.expression
+    assert _literal_run(values) is not None
+
+    expression.sql("snowflake")
+    expression.copy()
+    assert _literal_run(values) is not None
+
+    # Expanding the run replaces it with regular expressions that can be modified
+    values.expressions[0].expressions[0].replace(exp.Literal.number(5))
+    assert _literal_run(values) is None
+    assert expression.sql("snowflake") == "INSERT INTO t VALUES (5, 'a'), (2, 'b')"
+    assert values.expressions[1].parent is values
+
+
+def test_compact_literals_are_read_off_the_tokens():
+    sql = f"SELECT [{', '.join(str(i) for i in range(20000))}]"
+    tokens = Snowflake().tokenize(sql)
+
+    def peak(**opts):
+        tracemalloc.start()
+        try:
+            Snowflake().parser(**opts).parse(tokens, sql)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    # The literals are never built, rather than built and compacted afterwards
+    assert peak(compact_literals=True) * 5 < peak()
+
+
+def test_compact_literals_can_be_replaced():
+    array = _compact("SELECT ARRAY_CONSTRUCT(1, 2)").selects[0]
+    array.set("expressions", [exp.column("a")])
+    assert array.sql("snowflake") == "[a]"
+
+    array = _compact("SELECT ARRAY_CONSTRUCT(1, 2)").selects[0]
+    array.args.pop("expressions")
+    array.append("expressions", exp.Literal.number(3))
+    assert array.sql("snowflake") == "[3]"
+
+
+def test_script_body_statements():
+    sql = (
+        "CREATE PROCEDURE p() RETURNS INT LANGUAGE SQL AS "
+        "$$BEGIN SELECT 1; UPDATE t SET a = 1; BEGIN TRANSACTION; END$$"
+    )
+    expression = parse_one(sql, read="snowflake")
+    body = expression.expression
+
+    assert isinstance(body, ScriptBody)
+    assert [statement.sql("snowflake") for statement in body.statements] == [
+        "SELECT 1",
+        "UPDATE t SET a = 1",
+        "BEGIN",
+    ]
+    assert body.statements is body.statements
+    assert expression.sql("snowflake") == (
+        "CREATE PROCEDURE p() RETURNS INT LANGUAGE SQL AS "
+        "'BEGIN SELECT 1; UPDATE t SET a = 1; BEGIN TRANSACTION; END'"
+    )
+
+    body.set("this", "SELECT 2")
+    assert [statement.sql() for statement in body.statements] == ["SELECT 2"]
+
+
+def test_script_body_keeps_compound_statements_whole():
+    sql = (
+        "CREATE PROCEDURE p() RETURNS INT AS $$BEGIN "
+        "IF (x > 1) THEN SELECT 1; ELSEIF (x > 0) THEN LOOP BREAK; END LOOP; ELSE SELECT 3; END IF; "
+        "FOR i IN 1 TO 3 DO SELECT CASE WHEN i > 1 THEN 1 END; END FOR; "
+        "SELECT 2; END$$"
+    )
+    statements = parse_one(sql, read="snowflake").expression.statements
+    assert [statement.sql("snowflake") for statement in statements] == [
+        "IF (x > 1) THEN SELECT 1; ELSEIF (x > 0) THEN LOOP BREAK; END LOOP; ELSE SELECT 3; END IF",
+        "FOR i IN 1 TO 3 DO SELECT CASE WHEN i > 1 THEN 1 END; END FOR",
+        "SELECT 2",
+    ]
+    assert [type(statement) for statement in statements] == [exp.Command, exp.Command, exp.Select]
+
+
+def test_script_body_falls_back_to_commands():
+    body = parse_one("CREATE FUNCTION f() RETURNS INT AS $$SELECT (; SELECT 2$$", read="snowflake")
+    assert [type(statement) for statement in body.expression.statements] == [
+        exp.Command,
+        exp.Select,
+    ]
+
+    # The tokenizer can't make sense of an unterminated string
+    sql = "CREATE FUNCTION f() RETURNS INT AS 'SELECT 1; SELECT ''a'"
+    body = parse_one(sql, read="snowflake").expression
+    assert [statement.name for statement in body.statements] == ["SELECT 1; SELECT 'a"]
+    assert isinstance(body.statements[0], exp.Command)
+
+
+def test_script_body_is_only_used_for_sql_routines():
+    sql = "CREATE FUNCTION f() RETURNS INT LANGUAGE JAVASCRIPT AS 'return 1'"
+    assert type(parse_one(sql, read="snowflake").expression) is exp.Literal
+    assert type(parse_one("CREATE TABLE t AS SELECT 'a'", read="snowflake").expression) is (
+        exp.Select
+    )
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "1",
+        "'2020-01-01'",
+        "-5",
+        "-a",
+        "-'1'",
+        "a",
+        "40 * 365 * 86400",
+        "1 + 2 + 3.5",
+        "1 - 2 - 3",
+        "1 + a",
+        "1 + 2 * 3",
+        "'1' + 2",
+        "(1 + 2) + 3",
+        "10 / 4",
+        "10 / 4 / 2.0",
+        "1.5 / 3 / 2",
+        "10 / 2.5 / 4 / 2",
+        "2 / 0.0",
+        "1e3 * 2",
+        "a:ts::NUMBER",
+        "DATE_PART(EPOCH_MILLISECOND, a) / 1000",
+        "DATE_PART(EPOCH_SECOND, a)",
+        "CAST(1 AS INT)",
+    ],
+)
+def test_folds_to_literal_matches_simplify_literals(sql):
+    expression = parse_one(f"SELECT {sql}", read="snowflake").selects[0]
+
+    def simplified():
+        return isinstance(simplify_literals(expression.copy(), root=True), exp.Literal)
+
+    assert _outcome(_folds_to_literal, expression) == _outcome(simplified)
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        ("TO_TIMESTAMP(40 * 365 * 86400)", "TO_TIMESTAMP(40 * 365 * 86400)"),
+        ("TO_TIMESTAMP('12345')", "TO_TIMESTAMP('12345')"),
+        ("TO_TIMESTAMP('2020-01-01')", "TO_TIMESTAMP('2020-01-01', 'yyyy-mm-DD hh24:mi:ss')"),
+        ("TO_TIMESTAMP(a + 1)", "TO_TIMESTAMP(a + 1, 'yyyy-mm-DD hh24:mi:ss')"),
+    ],
+)
+def test_single_argument_to_timestamp(sql, expected):
+    assert parse_one(sql, read="snowflake").sql("snowflake") == expected
+
+
+def test_to_timestamp_benchmark_corpus_agrees_with_simplify_literals():
+    assert run_to_timestamp(build_to_timestamp_corpus(100), repeat=1)
+
+
+def _outcome(function, *args):
+    try:
+        return function(*args)
+    except Exception as e:
+        return type(e)
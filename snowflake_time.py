@@ -0,0 +1,143 @@
+"""
+Memoized translation of time format strings between dialects.
+
+Dialects describe their time formats with a `TIME_MAPPING` from their own format elements to
+Python's `strftime` directives, e.g. Snowflake's "HH24" maps to "%H". Converting a format from one
+dialect to another goes through both the source dialect's mapping and the target dialect's
+inverse mapping, scanning the string twice. A `FormatTranslator` does both steps for a given pair
+of dialects and remembers the result, which pays off for workloads that keep seeing the same few
+formats, such as audits of `TO_TIMESTAMP`/`TO_CHAR` calls.
+
+Example:
+    >>> translator = get_translator("snowflake", "duckdb")
+    >>> translator.translate("YYYY-MM-DD HH24:MI:SS")
+    '%Y-%m-%d %H:%M:%S'
+    >>> translator.inverse.translate("%Y-%m-%d")
+    'yyyy-mm-DD'
+    >>> get_translator("snowflake").translate_many(["DD/MM/YYYY", "HH12:MI", "DD/MM/YYYY"])
+    ['%d/%m/%Y', '%I:%M', '%d/%m/%Y']
+"""
+
+from __future__ import annotations
+
+import typing as t
+from functools import lru_cache
+
+from sqlglot.dialects.dialect import Dialect, DialectType
+from sqlglot.time import format_time
+
+DEFAULT_MAXSIZE = 4096
+
+
+class FormatTranslator:
+    """
+    Translates time format strings from one dialect to another.
+
+    The format strings are expected without their quotes. Translations are kept in an LRU cache
+    of `maxsize` entries, which is specific to the translator.
+
+    Args:
+        read: the dialect of the formats to translate. If `None`, the formats are expected to use
+            Python's `strftime` directives.
+        write: the dialect to translate the formats to. If `None`, the formats are translated
+            to Python's `strftime` directives.
+        maxsize: the maximum number of translations that are remembered.
+    """
+
+    def __init__(
+        self,
+        read: DialectType = "snowflake",
+        write: DialectType = None,
+        maxsize: int = DEFAULT_MAXSIZE,
+    ) -> None:
+        self.read = Dialect.get_or_raise(read) if read is not None else None
+        self.write = Dialect.get_or_raise(write) if write is not None else None
+        self.maxsize = maxsize
+        self._inverse: t.Optional[FormatTranslator] = None
+        self._cached = lru_cache(maxsize=maxsize)(self._translate)
+
+    @property
+    def inverse(self) -> FormatTranslator:
+        """The translator going the other way around, built on first access."""
+        if self._inverse is None:
+            self._inverse = FormatTranslator(self.write, self.read, self.maxsize)
+            self._inverse._inverse = self
+        return self._inverse
+
+    def translate(self, format: str) -> t.Optional[str]:
+        """
+        Translates a format string.
+
+        Args:
+            format: the format string, without quotes.
+
+        Returns:
+            The translated format string, or `None` if `format` is empty.
+        """
+        return self._cached(format)
+
+    def translate_many(self, formats: t.Iterable[str]) -> t.List[t.Optional[str]]:
+        """
+        Translates a batch of format strings, scanning each distinct string at most once.
+
+        Args:
+            formats: the format strings, without quotes.
+
+        Returns:
+            The translated format strings, in the same order as `formats`.
+        """
+        translations: t.Dict[str, t.Optional[str]] = {}
+        result = []
+
+        for format in formats:
+            if format not in translations:
+                translations[format] = self.translate(format)
+            result.append(translations[format])
+
+        return result
+
+    def cache_info(self) -> t.Any:
+        """Returns the statistics of the translation cache, as `functools.lru_cache` does."""
+        return self._cached.cache_info()
+
+    def cache_clear(self) -> None:
+        self._cached.cache_clear()
+
+    def _translate(self, format: str) -> t.Optional[str]:
+        if not format:
+            return None
+        if self.read is not None:
+            format = format_time(format, self.read.TIME_MAPPING, self.read.TIME_TRIE) or ""
+        if self.write is not None:
+            write = self.write
+            format = format_time(format, write.INVERSE_TIME_MAPPING, write.INVERSE_TIME_TRIE) or ""
+        return format or None
+
+    def __repr__(self) -> str:
+        read = self.read.__name__ if self.read else None
+        write = self.write.__name__ if self.write else None
+        return f"FormatTranslator(read={read}, write={write})"
+
+
+@lru_cache(maxsize=None)
+def _translator(
+    read: t.Optional[t.Type[Dialect]], write: t.Optional[t.Type[Dialect]]
+) -> FormatTranslator:
+    return FormatTranslator(read, write)
+
+
+def get_translator(read: DialectType = "snowflake", write: DialectType = None) -> FormatTranslator:
+    """
+    Returns the shared translator for a pair of dialects, building it the first time it's needed.
+
+    Args:
+        read: the dialect of the formats to translate, or `None` for `strftime` directives.
+        write: the dialect to translate the formats to, or `None` for `strftime` directives.
+
+    Returns:
+        The translator.
+    """
+    return _translator(
+        Dialect.get_or_raise(read) if read is not None else None,
+        Dialect.get_or_raise(write) if write is not None else None,
+    )
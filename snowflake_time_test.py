@@ -0,0 +1,92 @@
+import pytest
+
+from sqlglot import exp, parse_one
+from sqlglot.dialects.dialect import Dialect
+from sqlglot.dialects.snowflake import Snowflake
+from sqlglot.time import format_time
+from snowflake_time import FormatTranslator, get_translator
+
+FORMATS = [
+    "YYYY-MM-DD HH24:MI:SS",
+    "DD/MM/YYYY",
+    "HH12:MI AM",
+    "MON DD, YYYY",
+    "yyyy-mm-dd",
+    "YYYYMMDD",
+    "literal text",
+    "%Y",
+]
+
+
+def _scan(format, read, write):
+    # Translates a format the way the dialects do, one mapping at a time
+    if read is not None:
+        dialect = Dialect.get_or_raise(read)
+        format = format_time(format, dialect.TIME_MAPPING, dialect.TIME_TRIE) or ""
+    if write is not None:
+        dialect = Dialect.get_or_raise(write)
+        format = format_time(format, dialect.INVERSE_TIME_MAPPING, dialect.INVERSE_TIME_TRIE) or ""
+    return format or None
+
+
+@pytest.mark.parametrize(
+    "read, write",
+    [("snowflake", None), ("snowflake", "duckdb"), ("snowflake", "bigquery"), (None, "snowflake")],
+)
+def test_translations_match_format_time(read, write):
+    translator = FormatTranslator(read, write)
+    for format in FORMATS:
+        assert translator.translate(format) == _scan(format, read, write), format
+    assert translator.translate_many(FORMATS) == [_scan(f, read, write) for f in FORMATS]
+
+
+def test_translations_match_transpilation():
+    translator = get_translator("snowflake", "duckdb")
+    expression = parse_one("SELECT TO_TIMESTAMP(a, 'DD/MM/YYYY HH24:MI')", read="snowflake")
+    assert expression.sql("duckdb") == (
+        f"SELECT STRPTIME(a, '{translator.translate('DD/MM/YYYY HH24:MI')}')"
+    )
+
+
+def test_translations_are_memoized():
+    translator = FormatTranslator("snowflake", "duckdb", maxsize=2)
+    assert translator.translate_many(["DD", "MM", "DD", "DD"]) == ["%d", "%m", "%d", "%d"]
+    assert translator.cache_info().misses == 2
+    assert translator.cache_info().hits == 0
+
+    translator.translate("MM")
+    translator.translate("YYYY")
+    translator.translate("DD")
+    assert translator.cache_info().misses == 4
+    assert translator.cache_info().currsize == 2
+
+    translator.cache_clear()
+    assert translator.cache_info().currsize == 0
+
+
+def test_empty_formats():
+    assert FormatTranslator().translate("") is None
+
+
+def test_inverse():
+    translator = FormatTranslator("snowflake", "duckdb")
+    inverse = translator.inverse
+    assert (inverse.read, inverse.write) == (translator.write, translator.read)
+    assert inverse.inverse is translator
+    assert inverse.translate(translator.translate("YYYY-MM-DD")) == "yyyy-mm-DD"
+    assert repr(inverse) == "FormatTranslator(read=DuckDB, write=Snowflake)"
+
+
+def test_translators_are_shared():
+    assert get_translator("snowflake", "duckdb") is get_translator(Snowflake, "duckdb")
+    assert get_translator("snowflake") is not get_translator("snowflake", "duckdb")
+
+
+def test_dialect_translations_are_memoized_per_class():
+    class Custom(Snowflake):
+        TIME_MAPPING = {**Snowflake.TIME_MAPPING, "Q": "%q"}
+
+    assert Snowflake.format_time("'YYYY Q'").name == "%Y Q"
+    assert Custom.format_time("'YYYY Q'").name == "%Y %q"
+    assert Snowflake.format_time(exp.Literal.string("YYYY Q")).name == "%Y Q"
+    assert Snowflake.format_time(exp.column("a")) == exp.column("a")
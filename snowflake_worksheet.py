@@ -0,0 +1,244 @@
+"""
+Incremental tokenization and parsing of worksheets that are being edited.
+
+A `Worksheet` keeps a script split into statements, each of which is tokenized and parsed on its
+own, the first time its tokens or syntax trees are needed. When the text is edited, only the
+region around the edit is scanned again (see `snowflake_split.scan_statements`): scanning starts
+at the beginning of the first statement that may be affected, which is always outside of any
+string, quoted identifier or comment, and stops as soon as it reaches the start of a statement
+that lies past the edit and that existed before, since everything that follows is unchanged.
+
+Edits that open or close a `$$` string, a `/* */` comment or a quote therefore naturally extend
+the scanned region until the lexical state is back in sync. Only the statements whose text
+changed lose their tokens and syntax trees; the offsets of the following statements are shifted.
+
+Example:
+    >>> worksheet = Worksheet("SELECT 1;\\nSELECT 2;\\nSELECT 3")
+    >>> change = worksheet.edit(17, 1, "a + 1")
+    >>> [statement.sql for statement in change.added]
+    ['\\nSELECT a + 1']
+    >>> [expression.sql() for expression in worksheet.expressions()]
+    ['SELECT 1', 'SELECT a + 1', 'SELECT 3']
+    >>> change = worksheet.edit(9, 0, "/*")
+    >>> len(change.removed), len(worksheet.statements)
+    (2, 1)
+    >>> change = worksheet.edit(len(worksheet.text), 0, " */ SELECT 4")
+    >>> [statement.sql for statement in change.added]
+    ['/*\\nSELECT a + 1;\\nSELECT 3 */ SELECT 4']
+"""
+
+from __future__ import annotations
+
+import typing as t
+from bisect import bisect_right
+
+from sqlglot import exp
+from sqlglot.dialects.dialect import Dialect, DialectType
+from sqlglot.dialects.snowflake import TOKENIZE_ERRORS
+from sqlglot.errors import ParseError
+from sqlglot.tokens import Token
+from snowflake_split import scan_statements
+
+_UNSET: t.Any = object()
+
+
+class WorksheetStatement:
+    """
+    A statement of a worksheet.
+
+    Attributes:
+        sql: the text of the statement, without the terminating semicolon.
+        start: the offset of the statement in the worksheet.
+        end: the offset of the statement's terminating semicolon, or of the end of the worksheet.
+    """
+
+    __slots__ = ("sql", "start", "end", "_worksheet", "_tokens", "_expressions", "_error")
+
+    def __init__(self, worksheet: Worksheet, sql: str, start: int, end: int) -> None:
+        self.sql = sql
+        self.start = start
+        self.end = end
+        self._worksheet = worksheet
+        self._tokens: t.Optional[t.List[Token]] = None
+        self._expressions: t.Any = _UNSET
+        self._error: t.Optional[Exception] = None
+
+    @property
+    def tokens(self) -> t.List[Token]:
+        """
+        The statement's tokens. Their `line`, `col`, `start` and `end` are relative to the
+        statement, which starts at offset `start` of the worksheet.
+
+        Raises:
+            ValueError: if the statement couldn't be tokenized.
+        """
+        if self._tokens is None:
+            if self._error is not None:
+                raise self._error
+            try:
+                self._tokens = self._worksheet.dialect.tokenize(self.sql)
+            except TOKENIZE_ERRORS as e:
+                self._error = e
+                raise
+        return self._tokens
+
+    @property
+    def expressions(self) -> t.List[t.Optional[exp.Expression]]:
+        """
+        The statement's syntax trees.
+
+        Raises:
+            ValueError: if the statement couldn't be tokenized.
+            ParseError: if the statement couldn't be parsed.
+        """
+        if self._expressions is _UNSET:
+            tokens = self.tokens
+            if self._error is not None:
+                raise self._error
+            try:
+                self._expressions = self._worksheet.dialect.parser(**self._worksheet.opts).parse(
+                    tokens, self.sql
+                )
+            except ParseError as e:
+                self._error = e
+                raise
+        return self._expressions
+
+    @property
+    def error(self) -> t.Optional[Exception]:
+        """The error that occurred while tokenizing or parsing the statement, if any."""
+        try:
+            self.expressions
+        except (*TOKENIZE_ERRORS, ParseError):
+            pass
+        return self._error
+
+    def _reuse(self, other: WorksheetStatement) -> None:
+        self._tokens = other._tokens
+        self._expressions = other._expressions
+        self._error = other._error
+
+    def __repr__(self) -> str:
+        return f"WorksheetStatement(start={self.start}, end={self.end}, sql={self.sql!r})"
+
+
+class WorksheetChange(t.NamedTuple):
+    """
+    The statements that were replaced by an edit.
+
+    Attributes:
+        index: the position of the first replaced statement in `Worksheet.statements`.
+        removed: the statements that were removed.
+        added: the statements that took their place.
+    """
+
+    index: int
+    removed: t.List[WorksheetStatement]
+    added: t.List[WorksheetStatement]
+
+
+class Worksheet:
+    """
+    A script that is tokenized and parsed incrementally as it's edited.
+
+    Args:
+        text: the initial text of the worksheet.
+        dialect: the dialect of the worksheet.
+        **opts: other `sqlglot.parser.Parser` options.
+    """
+
+    def __init__(self, text: str = "", dialect: DialectType = "snowflake", **opts) -> None:
+        self.dialect = Dialect.get_or_raise(dialect)()
+        self.opts = opts
+        self.text = text
+        self.statements: t.List[WorksheetStatement] = [
+            WorksheetStatement(self, *statement) for statement in scan_statements(text)
+        ]
+
+    def edit(self, offset: int, removed: int, inserted: str) -> WorksheetChange:
+        """
+        Replaces `removed` characters at `offset` by `inserted`.
+
+        Args:
+            offset: the offset of the edit.
+            removed: the number of characters to remove.
+            inserted: the text to insert.
+
+        Returns:
+            The statements that were replaced.
+        """
+        old_text = self.text
+        if offset < 0 or removed < 0 or offset + removed > len(old_text):
+            raise ValueError(
+                f"Edit ({offset}, {removed}) is out of bounds for a text of size {len(old_text)}"
+            )
+
+        text = old_text[:offset] + inserted + old_text[offset + removed :]
+        delta = len(inserted) - removed
+        edit_end = offset + removed
+        statements = self.statements
+
+        # The state at the start of a statement only depends on the text that precedes it, and
+        # so does the state right after the semicolon that terminates a statement
+        first = bisect_right([s.start for s in statements], offset) - 1
+        if first < 0:
+            first = anchor = 0
+        elif statements[first].end < offset:
+            anchor = statements[first].end + 1
+            first += 1
+        else:
+            anchor = statements[first].start
+
+        # Scanning stops at the first statement that starts exactly where one of the old
+        # statements past the edit now starts: the text that follows is the same as before
+        resync = {
+            s.start + delta: i
+            for i, s in enumerate(statements[first:], first)
+            if s.start >= edit_end
+        }
+        stop = len(statements)
+        added = []
+
+        for sql, start, end in scan_statements(text[anchor:]):
+            i = resync.get(anchor + start)
+            if i is not None:
+                stop = i
+                break
+            added.append(WorksheetStatement(self, sql, anchor + start, anchor + end))
+
+        removed_statements = statements[first:stop]
+        reusable = {statement.sql: statement for statement in removed_statements}
+        for statement in added:
+            previous = reusable.get(statement.sql)
+            if previous is not None:
+                statement._reuse(previous)
+
+        for statement in statements[stop:]:
+            statement.start += delta
+            statement.end += delta
+
+        self.text = text
+        self.statements = statements[:first] + added + statements[stop:]
+        return WorksheetChange(first, removed_statements, added)
+
+    def statement_at(self, offset: int) -> t.Optional[WorksheetStatement]:
+        """Returns the statement that spans `offset`, including its terminating semicolon."""
+        i = bisect_right([s.start for s in self.statements], offset) - 1
+        if i >= 0 and offset <= self.statements[i].end:
+            return self.statements[i]
+        return None
+
+    def expressions(self) -> t.List[t.Optional[exp.Expression]]:
+        """
+        Returns the syntax trees of all the statements, parsing the ones that need to be.
+
+        Raises:
+            ValueError: if one of the statements couldn't be tokenized.
+            ParseError: if one of the statements couldn't be parsed.
+        """
+        return [expression for s in self.statements for expression in s.expressions]
+
+    def position(self, offset: int) -> t.Tuple[int, int]:
+        """Returns the 1-based line and column of `offset`."""
+        line = self.text.count("\n", 0, offset) + 1
+        return line, offset - self.text.rfind("\n", 0, offset)
@@ -0,0 +1,136 @@
+import random
+
+import pytest
+
+from sqlglot.errors import ParseError
+from snowflake_split import scan_statements
+from snowflake_worksheet import Worksheet
+
+SCRIPT = (
+    "SELECT 1;\n"
+    "SELECT 'a;b', $$c;d$$ FROM t; -- e;\n"
+    '/* f; */ SELECT "g;h" FROM u;\n'
+    "CREATE FUNCTION f() RETURNS INT AS $$ SELECT 1; $$;\n"
+    "SELECT 2 // i;\n"
+    ";\n"
+    "SELECT 3"
+)
+
+FRAGMENTS = ["'", '"', "$$", "/*", "*/", "--", "//", "\n", ";", "a", "SELECT 4", " ", "\\"]
+
+
+def _spans(worksheet):
+    return [(s.sql, s.start, s.end) for s in worksheet.statements]
+
+
+def _fresh(text):
+    return [tuple(statement) for statement in scan_statements(text)]
+
+
+def test_random_edits_match_a_fresh_scan():
+    rng = random.Random(0)
+    worksheet = Worksheet(SCRIPT)
+
+    for _ in range(2000):
+        text = worksheet.text
+        offset = rng.randrange(len(text) + 1)
+        removed = rng.randrange(min(len(text) - offset, 6) + 1)
+        inserted = "".join(rng.choice(FRAGMENTS) for _ in range(rng.randrange(3)))
+
+        change = worksheet.edit(offset, removed, inserted)
+        assert worksheet.text == text[:offset] + inserted + text[offset + removed :]
+        assert _spans(worksheet) == _fresh(worksheet.text), (offset, removed, inserted)
+        assert worksheet.statements[change.index : change.index + len(change.added)] == (
+            change.added
+        )
+
+        # Keeps the worksheet from growing or shrinking too much
+        if len(worksheet.text) > 2 * len(SCRIPT) or len(worksheet.text) < len(SCRIPT) // 2:
+            worksheet = Worksheet(SCRIPT)
+
+
+def test_trees_match_a_full_parse():
+    rng = random.Random(1)
+    worksheet = Worksheet(SCRIPT)
+
+    for _ in range(300):
+        offset = rng.randrange(len(worksheet.text) + 1)
+        worksheet.edit(offset, 0, rng.choice(["a", " ", "1", "SELECT 5;"]))
+
+        fresh = Worksheet(worksheet.text)
+        for statement, expected in zip(worksheet.statements, fresh.statements):
+            assert type(statement.error) is type(expected.error)
+            if statement.error is None:
+                assert statement.expressions == expected.expressions
+
+
+def test_unchanged_statements_keep_their_trees():
+    worksheet = Worksheet("SELECT 1;\nSELECT 2;\nSELECT 3")
+    trees = [statement.expressions for statement in worksheet.statements]
+
+    change = worksheet.edit(17, 1, "a + 1")
+    assert (change.index, len(change.removed), len(change.added)) == (1, 1, 1)
+    assert worksheet.statements[0].expressions is trees[0]
+    assert worksheet.statements[1].expressions is not trees[1]
+    assert worksheet.statements[2].expressions is trees[2]
+    assert worksheet.statements[2].start == 23
+
+    # The first statement is scanned again, since the edit touches its semicolon, but its text
+    # didn't change
+    change = worksheet.edit(8, 0, ";\nSELECT 9")
+    assert [statement.sql for statement in change.removed] == ["SELECT 1"]
+    assert [statement.sql for statement in change.added] == ["SELECT 1", "\nSELECT 9"]
+    assert worksheet.statements[0].expressions is trees[0]
+
+    # Opening a comment swallows the following statements and closing it brings them back
+    worksheet.edit(0, 0, "/* ")
+    assert worksheet.statements == []
+    worksheet.edit(3, 0, " */")
+    assert [statement.sql for statement in worksheet.statements] == [
+        "/*  */SELECT 1",
+        "\nSELECT 9",
+        "\nSELECT a + 1",
+        "\nSELECT 3",
+    ]
+
+
+def test_errors():
+    # The splitter leaves an unterminated quoted identifier at the end of the text alone
+    worksheet = Worksheet('SELECT (;\nSELECT 1;\nSELECT "a')
+    assert [type(statement.error) for statement in worksheet.statements] == [
+        ParseError,
+        type(None),
+        ValueError,
+    ]
+    with pytest.raises(ParseError):
+        worksheet.expressions()
+    with pytest.raises(ValueError):
+        worksheet.statements[2].tokens
+    with pytest.raises(ValueError):
+        worksheet.statements[2].expressions
+
+    worksheet.edit(len(worksheet.text), 0, '"')
+    worksheet.edit(7, 1, "2")
+    assert [expression.sql() for expression in worksheet.expressions()] == [
+        "SELECT 2",
+        "SELECT 1",
+        'SELECT "a"',
+    ]
+
+
+def test_invalid_edits():
+    worksheet = Worksheet("SELECT 1")
+    for edit in [(-1, 0, ""), (0, 9, ""), (9, 0, "a"), (4, -1, "")]:
+        with pytest.raises(ValueError):
+            worksheet.edit(*edit)
+
+
+def test_statement_at_and_position():
+    worksheet = Worksheet("SELECT 1;\n\nSELECT 2")
+    assert worksheet.statement_at(0).sql == "SELECT 1"
+    assert worksheet.statement_at(8).sql == "SELECT 1"
+    assert worksheet.statement_at(9).sql == "\n\nSELECT 2"
+    assert worksheet.statement_at(100) is None
+    assert worksheet.position(0) == (1, 1)
+    assert worksheet.position(11) == (3, 1)
+    assert worksheet.position(13) == (3, 3)